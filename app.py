@@ -1,22 +1,66 @@
-from flask import Flask, render_template, request, redirect, session, jsonify, send_file
-from reportlab.pdfgen import canvas
-from io import BytesIO
+from flask import Flask, render_template, request, redirect, session, jsonify, send_file, Response, flash
+from io import BytesIO, StringIO
 import os
-from utils.ocr_utils import extract_aadhaar_number
+import uuid
+import pandas as pd
+from utils.ocr_utils import extract_aadhaar_fields
+from utils.statement_parser import extract_financials
+from utils.scoring import APPROVAL_THRESHOLD, ModelNotAvailable, prediction_cache, score_application, score_frame
+from utils.jobs import JobQueue, QueueFull, WorkerPool
+from utils.storage import get_document_store, UploadTooLarge, MAX_UPLOAD_BYTES
+from utils.sessions import SqliteSessionInterface
+from utils.question_graph import answer, validate_application
+from utils.aadhaar import digits_of, get_aadhaar_index, is_valid_aadhaar
+from utils.name_index import screen_applicant
+from utils.affordability import assess_affordability, to_amount
+from utils import metrics
+from utils.ocr_cache import get_ocr_cache
+from utils.reports import (RENDER_REPORTS_JOB, batch_report_items, cached_report, get_report_cache,
+                           queue_batch_reports, stream_batch_zip)
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'
+# Session data stays server-side in database.db; the cookie only holds a signed id
+app.session_interface = SqliteSessionInterface()
 UPLOAD_FOLDER = 'uploads'
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Three document fields per request; each file is also capped individually by the store
+app.config['MAX_CONTENT_LENGTH'] = 3 * MAX_UPLOAD_BYTES
+MAX_BATCH_ROWS = 10000
 
+# Document verification runs asynchronously (see utils/jobs.py and worker.py)
+VERIFY_JOB = 'verify_documents'
+JOB_HANDLERS = {
+    VERIFY_JOB: 'app:process_verification_job',
+    RENDER_REPORTS_JOB: 'utils.reports:render_reports_job',
+}
+JOB_RESULT_KEYS = ['loan_result', 'loan_assessment', 'aadhaar_verified', 'extracted_aadhaar',
+                   'extracted_name', 'name_verified', 'financials', 'screening']
+# Duplicate-Aadhaar and name screening results are for reviewers only: they stay in the
+# job result and session under this key and are never shown to the applicant
+SCREENING_KEY = 'screening'
+job_queue = JobQueue()
 
-def generate_assessment(data, aadhaar_verified=True, extracted_aadhaar=None):
-    income = int(data.get('income', 0))
+# Request timing on every route plus stage spans; served in Prometheus format on /metrics
+metrics.init_app(app)
+metrics.register_collector(lambda: metrics.cache_counters('ocr', get_ocr_cache()))
+metrics.register_collector(lambda: metrics.cache_counters('report', get_report_cache()))
+metrics.register_collector(lambda: metrics.cache_counters('prediction', prediction_cache))
+metrics.register_gauge(lambda: [('job_queue_depth', {}, job_queue.depth())])
+
+
+def generate_assessment(data, aadhaar_verified=True, extracted_aadhaar=None, financials=None):
+    financials = financials or {}
+    declared_income = int(to_amount(data.get('income', 0)))
+    # Net pay read from the salary slip / statement outranks the declared figure
+    income = int(financials['net_salary']) if financials.get('net_salary') else declared_income
     loan_amnt = data.get('loan_amnt', 'N/A')
     loan_type = data.get('loan_type', 'N/A')
     bank = data.get('bank_name', 'N/A')
     tenure = data.get('loan_tenure', 'N/A')
     user_name = data.get('name', 'N/A')
+    budget_line = ""
+    model = None
 
     # Check for document mismatches first (Aadhaar number only)
     if not aadhaar_verified:
@@ -28,35 +72,84 @@ def generate_assessment(data, aadhaar_verified=True, extracted_aadhaar=None):
             "Contact support if you believe this is an error"
         ]
     else:
-        # Eligibility logic without credit score
-        min_income_threshold = 25000
-        is_income_sufficient = income >= min_income_threshold
-        status = "Eligible" if is_income_sufficient else "Not Eligible"
-        reason = "Sufficient income for requested loan" if is_income_sufficient else "Income below minimum threshold"
+        # Affordability: EMI within the FOIR cap across lender products and tenures
+        with metrics.span('assessment_stage_seconds', stage='affordability'):
+            affordability = assess_affordability(data, financials)
+        max_principal = affordability['max_principal']
+        if to_amount(loan_amnt) > 0:
+            is_affordable = affordability['eligible']
+        else:
+            is_affordable = max_principal > 0
+        # Model score, cached by feature vector; rule only when the model is missing or slow
+        with metrics.span('assessment_stage_seconds', stage='model'):
+            model = score_application(data, financials)
+        metrics.inc('assessment_scores_total', source=model['source'])
+        model_approves = model['probability'] is None or model['probability'] >= APPROVAL_THRESHOLD
+        eligible = is_affordable and model_approves
+        status = "Eligible" if eligible else "Not Eligible"
+        if is_affordable and not model_approves:
+            reason = f"Approval probability {model['probability']:.0%} is below the {APPROVAL_THRESHOLD:.0%} threshold"
+        elif is_affordable and not affordability['offers']:
+            reason = f"You can borrow up to ₹{max_principal:,.0f} within the {affordability['foir_limit']:.0%} FOIR limit"
+        elif is_affordable:
+            reason = f"Requested loan fits within the {affordability['foir_limit']:.0%} FOIR limit"
+        elif not affordability['has_product']:
+            reason = f"No lender product matches the loan type '{loan_type}'"
+        elif not affordability['meets_min_income']:
+            reason = "Income below the lenders' minimum for this loan type"
+        elif max_principal > 0:
+            reason = f"Requested amount exceeds what your income supports (up to ₹{max_principal:,.0f})"
+        else:
+            reason = "Existing EMIs leave no room for a new loan at your income"
+        budget_line = (f"📊 Affordable EMI: ₹{affordability['emi_budget']:,.0f}/month "
+                       f"(FOIR limit {affordability['foir_limit']:.0%})\n")
         recommendations = (
             [
-                "Maintain consistent income inflow",
+                f"{o['product'] or o['bank'] + ' ' + o['loan_type'] + ' loan'} ({o['bank']}) at {o['rate']:.2f}% "
+                f"for {o['tenure']} months: EMI ₹{o['emi']:,.0f}{' - your salary account bank' if o['salary_bank'] else ''}"
+                for o in affordability['offers']
+            ] + [
+                # Shorter tenures are only suggested; the offers above use the tenure asked for
+                f"To pay less interest: {o['alternatives'][-1]['tenure']} months with {o['bank']} "
+                f"at EMI ₹{o['alternatives'][-1]['emi']:,.0f}"
+                for o in affordability['offers'][:1] if o['alternatives']
+            ] + ["Upload clear documents to speed up approval."]
+            if eligible
+            else [
+                "Choose one of the listed loan types (Personal, Home, Vehicle, Business, Education or Gold)"
+                if not affordability['has_product']
+                else f"Consider a loan amount up to ₹{max_principal:,.0f}" if max_principal > 0
+                else "Reduce existing EMIs before applying" if affordability['meets_min_income']
+                else "Maintain consistent income inflow",
                 "Keep existing EMIs low to improve affordability",
                 "Consider adding a co-applicant to strengthen the application",
                 "Choose a longer tenure to reduce monthly EMI",
             ]
-            if not is_income_sufficient
-            else [
-                "You're on track! Maintain your financial discipline.",
-                "Upload clear documents to speed up approval.",
-            ]
         )
 
+    income_note = f" (verified from {financials['salary_source'].replace('_', ' ')})" if financials.get('net_salary') else ""
+    document_lines = ""
+    if financials.get('monthly_emi') is not None:
+        document_lines += f"💳 Existing EMIs: ₹{financials['monthly_emi']:,.0f}/month\n"
+    if financials.get('average_balance') is not None:
+        document_lines += f"🏧 Average Balance: ₹{financials['average_balance']:,.0f}\n"
+
+    if model is None or model['probability'] is None:
+        model_line = f"🤖 Approval Probability: N/A (rule-based decision{': ' + model['note'] if model else ''})"
+    else:
+        model_line = f"🤖 Approval Probability: {model['probability']:.1%}"
+
     summary = f"""
 📋 Loan Eligibility Assessment
 
 🔍 Status: {status}
 🔍 Reason: {reason}  
+{model_line}
 👤 Applicant Name: {user_name}
 🆔 Entered Aadhaar: {data.get('aadhaar_number', 'N/A')}
 🆔 Document Aadhaar: {extracted_aadhaar if extracted_aadhaar else 'N/A'}
-💰 Monthly Income: ₹{income}  
-🏦 Bank: {bank}  
+💰 Monthly Income: ₹{income}{income_note}  
+{document_lines}{budget_line}🏦 Bank: {bank}  
 📄 Loan Type: {loan_type}  
 💸 Requested Amount: ₹{loan_amnt}  
 📆 Tenure: {tenure} months  
@@ -97,67 +190,8 @@ def chatbot():
     if request.method == 'POST':
         user_input = request.json.get('message', '').strip()
         session.setdefault('loan_data', {})
-        data = session['loan_data']
-
-        def is_valid_number(value): return value.isdigit()
-        def is_valid_employment(value): return value.lower() in ['salaried', 'self-employed', 'freelancer']
-        def is_valid_aadhaar(value):
-            digits = ''.join(ch for ch in value if ch.isdigit())
-            return len(digits) == 12
-
-        if 'name' not in data:
-            data['name'] = user_input
-            reply = f"Hi {user_input}! How old are you?"
-        elif 'age' not in data:
-            reply = "What’s your employment type?(Salaried, Self-employed, or Freelancer)" if is_valid_number(user_input) else "Please enter a valid age."
-            if is_valid_number(user_input): data['age'] = user_input
-        elif 'employment_type' not in data:
-            reply = "What is your monthly income?" if is_valid_employment(user_input) else "Please enter a valid employment type."
-            if is_valid_employment(user_input): data['employment_type'] = user_input.lower()
-        elif 'income' not in data:
-            reply = "Do you have any existing EMIs or loans?(if No enter 0)" if is_valid_number(user_input) else "Please enter your income in numbers."
-            if is_valid_number(user_input): data['income'] = user_input
-        elif 'existing_emis' not in data:
-            data['existing_emis'] = user_input
-            reply = "Which bank do you hold your salary account with?"
-        elif 'bank_name' not in data:
-            data['bank_name'] = user_input
-            reply = "Do you have a co-applicant? (Yes / No)"
-        elif 'co_applicant' not in data:
-            data['co_applicant'] = user_input
-            reply = "Please enter co-applicant’s monthly income." if user_input.lower() == 'yes' else "Please enter your 12-digit Aadhaar number."
-            if user_input.lower() != 'yes':
-                data['co_income'] = "N/A"
-                data['co_credit_score'] = "N/A"
-        elif data.get('co_applicant', '').lower() == 'yes' and 'co_income' not in data:
-            reply = "Please enter your 12-digit Aadhaar number." if is_valid_number(user_input) else "Enter co-applicant’s income in numbers."
-            if is_valid_number(user_input): data['co_income'] = user_input
-        elif 'aadhaar_number' not in data:
-            # Ask Aadhaar number before PAN
-            if is_valid_aadhaar(user_input):
-                # Normalize to XXXX XXXX XXXX
-                d = ''.join(ch for ch in user_input if ch.isdigit())
-                data['aadhaar_number'] = f"{d[0:4]} {d[4:8]} {d[8:12]}"
-                reply = "What is your PAN number?"
-            else:
-                reply = "Please enter your 12-digit Aadhaar number (digits only)."
-        elif 'pan_number' not in data:
-            data['pan_number'] = user_input
-            reply = "What type of loan are you applying for?"
-        elif 'loan_type' not in data:
-            data['loan_type'] = user_input
-            reply = "What is the desired loan amount?"
-        elif 'loan_amnt' not in data:
-            reply = "What is the preferred tenure in months?(Personal/Home/Vehicle/Business/Education/Gold/Other)" if is_valid_number(user_input) else "Enter loan amount in numbers."
-            if is_valid_number(user_input): data['loan_amnt'] = user_input
-        elif 'loan_tenure' not in data:
-            reply = "Do you have collateral or property to pledge?" if is_valid_number(user_input) else "Enter tenure in months (numbers only)."
-            if is_valid_number(user_input): data['loan_tenure'] = user_input
-        elif 'collateral' not in data:
-            data['collateral'] = user_input
-            reply = "Thanks! You can now upload your documents on the dashboard."
-        else:
-            reply = "You're all set! Head to the dashboard to upload documents and view your eligibility report."
+        # The question graph picks the next unanswered step and validates the answer
+        reply = answer(session['loan_data'], user_input)
 
         session.modified = True
         return jsonify({"reply": reply})
@@ -167,57 +201,211 @@ def chatbot():
     session.modified = True
     return render_template('chatbot.html')
 
-@app.route('/upload', methods=['POST'])
-def upload_docs():
-    uploaded_files = {}
-    
-    # Save uploaded files
-    for field in ['aadhar', 'salary', 'bank']:
-        file = request.files.get(field)
-        if file:
-            folder = os.path.join(app.config['UPLOAD_FOLDER'], field + '_slips' if field == 'salary' else field)
-            os.makedirs(folder, exist_ok=True)
-            file_path = os.path.join(folder, file.filename)
-            file.save(file_path)
-            uploaded_files[field] = file_path
+@app.route('/application', methods=['POST'])
+def submit_application():
+    """Validate a complete application in one request (same rules as the chatbot)."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object with the application fields"}), 400
+    loan_data, errors = validate_application(payload)
+    if errors:
+        return jsonify({"errors": errors}), 400
+    session['loan_data'] = loan_data
+    application_id = session.setdefault('application_id', uuid.uuid4().hex)
+    duplicate = get_aadhaar_index().register(loan_data['aadhaar_number'], application_id)
+    name_matches = screen_applicant(application_id, loan_data['name'])
+    session[SCREENING_KEY] = {'aadhaar_duplicate': duplicate, 'name_matches': name_matches}
+    return jsonify({"application_id": application_id, "loan_data": loan_data, "upload_url": "/upload"})
 
-    loan_data = session.get('loan_data', {})
+def verify_documents(loan_data, uploaded_files, duplicate=None, name_matches=None):
+    """
+    OCR the uploaded Aadhaar, parse salary/bank documents and build the assessment.
+    The screening results passed in are carried under SCREENING_KEY, outside the assessment.
+    """
     user_name = loan_data.get('name', '')
     
     # Perform document verifications if Aadhar card is uploaded
     aadhaar_verified = True
     extracted_aadhaar = None
+    aadhaar_fields = {}
     
     if 'aadhar' in uploaded_files:
         try:
-            # Aadhaar number verification
-            extracted_aadhaar = extract_aadhaar_number(uploaded_files['aadhar'])
-            entered_aadhaar = session.get('loan_data', {}).get('aadhaar_number')
+            # One OCR pass yields number, name, DOB and VID together
+            with metrics.span('verify_stage_seconds', stage='aadhaar'):
+                aadhaar_fields = extract_aadhaar_fields(uploaded_files['aadhar'], user_name=user_name)
+            extracted_aadhaar = aadhaar_fields['aadhaar_number']['value']
+            entered_aadhaar = loan_data.get('aadhaar_number')
             if entered_aadhaar and extracted_aadhaar:
-                entered_digits = ''.join(ch for ch in entered_aadhaar if ch.isdigit())
-                extracted_digits = ''.join(ch for ch in extracted_aadhaar if ch.isdigit())
-                aadhaar_verified = (entered_digits == extracted_digits)
+                # Only the accepted reading counts; 'alternatives' are kept for reviewers
+                aadhaar_verified = digits_of(entered_aadhaar) == digits_of(extracted_aadhaar)
             elif entered_aadhaar and not extracted_aadhaar:
                 aadhaar_verified = False
         except Exception as e:
             print(f"Error during name verification: {e}")
+            metrics.inc('verify_errors_total', stage='aadhaar')
             aadhaar_verified = False
     
+    # Income, EMIs and balance from the salary slip and bank statement
+    financials = None
+    if 'bank' in uploaded_files or 'salary' in uploaded_files:
+        with metrics.span('verify_stage_seconds', stage='financials'):
+            financials = extract_financials(uploaded_files)
+
     # Generate assessment with verification results
-    assessment, result = generate_assessment(
-        loan_data,
-        aadhaar_verified=aadhaar_verified,
-        extracted_aadhaar=extracted_aadhaar,
-    )
-
-    session['loan_result'] = result
-    session['loan_assessment'] = assessment
-    session['aadhaar_verified'] = aadhaar_verified
-    session['extracted_aadhaar'] = extracted_aadhaar
+    with metrics.span('verify_stage_seconds', stage='assessment'):
+        assessment, result = generate_assessment(
+            loan_data,
+            aadhaar_verified=aadhaar_verified,
+            extracted_aadhaar=extracted_aadhaar,
+            financials=financials,
+        )
+    return {
+        'loan_result': result,
+        'loan_assessment': assessment,
+        'aadhaar_verified': aadhaar_verified,
+        'extracted_aadhaar': extracted_aadhaar,
+        'extracted_name': aadhaar_fields.get('name', {}).get('value'),
+        'name_verified': aadhaar_fields.get('name_match', True),
+        'financials': financials,
+        SCREENING_KEY: {'aadhaar_duplicate': duplicate, 'name_matches': name_matches},
+    }
+
+def process_verification_job(payload):
+    """Job handler run by the worker processes (see worker.py)."""
+    with metrics.span('job_duration_seconds', kind=VERIFY_JOB):
+        result = verify_documents(payload['loan_data'], payload['uploaded_files'],
+                                  payload.get('aadhaar_duplicate'), payload.get('name_matches'))
+    # Publish this worker's numbers now rather than at its next flush interval
+    metrics.flush()
+    return result
+
+def _wants_json():
+    return request.accept_mimetypes.best == 'application/json' or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+def _upload_error(message, status, headers=None):
+    # API clients get the status code; the browser form goes back to the dashboard with a message
+    if _wants_json():
+        return jsonify({"error": message}), status, headers or {}
+    flash(message, 'danger')
+    return redirect('/dashboard')
+
+@app.route('/upload', methods=['POST'])
+def upload_docs():
+    uploaded_files = {}
+    # Documents are indexed per application, so applicants never see each other's files
+    application_id = session.setdefault('application_id', uuid.uuid4().hex)
+    loan_data = session.get('loan_data', {})
+    store = get_document_store()
+
+    # Reject a bad Aadhaar number before storing or OCR-ing anything
+    duplicate = None
+    if loan_data.get('aadhaar_number'):
+        if not is_valid_aadhaar(loan_data['aadhaar_number']):
+            return _upload_error("The Aadhaar number on this application is not valid. Please re-enter it.", 400)
+        duplicate = get_aadhaar_index().register(loan_data['aadhaar_number'], application_id)
+    # Screen the name against earlier applicants and the watchlist
+    name_matches = screen_applicant(application_id, loan_data.get('name'))
+
+    # Stream uploads into content-addressed storage
+    for field in ['aadhar', 'salary', 'bank']:
+        file = request.files.get(field)
+        if file and file.filename:
+            try:
+                with metrics.span('upload_save_seconds', field=field):
+                    uploaded_files[field] = store.save(application_id, field, file.stream, file.filename)
+            except UploadTooLarge as e:
+                return _upload_error(str(e), 413)
+
+    # OCR and assessment run in the worker pool; the request returns immediately
+    try:
+        job_id = job_queue.enqueue(VERIFY_JOB, {
+            'loan_data': loan_data,
+            'uploaded_files': uploaded_files,
+            'aadhaar_duplicate': duplicate,
+            'name_matches': name_matches,
+        })
+    except QueueFull:
+        message = "We're processing a lot of documents right now. Please try again in a minute."
+        return _upload_error(message, 503, {'Retry-After': '30'})
+
+    session['job_id'] = job_id
+    for key in JOB_RESULT_KEYS:
+        session.pop(key, None)
+    if _wants_json():
+        return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
     return redirect('/result')
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({
+        "job_id": job['id'],
+        "status": job['status'],
+        "attempts": job['attempts'],
+        "error": job['error'] if job['status'] == 'failed' else None,
+        "result": {k: v for k, v in job['result'].items() if k != SCREENING_KEY} if job['result'] else job['result'],
+    })
+
+@app.route('/score/batch', methods=['POST'])
+def score_batch():
+    # Accept a JSON array of applicants, or a CSV (uploaded as 'file' or sent as the raw body)
+    try:
+        if request.is_json:
+            payload = request.get_json()
+            rows = payload.get('applicants', []) if isinstance(payload, dict) else payload
+            df = pd.DataFrame(rows)
+        elif 'file' in request.files:
+            df = pd.read_csv(request.files['file'])
+        else:
+            df = pd.read_csv(StringIO(request.get_data(as_text=True)))
+    except Exception as e:
+        return jsonify({"error": f"Could not parse applicants: {e}"}), 400
+
+    if df.empty:
+        return jsonify({"error": "No applicants provided"}), 400
+    if len(df) > MAX_BATCH_ROWS:
+        return jsonify({"error": f"Batch too large (max {MAX_BATCH_ROWS} rows)"}), 413
+
+    try:
+        probabilities = score_frame(df)
+    except ModelNotAvailable as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ids = df['id'].tolist() if 'id' in df.columns else list(range(len(df)))
+    results = [
+        {"id": applicant_id, "approval_probability": round(float(p), 4),
+         "status": "Eligible" if p >= APPROVAL_THRESHOLD else "Not Eligible"}
+        for applicant_id, p in zip(ids, probabilities)
+    ]
+    response = {"count": len(results), "results": results}
+    if request.args.get('reports') in ('1', 'true'):
+        # PDFs are rendered by the job workers; the export streams whatever is ready
+        items = batch_report_items(df.astype(object).where(df.notna(), None).to_dict('records'), results)
+        batch_id, job_ids = queue_batch_reports(job_queue, items)
+        response.update(report_jobs=job_ids, export_url=f"/reports/export/{batch_id}")
+    return jsonify(response)
+
 @app.route('/result')
 def result_page():
+    job_id = session.get('job_id')
+    if job_id:
+        job = job_queue.get(job_id)
+        if job and job['status'] == 'done':
+            session.update(job['result'])
+            session.pop('job_id')
+        elif job and job['status'] == 'failed':
+            session.pop('job_id')
+            session['loan_result'] = 'Verification failed'
+            session['loan_assessment'] = "We couldn't process your documents. Please upload them again."
+        elif job:
+            return render_template('result.html', result='Processing',
+                                   assessment='Your documents are being verified. This page refreshes automatically.',
+                                   pending=True)
     result = session.get('loan_result', 'N/A')
     assessment = session.get('loan_assessment', 'No assessment available.')
     name_verified = session.get('name_verified', True)
@@ -228,41 +416,36 @@ def result_page():
 @app.route('/generate_pdf')
 def generate_pdf():
     data = session.get('loan_data', {})
-    result= session.ge('loan_result','N/A')
-    uploaded_files = []
+    result = session.get('loan_result', 'N/A')
+    assessment = session.get('loan_assessment')
+    application_id = session.get('application_id') or session.setdefault('application_id', uuid.uuid4().hex)
+    documents = get_document_store().documents_for(application_id)
+    uploaded_files = [f"{doc['field'].capitalize()}: {doc['filename']}" for doc in documents]
 
-    for field in ['aadhar', 'salary', 'bank']:
-        folder = os.path.join(app.config['UPLOAD_FOLDER'], field + '_slips' if field == 'salary' else field)
-        if os.path.exists(folder):
-            files = os.listdir(folder)
-            uploaded_files.extend([f"{field.capitalize()}: {file}" for file in files])
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    p.setFont("Helvetica", 12)
-    y = 800
-
-    p.drawString(100, y, "LoanAdvisor Summary Report")
-    y -= 30
-
-    for key, value in data.items():
-        p.drawString(100, y, f"{key.replace('_', ' ').title()}: {value}")
-        y -= 20
-
-    y -= 10
-    p.drawString(100, y, "Uploaded Documents:")
-    for doc in uploaded_files:
-        y -= 20
-        p.drawString(120, y, doc)
-
-    y -= 30
-    p.drawString(100, y, "Loan Eligibility: status")
-    p.drawString(100,f"Loan Eligibility:{result}")
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-
-    return send_file(buffer, download_name="LoanAdvisor_Report.pdf", as_attachment=True)
+    # Rendered once per (application, content); repeat downloads come from the cache
+    pdf = cached_report(application_id, data, result, assessment, uploaded_files)
+    return send_file(BytesIO(pdf), mimetype='application/pdf',
+                     download_name="LoanAdvisor_Report.pdf", as_attachment=True)
+
+@app.route('/reports/export/<batch_id>')
+def export_reports(batch_id):
+    """Stream a batch's reports as one ZIP without holding them all in memory."""
+    if get_report_cache().batch_size(batch_id) == 0:
+        return jsonify({"error": "Unknown report batch"}), 404
+    return Response(stream_batch_zip(batch_id), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename=LoanAdvisor_Reports_{batch_id}.zip'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Latency histograms, cache hit rates and queue depth for Prometheus."""
+    if not metrics.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled (METRICS_ENABLED=0)"}), 404
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
+    # Embedded worker pool for local runs; production runs `python worker.py` separately.
+    # Only start it in the reloader child so debug mode doesn't spawn two pools.
+    embedded_workers = int(os.getenv('JOB_WORKERS', '2'))
+    if embedded_workers > 0 and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        WorkerPool(JOB_HANDLERS, processes=embedded_workers).start_background()
     app.run(debug=True)
\ No newline at end of file
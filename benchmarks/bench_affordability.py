@@ -0,0 +1,45 @@
+"""
+Time the vectorised affordability grid (applicants x products x tenures).
+
+Run from the project root:
+    python -m benchmarks.bench_affordability
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.affordability import DEFAULT_PRODUCTS, TENURES, offer_grid, product_arrays  # noqa: E402
+
+BATCH_SIZES = (1, 1_000, 10_000)
+
+
+def synthetic_applicants(n, seed=0):
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(mean=10.6, sigma=0.5, size=n).round(-2)
+    existing = (income * rng.uniform(0, 0.4, size=n)).round(-2)
+    amount = rng.choice([1e5, 3e5, 5e5, 1e6, 3e6], size=n)
+    tenure = rng.choice([0, 12, 36, 60, 120, 240], size=n)
+    return income, existing, amount, tenure
+
+
+def run():
+    products = product_arrays(DEFAULT_PRODUCTS)
+    print(f"Grid: {len(DEFAULT_PRODUCTS)} products x {len(TENURES)} tenures")
+    print(f"{'applicants':>10} {'total ms':>10} {'us/applicant':>13} {'eligible':>9}")
+    for n in BATCH_SIZES:
+        args = synthetic_applicants(n)
+        offer_grid(*args, products)  # warm-up
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            grid = offer_grid(*args, products)
+            best = min(best, time.perf_counter() - start)
+        print(f"{n:>10} {best * 1e3:>10.2f} {best * 1e6 / n:>13.2f} {grid['eligible'].mean():>8.0%}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+"""
+Lender catalogue with 10k synthetic products: load/index time, indexed lookups
+vs scanning the product list, and hot reload after the file changes.
+
+Run from the project root:
+    python -m benchmarks.bench_lender_catalog
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import lender_catalog  # noqa: E402
+from utils.lender_catalog import LenderCatalog, get_catalog  # noqa: E402
+
+N_PRODUCTS = 10_000
+N_BANKS = 200
+LOAN_TYPES = ["home", "personal", "vehicle", "education", "business", "gold"]
+LOOKUPS = 2_000
+
+
+def write_products(path, n=N_PRODUCTS, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["bank", "loan_type", "product", "rate", "max_tenure", "min_income", "processing_fee"])
+        for i in range(n):
+            bank = f"Bank {i % N_BANKS:03d} Cooperative"
+            writer.writerow([bank, LOAN_TYPES[i % len(LOAN_TYPES)], f"Product {i}",
+                             round(rng.uniform(7.5, 18), 2), int(rng.choice([36, 60, 84, 240, 360])),
+                             int(rng.choice([10000, 15000, 25000, 40000])), round(rng.uniform(0, 0.03), 4)])
+
+
+def scan(products, loan_type, bank, max_rate):
+    """Baseline: filter the list, then sort by rate."""
+    hits = [p for p in products if p["loan_type"] == loan_type and p["bank"] == bank and p["rate"] <= max_rate]
+    return sorted(hits, key=lambda p: p["rate"])
+
+
+def _per_call(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.csv")
+        write_products(path)
+
+        start = time.perf_counter()
+        catalog = LenderCatalog.load(path)
+        load = time.perf_counter() - start
+        print(f"Products: {len(catalog.products)}  banks: {len(catalog.banks)}  load+index: {load * 1e3:.1f} ms")
+
+        rng = np.random.default_rng(1)
+        queries = [(LOAN_TYPES[rng.integers(len(LOAN_TYPES))], f"Bank {rng.integers(N_BANKS):03d} Cooperative",
+                    float(rng.uniform(9, 14))) for _ in range(LOOKUPS)]
+        indexed = _per_call(catalog.lookup, queries)
+        scanned = _per_call(lambda *q: scan(catalog.products, *q), queries[:200])
+        for q in queries[:50]:
+            assert [catalog.products[i]["rate"] for i in catalog.lookup(*q)] == [p["rate"] for p in scan(catalog.products, *q)]
+        print(f"(loan_type, bank, max_rate) lookup: index {indexed * 1e6:.1f} us  |  scan {scanned * 1e6:.1f} us"
+              f"  ({scanned / indexed:.0f}x)")
+
+        names = [("bank %03d coop" % rng.integers(N_BANKS),) for _ in range(200)]
+        cold = _per_call(catalog.resolve_bank, names)
+        warm = _per_call(catalog.resolve_bank, names)
+        print(f"Fuzzy bank resolution: first {cold * 1e6:.0f} us  |  cached {warm * 1e6:.1f} us")
+
+        candidates = _per_call(lambda t, b, r: catalog.candidates(t, b, income=50000), queries)
+        print(f"Applicant candidates (own bank + cheapest of type): {candidates * 1e6:.1f} us")
+
+        lender_catalog.RELOAD_CHECK_INTERVAL = 0
+        before = get_catalog(path)
+        write_products(path, seed=2)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        start = time.perf_counter()
+        reloaded = get_catalog(path)
+        print(f"Hot reload after file change: {(time.perf_counter() - start) * 1e3:.1f} ms"
+              f" ({'new snapshot' if reloaded is not before else 'stale'})")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,88 @@
+"""
+Applicant name screening over 500k synthetic names: index build time, indexed
+search vs scoring every name, and incremental adds between searches.
+
+Run from the project root:
+    python -m benchmarks.bench_name_index
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.name_index import MATCH_THRESHOLD, NameIndex, normalize_name, similarity  # noqa: E402
+
+N_NAMES = 500_000
+QUERIES = 200
+BRUTE_FORCE_QUERIES = 5
+FIRST = ["ravi", "priya", "amit", "sunita", "rahul", "anjali", "vikram", "neha", "arjun", "kavya",
+         "suresh", "deepa", "manoj", "pooja", "karthik", "lakshmi", "imran", "fatima", "gurpreet", "meera"]
+MIDDLE = ["", "", "", "kumar", "devi", "lal", "prasad", "singh"]
+LAST = ["sharma", "verma", "iyer", "reddy", "patel", "khan", "nair", "gupta", "das", "menon",
+        "joshi", "rao", "chatterjee", "mehta", "pillai", "kaur", "yadav", "banerjee", "shetty", "kulkarni"]
+
+
+def synthetic_names(n, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    names = []
+    for i in range(n):
+        parts = [FIRST[rng.integers(len(FIRST))], MIDDLE[rng.integers(len(MIDDLE))], LAST[rng.integers(len(LAST))]]
+        # A unique-ish suffix word keeps the registry from being 8000 names repeated
+        parts.append("".join(rng.choice(letters, 5)))
+        names.append(" ".join(p for p in parts if p).title())
+    return names
+
+
+def typo(name, rng):
+    chars = list(name)
+    i = int(rng.integers(1, len(chars) - 1))
+    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def brute_force(names, query):
+    q = normalize_name(query)
+    scored = [(similarity(q, normalize_name(n)), n) for n in names]
+    return sorted([s for s in scored if s[0] >= MATCH_THRESHOLD], reverse=True)[:10]
+
+
+def main():
+    rng = np.random.default_rng(1)
+    names = synthetic_names(N_NAMES)
+
+    start = time.perf_counter()
+    index = NameIndex()
+    for i, name in enumerate(names):
+        index.add(f"app-{i}", name)
+    build = time.perf_counter() - start
+    print(f"build: {N_NAMES:,} names in {build:.1f} s ({build / N_NAMES * 1e6:.1f} us/name)")
+
+    targets = rng.integers(0, N_NAMES, QUERIES)
+    queries = [typo(names[t], rng) for t in targets]
+    start = time.perf_counter()
+    found = 0
+    for t, query in zip(targets, queries):
+        found += any(m["key"] == f"app-{t}" for m in index.search(query))
+    indexed = (time.perf_counter() - start) / QUERIES
+    print(f"indexed search: {indexed * 1e3:.2f} ms/query, typo'd original found {found}/{QUERIES}")
+
+    start = time.perf_counter()
+    for query in queries[:BRUTE_FORCE_QUERIES]:
+        brute_force(names, query)
+    brute = (time.perf_counter() - start) / BRUTE_FORCE_QUERIES
+    print(f"brute force: {brute * 1e3:.0f} ms/query ({brute / indexed:.0f}x slower)")
+
+    extra = synthetic_names(QUERIES, seed=2)
+    start = time.perf_counter()
+    for i, name in enumerate(extra):
+        index.add(f"new-{i}", name)
+        index.search(name)
+    print(f"add + search: {(time.perf_counter() - start) / QUERIES * 1e3:.2f} ms per new applicant")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the OCR backends on synthetic Aadhaar-like card images:
+pytesseract (one `tesseract` process per call) vs the pooled tesserocr engine.
+
+Run from the project root (needs the tesseract binary; tesserocr for the pool):
+    python -m benchmarks.bench_ocr_engines --images 32 --pool-size 4
+"""
+import argparse
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import ocr_utils  # noqa: E402
+from utils.ocr_utils import PytesseractEngine, TesserocrPoolEngine  # noqa: E402
+
+
+def synthetic_card(i, size=(1200, 760)):
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    lines = [
+        "Government of India",
+        f"Applicant {i:04d} Kumar",
+        f"DOB: {1 + i % 28:02d}/0{1 + i % 9}/19{60 + i % 40}",
+        "Male",
+        f"{1000 + i:04d} {5678:04d} {9012 - i % 1000:04d}",
+    ]
+    for row, text in enumerate(lines):
+        draw.text((60, 80 + row * 110), text, fill=0)
+    return ocr_utils._preprocess_image_for_ocr(image)
+
+
+def _time_engine(engine, images, batch):
+    engine.image_to_data(images[0])  # warm-up (model load / pool start)
+    start = time.perf_counter()
+    if batch:
+        engine.image_to_data_many(images)
+    else:
+        for img in images:
+            engine.image_to_data(img)
+    return time.perf_counter() - start
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    images = [synthetic_card(i) for i in range(args.images)]
+    engines = [("pytesseract", PytesseractEngine(), False)]
+    if ocr_utils.tesserocr is not None:
+        engines.append(("tesserocr in-process", TesserocrPoolEngine(processes=0), False))
+        engines.append((f"tesserocr pool x{args.pool_size}", TesserocrPoolEngine(processes=args.pool_size), True))
+    else:
+        print("tesserocr not installed; only the pytesseract baseline is measured")
+
+    print(f"{'engine':>24} {'total s':>9} {'ms/image':>9} {'images/s':>9}")
+    for name, engine, batch in engines:
+        try:
+            elapsed = _time_engine(engine, images, batch)
+        finally:
+            engine.close()
+        print(f"{name:>24} {elapsed:>9.2f} {elapsed * 1e3 / len(images):>9.1f} {len(images) / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,79 @@
+"""
+Compare XGBClassifier.predict_proba with the memory-mapped CompiledForest.
+
+Run from the project root after train_model.py:
+    python -m benchmarks.bench_tree_predictor
+"""
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dataset_cache import load_dataset  # noqa: E402
+from utils.preprocessing import Preprocessor  # noqa: E402
+from utils.tree_export import CompiledForest, export_model  # noqa: E402
+
+MODEL_PATH = "final_xgboost_loan_model.joblib"
+PREPROCESSOR_PATH = "loan_preprocessor.npz"
+DATASET_PATH = "loan_eligibility_dataset_1.xlsx"
+BATCH_SIZES = (1, 100, 10_000)
+TOLERANCE = 1e-5
+
+
+def _time(fn, X, min_seconds=0.5):
+    """Best-of timing: repeat until min_seconds has passed, report the fastest call."""
+    fn(X)  # warm-up
+    best, total, calls = float("inf"), 0.0, 0
+    while total < min_seconds or calls < 3:
+        start = time.perf_counter()
+        fn(X)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        calls += 1
+    return best
+
+
+def sample_rows(n, seed=0):
+    """Encoded rows drawn (with replacement) from the training dataset."""
+    preprocessor = Preprocessor.load(PREPROCESSOR_PATH)
+    base = preprocessor.transform(load_dataset(DATASET_PATH))
+    rng = np.random.default_rng(seed)
+    return base[rng.integers(0, len(base), size=n)]
+
+
+def run():
+    if not os.path.exists(MODEL_PATH) or not os.path.exists(PREPROCESSOR_PATH):
+        sys.exit("Model artifacts not found; run train_model.py first.")
+
+    load_start = time.perf_counter()
+    model = joblib.load(MODEL_PATH)
+    pickle_load = time.perf_counter() - load_start
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        export_model(model, out_dir)
+        load_start = time.perf_counter()
+        forest = CompiledForest(out_dir)
+        mmap_load = time.perf_counter() - load_start
+
+        X_all = sample_rows(max(BATCH_SIZES))
+        max_diff = np.abs(model.predict_proba(X_all) - forest.predict_proba(X_all)).max()
+        print(f"Trees: {forest.meta['n_trees']}  nodes: {forest.meta['n_nodes']}  depth: {forest.max_depth}")
+        print(f"Load: joblib {pickle_load * 1e3:.2f} ms  |  mmap {mmap_load * 1e3:.2f} ms")
+        print(f"Max |proba diff| on {len(X_all)} rows: {max_diff:.2e} ({'OK' if max_diff <= TOLERANCE else 'MISMATCH'})")
+        print(f"{'batch':>8} {'xgboost ms':>12} {'compiled ms':>12} {'speedup':>8}")
+        for n in BATCH_SIZES:
+            X = X_all[:n]
+            t_xgb = _time(model.predict_proba, X)
+            t_np = _time(forest.predict_proba, X)
+            print(f"{n:>8} {t_xgb * 1e3:>12.3f} {t_np * 1e3:>12.3f} {t_xgb / t_np:>7.1f}x")
+        return max_diff <= TOLERANCE
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run() else 1)
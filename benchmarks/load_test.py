@@ -0,0 +1,536 @@
+"""
+Load test: virtual applicants on asyncio replaying the full journey against a
+local server (signup, the chatbot questionnaire, document upload, waiting for
+verification, result page and PDF), with ramp profiles and per-step latency
+percentiles, throughput and error rates.
+
+Run from the project root:
+    python -m benchmarks.load_test --users 200 --stub-ocr              # ramp to 200 users, hold 60 s
+    python -m benchmarks.load_test --stages 100:30,500:60,500:120,0:30  # users:seconds, linear ramps
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 50   # existing server (e.g. gunicorn)
+
+Without --url a server is started for the run (werkzeug, threaded, plus
+--workers job processes) with every store in a scratch directory. aiohttp is
+used when installed; otherwise a small built-in HTTP/1.1 client.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+try:
+    # Optional HTTP client if available
+    import aiohttp
+except Exception:  # pragma: no cover
+    aiohttp = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.suite import StubOcrEngine, synthetic_card_png, use_scratch_stores  # noqa: E402
+from utils.aadhaar import format_aadhaar, verhoeff_check_digit  # noqa: E402
+
+DOCUMENT_DIR = os.path.join(ROOT, "uploads")
+# Upload field -> sample folder under uploads/
+DOCUMENT_FOLDERS = {"aadhar": "aadhar", "bank": "bank", "salary": "salary_slips"}
+REQUEST_TIMEOUT = 60.0
+VERIFY_TIMEOUT = 120.0
+POLL_INTERVAL = 0.5
+REPORT_INTERVAL = 5.0
+CONTROL_INTERVAL = 0.25
+PERCENTILES = (50, 90, 95, 99)
+STEPS = ("signup", "chatbot_start", "chatbot", "upload", "job_status", "verification", "result",
+         "generate_pdf", "journey")
+
+FIRST_NAMES = ["Ravi", "Priya", "Amit", "Sunita", "Rahul", "Anjali", "Vikram", "Neha", "Arjun", "Kavya"]
+LAST_NAMES = ["Sharma", "Iyer", "Reddy", "Patel", "Khan", "Nair", "Gupta", "Das", "Menon", "Joshi"]
+BANKS = ["State Bank of India", "HDFC Bank", "ICICI", "Axis Bank", "Bank of Baroda"]
+
+
+# ---------------------------------------------------------------------------
+# Server (started for the run unless --url is given)
+# ---------------------------------------------------------------------------
+
+def stub_verification_job(payload):
+    """Verification job handler that OCRs with StubOcrEngine (installed once per worker process)."""
+    from utils import ocr_utils
+    if not isinstance(ocr_utils._engine, StubOcrEngine) or ocr_utils._engine_pid != os.getpid():
+        ocr_utils._engine, ocr_utils._engine_pid = StubOcrEngine(), os.getpid()
+    from app import process_verification_job
+    return process_verification_job(payload)
+
+
+def serve(args):
+    use_scratch_stores()
+    from werkzeug.serving import make_server
+    from app import JOB_HANDLERS, VERIFY_JOB, app
+    from utils.jobs import WorkerPool
+
+    handlers = dict(JOB_HANDLERS)
+    if args.stub_ocr:
+        handlers[VERIFY_JOB] = 'benchmarks.load_test:stub_verification_job'
+    if args.workers > 0:
+        WorkerPool(handlers, processes=args.workers).start_background()
+    server = make_server(args.host, args.port, app, threaded=True)
+    # Per-request access logging would dominate the run; terminate() exits cleanly so the
+    # daemonic job workers and the scratch stores are cleaned up with this process
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Serving on http://{args.host}:{args.port} ({args.workers} job workers"
+          f"{', stub OCR' if args.stub_ocr else ''})", flush=True)
+    server.serve_forever()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.load_test", "serve", "--port", str(port), "--workers", str(args.workers)]
+    if args.stub_ocr:
+        cmd.append("--stub-ocr")
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit("Server exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    sys.exit("Server did not start within 60 s")
+
+
+# ---------------------------------------------------------------------------
+# HTTP clients: one session (connection + cookies) per virtual user
+# ---------------------------------------------------------------------------
+
+class RawSession:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams with a cookie jar."""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._reader = self._writer = None
+
+    async def request(self, method, path, body=b"", headers=None):
+        """Returns (status, headers with lower-case names, body). Redirects are not followed."""
+        for attempt in range(2):
+            fresh = self._writer is None
+            if fresh:
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._exchange(method, path, body, headers or {}), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                # A kept-alive connection the server already closed: retry once on a new one
+                if fresh or attempt:
+                    raise
+            except BaseException:
+                await self.close()
+                raise
+
+    async def _exchange(self, method, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = (await self._reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                self._store_cookie(value)
+            response_headers[name] = value
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await self._reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await self._reader.read()
+            response_headers["connection"] = "close"
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, data
+
+    def _store_cookie(self, header):
+        name, _, value = header.split(";", 1)[0].partition("=")
+        attributes = header.lower()
+        if not value or "max-age=0" in attributes or "expires=thu, 01 jan 1970" in attributes:
+            self.cookies.pop(name.strip(), None)
+        else:
+            self.cookies[name.strip()] = value.strip()
+
+
+class AiohttpSession:
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self._session = aiohttp.ClientSession(
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=aiohttp.TCPConnector(limit=1),
+        )
+
+    async def request(self, method, path, body=b"", headers=None):
+        async with self._session.request(method, self.base_url + path, data=body or None, headers=headers,
+                                         allow_redirects=False) as response:
+            data = await response.read()
+            return response.status, {k.lower(): v for k, v in response.headers.items()}, data
+
+    async def close(self):
+        await self._session.close()
+
+
+def open_session(base_url, client):
+    if client == "aiohttp":
+        return AiohttpSession(base_url)
+    return RawSession(base_url)
+
+
+def multipart(files):
+    """Encode {field: (filename, bytes, content_type)} as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for field, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + content + b"\r\n"
+        )
+    return b"".join(parts) + f"--{boundary}--\r\n".encode("utf-8"), f"multipart/form-data; boundary={boundary}"
+
+
+def load_documents(folder=DOCUMENT_DIR):
+    """One sample file per upload field from uploads/ (a synthetic card image if none is found)."""
+    documents = {}
+    for field, sub in DOCUMENT_FOLDERS.items():
+        paths = sorted(p for p in glob.glob(os.path.join(folder, sub, "*")) if os.path.isfile(p))
+        if paths:
+            with open(paths[0], "rb") as fh:
+                content = fh.read()
+            content_type = "application/pdf" if paths[0].lower().endswith(".pdf") else "image/png"
+            documents[field] = (os.path.basename(paths[0]), content, content_type)
+    if "aadhar" not in documents:
+        documents["aadhar"] = ("card.png", synthetic_card_png(0), "image/png")
+    return documents
+
+
+# ---------------------------------------------------------------------------
+# Virtual users
+# ---------------------------------------------------------------------------
+
+def chat_answers(rng):
+    """Answers for one questionnaire, in QUESTION_GRAPH order."""
+    base = str(rng.randint(2, 9)) + "".join(str(rng.randint(0, 9)) for _ in range(10))
+    co_applicant = rng.random() < 0.3
+    answers = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        str(rng.randint(21, 60)),
+        rng.choice(["Salaried", "Self-employed", "Freelancer"]),
+        str(rng.randrange(15000, 250000, 500)),
+        rng.choice(["0", "4500", "12000"]),
+        rng.choice(BANKS),
+        "Yes" if co_applicant else "No",
+    ]
+    if co_applicant:
+        answers.append(str(rng.randrange(10000, 120000, 500)))
+    answers += [
+        format_aadhaar(base + verhoeff_check_digit(base)),
+        "ABCDE1234F",
+        rng.choice(["Home", "Personal", "Vehicle", "Education"]),
+        str(rng.choice([200000, 500000, 1500000, 4000000])),
+        str(rng.choice([36, 60, 120, 240])),
+        rng.choice(["Yes", "No"]),
+    ]
+    return answers
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = Counter()
+        self.journeys = 0
+        self.requests = 0
+
+    def record(self, step, seconds, ok=True, status=None):
+        self.latencies[step].append(seconds * 1e3)
+        if status is not None:
+            self.statuses[f"{step} {status}"] += 1
+        if not ok:
+            self.errors[step] += 1
+
+
+class StepFailed(Exception):
+    pass
+
+
+async def timed(stats, session, step, method, path, body=b"", headers=None, ok_status=(200,)):
+    start = time.perf_counter()
+    try:
+        status, response_headers, data = await session.request(method, path, body, headers)
+    except Exception as e:
+        stats.record(step, time.perf_counter() - start, ok=False, status=type(e).__name__)
+        raise StepFailed(step) from e
+    stats.requests += 1
+    ok = status in ok_status
+    stats.record(step, time.perf_counter() - start, ok=ok, status=status)
+    if not ok:
+        raise StepFailed(step)
+    return status, response_headers, data
+
+
+async def journey(session, stats, documents, rng, poll_interval):
+    start = time.perf_counter()
+    try:
+        await _journey_steps(session, stats, documents, rng, poll_interval)
+    except StepFailed:
+        stats.record("journey", time.perf_counter() - start, ok=False)
+        raise
+    stats.record("journey", time.perf_counter() - start)
+    stats.journeys += 1
+
+
+async def _journey_steps(session, stats, documents, rng, poll_interval):
+    user = f"user-{uuid.uuid4().hex[:12]}"
+    form = {"Content-Type": "application/x-www-form-urlencoded"}
+    await timed(stats, session, "signup", "POST", "/signup",
+                urlencode({"username": user, "password": "load-test"}).encode(), form, ok_status=(302, 303))
+    await timed(stats, session, "chatbot_start", "GET", "/chatbot")
+    for answer in chat_answers(rng):
+        await timed(stats, session, "chatbot", "POST", "/chatbot", json.dumps({"message": answer}).encode(),
+                    {"Content-Type": "application/json"})
+
+    body, content_type = multipart(documents)
+    _, _, data = await timed(stats, session, "upload", "POST", "/upload", body,
+                             {"Content-Type": content_type, "Accept": "application/json"}, ok_status=(202,))
+    job_id = json.loads(data)["job_id"]
+    waited = time.perf_counter()
+    while True:
+        _, _, data = await timed(stats, session, "job_status", "GET", f"/jobs/{job_id}")
+        status = json.loads(data)["status"]
+        if status in ("done", "failed"):
+            stats.record("verification", time.perf_counter() - waited, ok=status == "done", status=status)
+            break
+        if time.perf_counter() - waited > VERIFY_TIMEOUT:
+            stats.record("verification", time.perf_counter() - waited, ok=False, status="timeout")
+            raise StepFailed("verification")
+        await asyncio.sleep(poll_interval)
+
+    await timed(stats, session, "result", "GET", "/result")
+    await timed(stats, session, "generate_pdf", "GET", "/generate_pdf")
+
+
+async def virtual_user(base_url, client, stats, documents, stop, seed, poll_interval, once):
+    """Runs journeys back to back (a fresh session each) until `stop` is set."""
+    rng = random.Random(seed)
+    while not stop.is_set():
+        session = open_session(base_url, client)
+        try:
+            await journey(session, stats, documents, rng, poll_interval)
+        except StepFailed:
+            pass
+        finally:
+            await session.close()
+        if once:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Ramp profile and reporting
+# ---------------------------------------------------------------------------
+
+def parse_stages(spec):
+    """'100:30,500:60' -> [(100, 30.0), (500, 60.0)]: ramp linearly to N users over S seconds."""
+    stages = []
+    for part in spec.split(","):
+        users, _, seconds = part.partition(":")
+        stages.append((int(users), float(seconds)))
+    return stages
+
+
+def target_users(stages, elapsed):
+    previous = 0
+    for users, seconds in stages:
+        if elapsed < seconds:
+            return round(previous + (users - previous) * elapsed / seconds) if seconds else users
+        elapsed -= seconds
+        previous = users
+    return None
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def summary(stats, elapsed):
+    rows = {}
+    for step in STEPS:
+        values = sorted(stats.latencies.get(step, []))
+        if not values:
+            continue
+        row = {"count": len(values), "errors": stats.errors.get(step, 0),
+               "error_rate": round(stats.errors.get(step, 0) / len(values), 4),
+               "throughput_per_s": round(len(values) / elapsed, 2), "max_ms": round(values[-1], 2)}
+        row.update({f"p{p}_ms": round(percentile(values, p), 2) for p in PERCENTILES})
+        rows[step] = row
+    return rows
+
+
+def print_summary(rows, stats, elapsed):
+    print(f"\nDuration {elapsed:.1f} s, {stats.requests} requests ({stats.requests / elapsed:.1f}/s), "
+          f"{stats.journeys} journeys completed ({stats.journeys / elapsed:.2f}/s), "
+          f"{stats.errors.get('journey', 0)} failed")
+    header = f"{'step':<14}{'count':>8}{'err %':>8}{'req/s':>9}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+    print(header + f"{'max ms':>10}")
+    for step, row in rows.items():
+        print(f"{step:<14}{row['count']:>8}{row['error_rate'] * 100:>8.2f}{row['throughput_per_s']:>9.2f}"
+              + "".join(f"{row[f'p{p}_ms']:>10.1f}" for p in PERCENTILES) + f"{row['max_ms']:>10.1f}")
+    failures = [(k, v) for k, v in stats.statuses.items() if not k.split()[-1].startswith(("2", "3", "done"))]
+    if failures:
+        print("Failures: " + ", ".join(f"{k} x{v}" for k, v in sorted(failures)))
+
+
+async def run_load(args, base_url):
+    stages = parse_stages(args.stages) if args.stages else [(args.users, args.ramp), (args.users, args.duration)]
+    client = "aiohttp" if aiohttp is not None and not args.raw_client else "raw"
+    documents = load_documents(args.documents)
+    print(f"Target {base_url} with the {client} client; stages {stages}; documents {sorted(documents)}")
+
+    stats = Stats()
+    users = []  # (task, stop event) of active users
+    tasks = []  # every user, including those ramped down but still finishing a journey
+    start = time.perf_counter()
+    last_report = start
+    while True:
+        elapsed = time.perf_counter() - start
+        target = target_users(stages, elapsed)
+        if target is None:
+            break
+        while len(users) < target:
+            stop = asyncio.Event()
+            task = asyncio.create_task(virtual_user(base_url, client, stats, documents, stop, len(users),
+                                                    args.poll_interval, args.once))
+            users.append((task, stop))
+            tasks.append(task)
+        # Ramping down: the newest users finish their current journey and leave
+        while len(users) > target:
+            users.pop()[1].set()
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            last_report = time.perf_counter()
+            print(f"[{elapsed:6.1f}s] users {len(users):>5}  requests {stats.requests:>8}  "
+                  f"journeys {stats.journeys:>6}  errors {sum(stats.errors.values()):>5}")
+        await asyncio.sleep(CONTROL_INTERVAL)
+
+    for _, stop in users:
+        stop.set()
+    running = [task for task in tasks if not task.done()]
+    if running:
+        # Let journeys in flight finish, up to the drain timeout
+        _, pending = await asyncio.wait(running, timeout=args.drain)
+        for task in pending:
+            task.cancel()
+    elapsed = time.perf_counter() - start
+    rows = summary(stats, elapsed)
+    print_summary(rows, stats, elapsed)
+    return {"base_url": base_url, "client": client, "stages": stages, "duration_s": round(elapsed, 2),
+            "requests": stats.requests, "journeys": stats.journeys, "steps": rows,
+            "statuses": dict(stats.statuses)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--users", type=int, default=50, help="virtual users to ramp to (without --stages)")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds to ramp up to --users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to hold --users")
+    parser.add_argument("--stages", help="ramp profile as users:seconds,... (overrides --users/--ramp/--duration)")
+    parser.add_argument("--once", action="store_true", help="each virtual user runs a single journey")
+    parser.add_argument("--stub-ocr", action="store_true", help="started server OCRs with a stub engine")
+    parser.add_argument("--workers", type=int, default=2, help="job worker processes for the started server")
+    parser.add_argument("--documents", default=DOCUMENT_DIR, help="folder with aadhar/, bank/, salary_slips/")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="seconds between job polls")
+    parser.add_argument("--drain", type=float, default=30.0, help="seconds to let journeys finish at the end")
+    parser.add_argument("--raw-client", action="store_true", help="use the built-in client even if aiohttp exists")
+    parser.add_argument("--out", help="write the summary as JSON")
+    sub = parser.add_subparsers(dest="command")
+    serve_parser = sub.add_parser("serve", help="run the app for a load test (used internally)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--workers", type=int, default=2)
+    serve_parser.add_argument("--stub-ocr", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+        return
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = start_server(args)
+    try:
+        report = asyncio.run(run_load(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Summary written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Benchmark suite for the request paths: chatbot turns, Aadhaar OCR extraction,
+assessments, PDF reports and model scoring. Results are written as JSON with
+environment metadata; `compare` flags regressions against a stored baseline.
+
+Run from the project root:
+    python -m benchmarks.suite run                       # all benchmarks, stub OCR unless tesseract exists
+    python -m benchmarks.suite run --only ocr,pdf --ocr real
+    python -m benchmarks.suite run --save-baseline       # also store as benchmarks/baseline.json
+    python -m benchmarks.suite compare results.json      # vs benchmarks/baseline.json, 10% threshold
+"""
+import argparse
+import atexit
+import datetime
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_THRESHOLD = 0.10
+SCHEMA_VERSION = 1
+MIN_SECONDS = 0.5
+ASSESSMENT_BATCHES = (1, 100, 1_000)
+MODEL_BATCHES = (1, 100, 10_000)
+OCR_IMAGES = 16
+SEED = 0
+PACKAGES = ("Flask", "numpy", "pandas", "Pillow", "pytesseract", "tesserocr", "rapidfuzz", "reportlab", "xgboost")
+# Every store the app writes to goes to a scratch directory for the run
+_STORE_ENV = ("STORAGE_DB", "JOBS_DB", "SESSION_DB", "REPORT_CACHE_DB", "OCR_CACHE_DB",
+              "AADHAAR_INDEX_DB", "NAME_INDEX_DB", "METRICS_DB")
+
+CHAT_ANSWERS = ["Ravi Kumar", "32", "Salaried", "65000", "5000", "State Bank of India", "No",
+                "2341 2341 2346", "ABCDE1234F", "Home", "2500000", "240", "No"]
+CARD_LINES = ["Government of India", "Ravi Kumar", "DOB: 14/08/1991", "Male", "2341 2341 2346"]
+
+
+def use_scratch_stores():
+    """
+    Point every store the app writes to at a fresh temporary directory, removed at
+    exit. Call before importing app; the atexit hook is registered first, so it runs
+    after the app modules' own exit hooks.
+    """
+    scratch = tempfile.mkdtemp(prefix="loan-bench-")
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    for var in _STORE_ENV:
+        os.environ[var] = os.path.join(scratch, "bench.db")
+    os.environ["UPLOAD_ROOT"] = os.path.join(scratch, "uploads")
+    os.environ["AADHAAR_INDEX_KEY"] = "benchmark"
+    return scratch
+
+
+def _stats(samples_ms, unit="ms", **extra):
+    samples = sorted(samples_ms)
+    return dict({
+        "unit": unit,
+        "n": len(samples),
+        "median": round(statistics.median(samples), 4),
+        "p95": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 4),
+        "min": round(samples[0], 4),
+    }, **extra)
+
+
+def measure(fn, min_seconds=MIN_SECONDS, min_calls=5):
+    """Call fn() after one warm-up until min_seconds have passed; per-call times in ms."""
+    fn()
+    samples, total = [], 0.0
+    while total < min_seconds or len(samples) < min_calls:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed * 1e3)
+        total += elapsed
+    return samples
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks (each returns {name: stats}); app modules are imported lazily so
+# the scratch-store environment is in place first
+# ---------------------------------------------------------------------------
+
+def bench_chatbot(args):
+    """One full questionnaire through the /chatbot handler; time per turn."""
+    import app as loan_app
+    client = loan_app.app.test_client()
+    samples = []
+    for _ in range(max(3, args.conversations)):
+        client.get('/chatbot')
+        for message in CHAT_ANSWERS:
+            start = time.perf_counter()
+            client.post('/chatbot', json={'message': message})
+            samples.append((time.perf_counter() - start) * 1e3)
+    return {"chatbot.turn": _stats(samples[len(CHAT_ANSWERS):])}
+
+
+class StubOcrEngine:
+    """Returns fixed word boxes for a card instead of running Tesseract (CPU-only runs)."""
+    name = "stub"
+
+    def image_to_data(self, img):
+        data = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": []}
+        for line_num, line in enumerate(CARD_LINES, start=1):
+            for word in line.split():
+                data["text"].append(word)
+                data["conf"].append(91.0)
+                data["block_num"].append(1)
+                data["par_num"].append(1)
+                data["line_num"].append(line_num)
+        return data
+
+    def image_to_data_many(self, images):
+        return [self.image_to_data(img) for img in images]
+
+    def close(self):
+        pass
+
+
+def synthetic_card_png(i):
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", (1200, 760), "white")
+    draw = ImageDraw.Draw(image)
+    for row, text in enumerate(CARD_LINES[:-1] + [f"{CARD_LINES[-1]} {i:05d}"]):
+        draw.text((60, 80 + row * 110), text, fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bench_ocr(args):
+    """extract_aadhaar_number on synthetic card images (OCR cache off, so every call runs the pipeline)."""
+    from utils import ocr_utils
+    if args.ocr == "stub":
+        ocr_utils._engine, ocr_utils._engine_pid = StubOcrEngine(), os.getpid()
+    os.environ["OCR_CACHE_DISABLED"] = "1"
+    try:
+        cards = [synthetic_card_png(i) for i in range(OCR_IMAGES)]
+        position = iter(range(10 ** 9))
+        samples = measure(lambda: ocr_utils.extract_aadhaar_number(cards[next(position) % len(cards)]),
+                          min_seconds=args.min_seconds)
+    finally:
+        os.environ.pop("OCR_CACHE_DISABLED", None)
+    return {f"ocr.extract_aadhaar_number.{args.ocr}": _stats(samples)}
+
+
+def synthetic_applications(n, seed=SEED):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            'name': f"Applicant {i}", 'age': str(int(rng.integers(21, 60))),
+            'employment_type': str(rng.choice(['salaried', 'self-employed', 'freelancer'])),
+            'income': str(int(rng.lognormal(10.8, 0.5)) // 100 * 100),
+            'existing_emis': str(int(rng.choice([0, 2000, 5000, 12000]))),
+            'bank_name': str(rng.choice(['SBI', 'HDFC Bank', 'ICICI', 'Axis Bank'])),
+            'co_applicant': 'No', 'co_income': 'N/A', 'aadhaar_number': '2341 2341 2346',
+            'pan_number': 'ABCDE1234F', 'loan_type': str(rng.choice(['home', 'personal', 'vehicle'])),
+            'loan_amnt': str(int(rng.choice([200000, 500000, 1500000, 3000000]))),
+            'loan_tenure': str(int(rng.choice([36, 60, 120, 240]))), 'collateral': 'No',
+        })
+    return rows
+
+
+def bench_assessment(args):
+    """generate_assessment over batches of distinct applicants (first pass: prediction cache misses)."""
+    import app as loan_app
+    results = {}
+    for size in ASSESSMENT_BATCHES:
+        batch = synthetic_applications(size, seed=SEED + size)
+        start = time.perf_counter()
+        for data in batch:
+            loan_app.generate_assessment(data)
+        cold = (time.perf_counter() - start) * 1e3 / size
+        samples = measure(lambda: [loan_app.generate_assessment(data) for data in batch],
+                          min_seconds=args.min_seconds, min_calls=3)
+        results[f"assessment.batch_{size}"] = _stats([s / size for s in samples], unit="ms/applicant",
+                                                     first_pass=round(cold, 4))
+    return results
+
+
+def bench_pdf(args):
+    """/generate_pdf: a new application each call (render) and the same one repeated (cache)."""
+    import app as loan_app
+    data = synthetic_applications(1)[0]
+    assessment, result = loan_app.generate_assessment(data)
+    client = loan_app.app.test_client()
+
+    def set_session(application_id):
+        with client.session_transaction() as session:
+            session.update(loan_data=data, loan_result=result, loan_assessment=assessment,
+                           application_id=application_id)
+
+    render = []
+    for _ in range(max(5, args.pdf_renders)):
+        set_session(uuid.uuid4().hex)
+        start = time.perf_counter()
+        client.get('/generate_pdf')
+        render.append((time.perf_counter() - start) * 1e3)
+    set_session("benchmark-cached")
+    cached = measure(lambda: client.get('/generate_pdf'), min_seconds=args.min_seconds)
+    return {"pdf.render": _stats(render), "pdf.cached": _stats(cached)}
+
+
+def synthetic_feature_frame(preprocessor, n, seed=SEED):
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in preprocessor.columns:
+        if preprocessor.dtypes[col] == 'category':
+            columns[col] = rng.choice(preprocessor.categories[col], size=n)
+        else:
+            columns[col] = rng.lognormal(8, 1.5, size=n).round()
+    return pd.DataFrame(columns)
+
+
+def bench_model(args):
+    """score_frame (preprocess + predict) at batch sizes; skipped without trained artifacts."""
+    from utils.scoring import ModelNotAvailable, load_model, score_frame
+    try:
+        bundle = load_model()
+    except ModelNotAvailable as e:
+        print(f"  model: skipped ({e})")
+        return {}
+    results = {}
+    for size in MODEL_BATCHES:
+        frame = synthetic_feature_frame(bundle['preprocessor'], size)
+        samples = measure(lambda: score_frame(frame), min_seconds=args.min_seconds)
+        results[f"model.score_frame_{size}"] = _stats(samples, rows=size)
+    return results
+
+
+BENCHMARKS = {
+    "chatbot": bench_chatbot,
+    "ocr": bench_ocr,
+    "assessment": bench_assessment,
+    "pdf": bench_pdf,
+    "model": bench_model,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner and comparison
+# ---------------------------------------------------------------------------
+
+def _git(*cmd):
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment(args):
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    from utils.scoring import COMPILED_MODEL_PATH, MODEL_PATH
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "packages": versions,
+        "ocr_engine": args.ocr,
+        "model_artifacts": {"compiled": os.path.exists(COMPILED_MODEL_PATH), "native": os.path.exists(MODEL_PATH)},
+        "min_seconds": args.min_seconds,
+        "seed": SEED,
+    }
+
+
+def run(args):
+    if args.ocr == "auto":
+        args.ocr = "real" if shutil.which("tesseract") else "stub"
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"Unknown benchmark(s): {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})")
+
+    use_scratch_stores()
+    os.environ.setdefault("OCR_POOL_SIZE", "0")
+    results = {}
+    for name in names:
+        print(f"Running {name} ...")
+        for key, stats in BENCHMARKS[name](args).items():
+            results[key] = stats
+            print(f"  {key:<40} median {stats['median']:>10.3f} {stats['unit']:<13} p95 {stats['p95']:>10.3f}")
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(args),
+        "results": results,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {out}")
+    if args.save_baseline:
+        shutil.copyfile(out, BASELINE_PATH)
+        print(f"Baseline stored at {BASELINE_PATH}")
+
+
+def compare(args):
+    """Exit status 1 if any shared benchmark's median got slower by more than the threshold."""
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+    for key in ("machine", "cpu_count", "python", "ocr_engine"):
+        before, after = baseline["environment"].get(key), current["environment"].get(key)
+        if before != after:
+            print(f"warning: {key} differs ({before} -> {after}); timings may not be comparable")
+
+    regressions = 0
+    print(f"{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        before, after = baseline["results"].get(name), current["results"].get(name)
+        if before is None or after is None:
+            print(f"{name:<40} {'-' if before is None else before['median']:>12} "
+                  f"{'-' if after is None else after['median']:>12} {'n/a':>8}")
+            continue
+        change = after["median"] / before["median"] - 1 if before["median"] else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<40} {before['median']:>12.3f} {after['median']:>12.3f} {change:>+7.1%}{flag}")
+    if regressions:
+        print(f"{regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and write a JSON report")
+    run_parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    run_parser.add_argument("--ocr", choices=("auto", "stub", "real"), default="auto",
+                            help="OCR engine: stub word boxes, real Tesseract, or real when installed (default)")
+    run_parser.add_argument("--out", help="report path (default: benchmarks/results/<timestamp>.json)")
+    run_parser.add_argument("--save-baseline", action="store_true", help=f"also copy the report to {BASELINE_PATH}")
+    run_parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS, help="time spent per measurement")
+    run_parser.add_argument("--conversations", type=int, default=20, help="chatbot conversations to time")
+    run_parser.add_argument("--pdf-renders", type=int, default=20, help="uncached PDF renders to time")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare a report against the baseline")
+    compare_parser.add_argument("current", help="report from `run`")
+    compare_parser.add_argument("--baseline", default=BASELINE_PATH)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed slowdown of the median as a fraction (default 0.10)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import time
+from collections import Counter
+
+# Each pool process handles one application at a time: keep OCR in-process there
+# instead of a nested OCR pool (must be set before utils.ocr_utils is imported)
+os.environ.setdefault("OCR_POOL_SIZE", "0")
+
+from utils.aadhaar import get_aadhaar_index  # noqa: E402
+from utils.name_index import screen_applicant  # noqa: E402
+from utils.question_graph import validate_application  # noqa: E402
+from utils.scoring import ModelNotAvailable, load_model  # noqa: E402
+
+from app import SCREENING_KEY, verify_documents  # noqa: E402
+
+# Re-runs eligibility over stored applications without a browser session:
+#   python bulk_process.py applications/ --out results.csv
+#   python bulk_process.py applications.csv --out results.db --processes 8
+# An application folder holds application.json (the chatbot fields) and its documents,
+# either in aadhar/, salary/ and bank/ subfolders or as aadhar.png, bank.pdf, ...
+# A CSV has one application per row with aadhar_file / salary_file / bank_file paths
+# relative to the CSV. Rerunning with the same --out skips finished applications;
+# --retry-errors redoes failed ones (in a CSV the last row per application_id wins).
+# Every application is screened like one submitted online: its Aadhaar goes into the
+# duplicate index and its name into the registry, keyed by application_id, so reruns
+# do not count an application as its own duplicate.
+PROFILE_FILE = "application.json"
+DOCUMENT_ALIASES = {
+    "aadhar": ("aadhar", "aadhaar"),
+    "salary": ("salary", "salary_slips", "salary_slip"),
+    "bank": ("bank", "bank_statement"),
+}
+RESULT_COLUMNS = ["application_id", "status", "loan_result", "aadhaar_verified", "extracted_aadhaar",
+                  "extracted_name", "name_verified", "net_salary", "monthly_emi", "average_balance",
+                  "aadhaar_duplicate", "name_matches", "error", "assessment", "processed_at"]
+# Results are made durable (and the checkpoint advanced) every N rows or seconds;
+# a crash redoes at most that much work
+COMMIT_EVERY = 50
+COMMIT_INTERVAL = 2.0
+PROGRESS_INTERVAL = 10.0
+
+
+def find_documents(folder):
+    """{field: path} for the documents of one application folder."""
+    documents = {}
+    try:
+        entries = sorted(os.listdir(folder))
+    except OSError:
+        return documents
+    for field, aliases in DOCUMENT_ALIASES.items():
+        for name in entries:
+            path = os.path.join(folder, name)
+            stem = os.path.splitext(name)[0].lower()
+            if os.path.isdir(path) and name.lower() in aliases:
+                files = sorted(f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)))
+                if files:
+                    documents[field] = os.path.join(path, files[0])
+                    break
+            elif os.path.isfile(path) and stem in aliases:
+                documents[field] = path
+                break
+    return documents
+
+
+def iter_directory(root):
+    """One work item per application folder, streamed from the directory listing."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, PROFILE_FILE)):
+                yield {"application_id": entry.name, "folder": entry.path}
+
+
+def iter_csv(path):
+    """One work item per CSV row; the id comes from application_id / id, else the row number."""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row_number, row in enumerate(csv.DictReader(fh), start=1):
+            application_id = row.get("application_id") or row.get("id") or f"row-{row_number}"
+            documents = {}
+            for field in DOCUMENT_ALIASES:
+                document = (row.pop(f"{field}_file", None) or "").strip()
+                if document:
+                    documents[field] = os.path.join(base, document)
+            yield {"application_id": str(application_id), "profile": row, "documents": documents}
+
+
+def iter_applications(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_csv(source)
+
+
+def _result_row(application_id, status, error=None, result=None):
+    result = result or {}
+    financials = result.get("financials") or {}
+    screening = result.get(SCREENING_KEY) or {}
+    duplicate = screening.get("aadhaar_duplicate") or {}
+    name_matches = screening.get("name_matches")
+    return {
+        "application_id": application_id,
+        "status": status,
+        "loan_result": result.get("loan_result"),
+        "aadhaar_verified": result.get("aadhaar_verified"),
+        "extracted_aadhaar": result.get("extracted_aadhaar"),
+        "extracted_name": result.get("extracted_name"),
+        "name_verified": result.get("name_verified"),
+        "net_salary": financials.get("net_salary"),
+        "monthly_emi": financials.get("monthly_emi"),
+        "average_balance": financials.get("average_balance"),
+        "aadhaar_duplicate": duplicate.get("duplicate"),
+        "name_matches": json.dumps(name_matches) if name_matches else None,
+        "error": error,
+        "assessment": result.get("loan_assessment"),
+        "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def process_application(item):
+    """Pool task: validate and screen the profile, extract the documents and build the assessment."""
+    application_id = item["application_id"]
+    try:
+        profile, documents = item.get("profile"), item.get("documents")
+        if "folder" in item:
+            with open(os.path.join(item["folder"], PROFILE_FILE), encoding="utf-8") as fh:
+                profile = json.load(fh)
+            documents = find_documents(item["folder"])
+        if not isinstance(profile, dict):
+            return _result_row(application_id, "invalid", error=f"{PROFILE_FILE} is not a JSON object")
+        loan_data, errors = validate_application(profile)
+        if errors:
+            return _result_row(application_id, "invalid", error=json.dumps(errors))
+        duplicate = get_aadhaar_index().register(loan_data['aadhaar_number'], application_id)
+        name_matches = screen_applicant(application_id, loan_data['name'])
+        result = verify_documents(loan_data, documents, duplicate, name_matches)
+        return _result_row(application_id, "ok", result=result)
+    except Exception as e:
+        return _result_row(application_id, "error", error=f"{type(e).__name__}: {e}")
+
+
+class SqliteResults:
+    """Results in a `bulk_results` table; the table doubles as the checkpoint."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS bulk_results (
+                application_id TEXT PRIMARY KEY,
+                {', '.join(f'{c} TEXT' for c in RESULT_COLUMNS[1:])}
+            )
+        """)
+        # Result files from before a column was added get it appended
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(bulk_results)")}
+        for column in RESULT_COLUMNS[1:]:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE bulk_results ADD COLUMN {column} TEXT")
+        self.conn.commit()
+
+    def finished(self, retry_errors=False):
+        sql = "SELECT application_id FROM bulk_results"
+        if retry_errors:
+            sql += " WHERE status != 'error'"
+        return {row[0] for row in self.conn.execute(sql)}
+
+    def write(self, row):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO bulk_results ({', '.join(RESULT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+            [None if row[c] is None else str(row[c]) for c in RESULT_COLUMNS],
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class CsvResults:
+    """
+    Results appended to a CSV, with a SQLite checkpoint (<out>.checkpoint) recording
+    each finished id and the file size after its row. On resume the CSV is cut back
+    to the last checkpointed size, so rows written after it are redone, not duplicated.
+    With --retry-errors a retried application gets a new row after its failed one:
+    the last row for an application_id wins (the checkpoint holds its current status).
+    """
+
+    def __init__(self, path):
+        checkpoint = path + ".checkpoint"
+        if not os.path.exists(checkpoint) and os.path.exists(path) and os.path.getsize(path) > 0:
+            raise SystemExit(f"{path} already has rows but no {checkpoint} to resume from; "
+                             "choose another --out or remove it")
+        self.conn = sqlite3.connect(checkpoint, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_checkpoint (
+                application_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                csv_offset INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+        offset = self.conn.execute("SELECT MAX(csv_offset) FROM bulk_checkpoint").fetchone()[0] or 0
+        if offset > (os.path.getsize(path) if os.path.exists(path) else 0):
+            print(f"{path} is shorter than its checkpoint; starting over")
+            self.conn.execute("DELETE FROM bulk_checkpoint")
+            self.conn.commit()
+            offset = 0
+        if offset:
+            with open(path, "rb") as fh:
+                header = fh.readline()
+            if header != self._encode(RESULT_COLUMNS):
+                raise SystemExit(f"{path} was written with different columns; choose another --out")
+        self.fh = open(path, "ab")
+        self.fh.truncate(offset)
+        self.fh.seek(offset)
+        if offset == 0:
+            self.fh.write(self._encode(RESULT_COLUMNS))
+        self._pending = []
+
+    @staticmethod
+    def _encode(values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    def finished(self, retry_errors=False):
+        sql = "SELECT application_id FROM bulk_checkpoint"
+        if retry_errors:
+            sql += " WHERE status != 'error'"
+        return {row[0] for row in self.conn.execute(sql)}
+
+    def write(self, row):
+        self.fh.write(self._encode(["" if row[c] is None else row[c] for c in RESULT_COLUMNS]))
+        self._pending.append((row["application_id"], row["status"], self.fh.tell()))
+
+    def commit(self):
+        # The rows must be on disk before the checkpoint says they are
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.conn.executemany("INSERT OR REPLACE INTO bulk_checkpoint VALUES (?, ?, ?)", self._pending)
+        self.conn.commit()
+        self._pending = []
+
+    def close(self):
+        self.commit()
+        self.fh.close()
+        self.conn.close()
+
+
+def open_results(path):
+    if path.lower().endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteResults(path)
+    return CsvResults(path)
+
+
+def run(source, out, processes, max_in_flight=None, max_tasks_per_child=None, retry_errors=False, limit=None):
+    """
+    Stream applications from `source` through a process pool into `out`.
+    At most `max_in_flight` applications are queued or being processed at once,
+    so memory stays flat however large the backlog is.
+    """
+    results = open_results(out)
+    finished = results.finished(retry_errors)
+    if finished:
+        print(f"Resuming: {len(finished)} applications already processed")
+    max_in_flight = max_in_flight or 2 * processes
+    done = queue.Queue()
+    counts = Counter()
+    pending = 0
+    uncommitted = 0
+    last_commit = last_progress = start = time.monotonic()
+
+    def record(row):
+        nonlocal pending, uncommitted, last_commit, last_progress
+        results.write(row)
+        pending -= 1
+        uncommitted += 1
+        counts[row["status"]] += 1
+        if row["status"] == "error":
+            print(f"{row['application_id']}: {row['error']}")
+        now = time.monotonic()
+        if uncommitted >= COMMIT_EVERY or now - last_commit >= COMMIT_INTERVAL:
+            results.commit()
+            uncommitted, last_commit = 0, now
+        if now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            total = sum(counts.values())
+            print(f"{total} processed ({total / (now - start):.1f}/s): "
+                  + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+
+    # Daemonic pool processes, like the job workers: OCR and PDF parsing stay in-process
+    pool = multiprocessing.Pool(processes, maxtasksperchild=max_tasks_per_child)
+    try:
+        submitted = 0
+        for item in iter_applications(source):
+            if item["application_id"] in finished:
+                continue
+            if limit is not None and submitted >= limit:
+                break
+            while pending >= max_in_flight:
+                record(done.get())
+            pool.apply_async(
+                process_application, (item,), callback=done.put,
+                error_callback=lambda e, i=item["application_id"]: done.put(
+                    _result_row(i, "error", error=f"{type(e).__name__}: {e}")),
+            )
+            pending += 1
+            submitted += 1
+        while pending:
+            record(done.get())
+        pool.close()
+    except KeyboardInterrupt:
+        print("Interrupted; finished results are saved and a rerun resumes from here")
+        pool.terminate()
+        raise
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        results.close()
+
+    elapsed = time.monotonic() - start
+    total = sum(counts.values())
+    print(f"Processed {total} applications in {elapsed:.1f} s ({total / max(elapsed, 1e-9):.1f}/s): "
+          + (", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "nothing to do"))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run document verification and the eligibility "
+                                                 "assessment over stored applications.")
+    parser.add_argument('source', help="directory of application folders, or a CSV of applications")
+    parser.add_argument('--out', required=True, help="results file: .csv, or .db/.sqlite for SQLite")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="applications queued or in progress at once (default: 2 x processes)")
+    parser.add_argument('--max-tasks-per-child', type=int, default=None,
+                        help="replace a worker after this many applications to cap its memory")
+    parser.add_argument('--retry-errors', action='store_true', help="reprocess applications that failed")
+    parser.add_argument('--limit', type=int, default=None, help="process at most this many applications")
+    args = parser.parse_args()
+    # Load the model before forking so every worker starts warm (the compiled forest is shared)
+    try:
+        load_model()
+    except ModelNotAvailable as e:
+        print(f"{e} Assessments will use the affordability rule only.")
+    try:
+        run(args.source, args.out, args.processes, args.max_in_flight, args.max_tasks_per_child,
+            args.retry_errors, args.limit)
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+
+
+if __name__ == '__main__':
+    main()
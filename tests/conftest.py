@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the metrics snapshot written at exit out of the repo's database.db
+os.environ.setdefault("METRICS_DB", os.path.join(tempfile.mkdtemp(prefix="loan-tests-"), "metrics.db"))
@@ -0,0 +1,56 @@
+from utils.aadhaar import (AadhaarIndex, best_correction, corrections, is_valid_aadhaar,
+                           verhoeff_check_digit, verhoeff_valid)
+
+VALID = '234123412346'
+
+
+def test_is_valid_aadhaar():
+    assert is_valid_aadhaar(VALID)
+    assert is_valid_aadhaar('2341 2341 2346')
+    assert not is_valid_aadhaar('234123412345')
+    assert not is_valid_aadhaar('23412341234')
+    leading_one = '12341234123' + verhoeff_check_digit('12341234123')
+    assert verhoeff_valid(leading_one)
+    assert not is_valid_aadhaar(leading_one)
+
+
+def test_check_digit_round_trip():
+    for body in ('23412341234', '98765432101', '50000000000'):
+        assert verhoeff_valid(body + verhoeff_check_digit(body))
+
+
+def test_corrections():
+    assert corrections(VALID) == []
+    confidences = [0.95] * 11 + [0.2]
+    ranked = corrections('234123412340', confidences)
+    assert ranked[0][0] == VALID
+    assert all(is_valid_aadhaar(candidate) for candidate, _ in ranked)
+
+
+def test_best_correction_needs_an_unsure_digit():
+    misread = '234123412340'
+    assert best_correction(misread, [0.95] * 11 + [0.2]) == VALID
+    # OCR was sure of every digit: no fix is plausible enough to accept
+    assert best_correction(misread, [0.95] * 12) is None
+    assert best_correction(VALID, [0.2] * 12) is None
+
+
+def test_duplicate_index(tmp_path):
+    index = AadhaarIndex(str(tmp_path / 'index.db'), key=b'test-key')
+    assert not index.register(VALID, 'app-1')['duplicate']
+    # Re-registering the same application is not a duplicate
+    assert not index.register('2341 2341 2346', 'app-1')['duplicate']
+    seen = index.register(VALID, 'app-2')
+    assert seen['duplicate']
+    assert seen['other_applications'] == 1
+    assert seen['concurrent_applications'] == 1
+    assert not index.register('987654321012', 'app-3')['duplicate']
+
+
+def test_index_stores_keyed_hashes_only(tmp_path):
+    index = AadhaarIndex(str(tmp_path / 'index.db'), key=b'test-key')
+    index.register(VALID, 'app-1')
+    rows = index._conn().execute("SELECT digest FROM aadhaar_index").fetchall()
+    assert rows == [(index.digest(VALID),)]
+    assert VALID not in rows[0][0]
+    assert AadhaarIndex(str(tmp_path / 'other.db'), key=b'other-key').digest(VALID) != rows[0][0]
@@ -0,0 +1,63 @@
+import numpy as np
+
+from utils.affordability import TENURES, emi, foir_limit, offer_grid, product_arrays
+
+# A zero-rate product keeps the arithmetic exact: EMI = amount / months
+FLAT = {"bank": "Flat", "loan_type": "personal", "rate": 0.0, "max_tenure": 60, "min_income": 0}
+PREMIUM = {"bank": "Premium", "loan_type": "personal", "rate": 12.0, "max_tenure": 360, "min_income": 50000}
+
+
+def _grid(income, existing, amount, tenure, products=(FLAT, PREMIUM)):
+    return offer_grid([income], [existing], [amount], [tenure], product_arrays(list(products)))
+
+
+def test_emi():
+    assert np.isclose(emi(100000, 12.0, 12), 8884.88, atol=0.01)
+    assert emi(120000, 0.0, 60) == 2000
+
+
+def test_foir_bands():
+    np.testing.assert_array_equal(foir_limit([20000, 25000, 74999, 75000, 200000]), [0.4, 0.5, 0.5, 0.6, 0.6])
+
+
+def test_offer_tenure_capped_by_product():
+    # Budget 40000 * 0.5 - 5000 = 15000; only FLAT accepts this income
+    grid = _grid(40000, 5000, 600000, 120)
+    assert grid["eligible"][0]
+    assert grid["best_product"][0] == 0
+    assert grid["best_tenure"][0] == 60
+    assert grid["best_emi"][0] == 10000
+    np.testing.assert_array_equal(grid["offer_tenure"][0], [60, 120])
+    assert np.isinf(grid["offer_cost"][0, 1])
+    # Max principal uses the same (capped) tenure as eligibility
+    assert grid["max_principal"][0] == 15000 * 60
+
+
+def test_requested_tenure_off_the_grid():
+    grid = _grid(40000, 0, 100000, 50, products=(dict(FLAT, max_tenure=360),))
+    assert grid["best_tenure"][0] == 50
+    assert grid["best_emi"][0] == 2000
+    # Shorter grid tenures are alternatives when their EMI fits the 20000 budget
+    shorter = TENURES[np.isfinite(grid["cost"][0, 0])]
+    np.testing.assert_array_equal(shorter, [12, 24, 36, 48])
+
+
+def test_zero_tenure_means_longest_allowed():
+    grid = _grid(100000, 0, 100000, 0)
+    np.testing.assert_array_equal(grid["offer_tenure"][0], [60, 360])
+
+
+def test_unaffordable_loan():
+    grid = _grid(40000, 15000, 600000, 60)
+    assert not grid["eligible"][0]
+    assert np.isnan(grid["best_emi"][0])
+    assert grid["max_principal"][0] == 5000 * 60
+
+
+def test_applicants_are_independent():
+    products = product_arrays([FLAT, PREMIUM])
+    batch = offer_grid([40000, 100000], [5000, 0], [600000, 3000000], [120, 240], products)
+    for i, args in enumerate([(40000, 5000, 600000, 120), (100000, 0, 3000000, 240)]):
+        single = _grid(*args)
+        for key in ("eligible", "best_product", "best_tenure", "max_principal"):
+            assert batch[key][i] == single[key][0]
@@ -0,0 +1,84 @@
+import pytest
+
+from utils.jobs import JobQueue, QueueFull
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.db'), max_depth=10, timeout=60, max_attempts=2)
+
+
+def _make_available(queue, job_id):
+    queue._conn().execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+
+
+def test_claim_by_priority_then_age(queue):
+    first = queue.enqueue('verify', {'n': 1})
+    report = queue.enqueue('report', {'n': 2}, priority=-1)
+    second = queue.enqueue('verify', {'n': 3})
+    for created_at, job_id in enumerate((first, report, second)):
+        queue._conn().execute("UPDATE jobs SET created_at = ? WHERE id = ?", (created_at, job_id))
+    claimed = [queue.claim('w1')['id'] for _ in range(3)]
+    assert claimed == [first, second, report]
+    assert queue.claim('w1') is None
+
+
+def test_claimed_job_carries_payload(queue):
+    queue.enqueue('verify', {'files': ['a.png']})
+    job = queue.claim('w1')
+    assert job['payload'] == {'files': ['a.png']}
+    assert job['attempts'] == 1
+    assert queue.get(job['id'])['status'] == 'running'
+
+
+def test_depth_budget_per_kind(queue):
+    queue.enqueue('report', {}, max_depth=1)
+    with pytest.raises(QueueFull):
+        queue.enqueue('report', {}, max_depth=1)
+    # Another kind still has room
+    queue.enqueue('verify', {})
+
+
+def test_fail_retries_with_backoff_then_gives_up(queue):
+    job_id = queue.enqueue('verify', {})
+    queue.fail(queue.claim('w1')['id'], 'boom', 'w1')
+    assert queue.get(job_id)['status'] == 'queued'
+    assert queue.claim('w1') is None  # backing off
+    _make_available(queue, job_id)
+    queue.fail(queue.claim('w1')['id'], 'boom again', 'w1')
+    job = queue.get(job_id)
+    assert (job['status'], job['error'], job['attempts']) == ('failed', 'boom again', 2)
+
+
+def test_expired_lease_is_requeued_then_failed(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), timeout=-1, max_attempts=2)
+    job_id = queue.enqueue('verify', {})
+    assert queue.claim('w1')['id'] == job_id
+    # The lease has already run out: the next claim re-queues and takes it
+    assert queue.claim('w2')['id'] == job_id
+    assert queue.overdue_workers() == ['w2']
+    assert queue.claim('w3') is None
+    job = queue.get(job_id)
+    assert (job['status'], job['error']) == ('failed', 'timed out')
+
+
+def test_worker_without_lease_cannot_finish_job(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), timeout=-1, max_attempts=3)
+    job_id = queue.enqueue('verify', {})
+    queue.claim('w1')
+    queue.claim('w2')  # w1's lease expired; w2 now holds the job
+    queue.complete(job_id, {'ok': True}, 'w1')
+    queue.fail(job_id, 'late failure', 'w1')
+    assert queue.get(job_id)['status'] == 'running'
+    queue.complete(job_id, {'ok': True}, 'w2')
+    job = queue.get(job_id)
+    assert (job['status'], job['result']) == ('done', {'ok': True})
+
+
+def test_purge_keeps_pending_jobs(queue):
+    done = queue.enqueue('verify', {})
+    pending = queue.enqueue('verify', {})
+    queue.complete(queue.claim('w1')['id'], {}, 'w1')
+    assert queue.purge(retention=-1) == 1
+    assert queue.get(done) is None
+    assert queue.get(pending)['status'] == 'queued'
@@ -0,0 +1,23 @@
+import os
+
+from utils import metrics
+
+
+def test_forked_workers_report_separately(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DB', str(tmp_path / 'metrics.db'))
+    metrics._after_fork()
+    metrics.inc('jobs_total')
+
+    children = []
+    for _ in range(2):
+        pid = os.fork()
+        if pid == 0:
+            metrics.inc('jobs_total')
+            metrics.flush()
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        assert os.waitpid(pid, 0)[1] == 0
+
+    _, counters = metrics._merged()
+    assert counters[('jobs_total', ())] == 3
@@ -0,0 +1,72 @@
+import pytest
+
+from utils import name_index
+from utils.name_index import (MATCH_THRESHOLD, ApplicantRegistry, NameIndex, load_watchlist, name_grams,
+                              normalize_name, similarity)
+
+
+@pytest.fixture(params=['rapidfuzz', 'difflib'])
+def scorer(request, monkeypatch):
+    if request.param == 'difflib':
+        monkeypatch.setattr(name_index, 'fuzz', None)
+    elif name_index.fuzz is None:
+        pytest.skip("rapidfuzz is not installed")
+
+
+def test_normalize_name():
+    assert normalize_name('Dr. RAVI  Kumar') == 'ravi kumar'
+    assert normalize_name('Smt. Priya-Sharma 2') == 'priya sharma'
+    assert normalize_name(None) == ''
+
+
+def test_grams_ignore_word_order():
+    assert name_grams('ravi kumar') == name_grams('kumar ravi')
+    assert '$ra' in name_grams('ravi')
+
+
+def test_similarity_thresholds(scorer):
+    assert similarity('ravi kumar', 'kumar ravi') == 100
+    assert similarity('ravi kumar', 'ravi kumr') >= MATCH_THRESHOLD
+    assert similarity('ravi kumar', 'kavi kumar') >= MATCH_THRESHOLD
+    # A shared surname alone is not a match
+    assert similarity('ravi kumar', 'sita kumar') < MATCH_THRESHOLD
+    assert similarity('priya sharma', 'priya verma') < MATCH_THRESHOLD
+
+
+def test_search(scorer):
+    index = NameIndex()
+    for key, name in [('a1', 'Ravi Kumar'), ('a2', 'Sita Kumar'), ('a3', 'Kumar Ravi'), ('a4', 'Anil Mehta')]:
+        index.add(key, name)
+    matches = index.search('Mr Ravi Kumar')
+    assert [m['key'] for m in matches] == ['a1', 'a3']
+    assert matches[0] == {'key': 'a1', 'name': 'Ravi Kumar', 'source': 'application', 'score': 100.0}
+    assert [m['key'] for m in index.search('Ravi Kumar', exclude='a1')] == ['a3']
+    assert index.search('') == []
+
+
+def test_candidates_need_trigram_overlap():
+    index = NameIndex()
+    index.add('a1', 'Ravi Kumar')
+    index.add('a2', 'Anil Mehta')
+    assert list(index.candidates('ravi kumar')) == [0]
+    # Too few shared trigrams: not even scored, whatever the threshold
+    assert index.search('Ravindra Kumaraswamy', min_score=0) == []
+
+
+def test_registry_sees_other_processes_rows(tmp_path):
+    db = str(tmp_path / 'names.db')
+    first, second = ApplicantRegistry(db), ApplicantRegistry(db)
+    first.add('a1', 'Ravi Kumar')
+    first.add('a1', 'Ravi Kumar')
+    assert len(first.index) == 1
+    second.sync()
+    assert [m['key'] for m in second.index.search('Ravi Kumr')] == ['a1']
+
+
+def test_watchlist(tmp_path):
+    path = tmp_path / 'watchlist.csv'
+    path.write_text("name,reason\nRavi Kumar,fraud 2023\n,blank\n", encoding='utf-8')
+    index = load_watchlist(str(path))
+    assert len(index) == 1
+    assert index.search('ravi kumar')[0]['source'] == 'watchlist'
+    assert load_watchlist(str(tmp_path / 'missing.csv')) is None
@@ -0,0 +1,64 @@
+from utils.question_graph import (COMPLETE_MESSAGE, DONE_MESSAGE, answer, next_step,
+                                  validate_application)
+
+APPLICATION = {
+    'name': 'Asha', 'age': '31', 'employment_type': 'Salaried', 'income': '60000',
+    'existing_emis': '0', 'bank_name': 'SBI', 'co_applicant': 'No', 'aadhaar_number': '234123412346',
+    'pan_number': 'ABCDE1234F', 'loan_type': 'Home', 'loan_amnt': '500000', 'loan_tenure': '120',
+    'collateral': 'No',
+}
+
+
+def test_next_step_is_first_unanswered():
+    assert next_step({}).field == 'name'
+    assert next_step({'name': 'Asha', 'age': '31'}).field == 'employment_type'
+
+
+def test_co_income_skipped_without_co_applicant():
+    data = {k: APPLICATION[k] for k in ('name', 'age', 'employment_type', 'income', 'existing_emis',
+                                        'bank_name', 'co_applicant')}
+    assert next_step(data).field == 'aadhaar_number'
+    assert data['co_income'] == 'N/A'
+
+
+def test_co_income_asked_with_co_applicant():
+    data = {'name': 'Asha', 'age': '31', 'employment_type': 'salaried', 'income': '60000',
+            'existing_emis': '0', 'bank_name': 'SBI', 'co_applicant': 'Yes'}
+    assert next_step(data).field == 'co_income'
+
+
+def test_answer_rejects_invalid_and_keeps_step():
+    data = {'name': 'Asha'}
+    assert answer(data, 'thirty') == "Please enter a valid age."
+    assert 'age' not in data
+    answer(data, ' 31 ')
+    assert data['age'] == '31'
+
+
+def test_answer_after_last_step():
+    data = dict(APPLICATION, co_income='N/A')
+    del data['collateral']
+    assert answer(data, 'No') == COMPLETE_MESSAGE
+    assert answer(data, 'anything') == DONE_MESSAGE
+
+
+def test_validate_application_normalises():
+    data, errors = validate_application(APPLICATION)
+    assert errors == {}
+    assert data['employment_type'] == 'salaried'
+    assert data['aadhaar_number'] == '2341 2341 2346'
+    assert data['co_income'] == 'N/A'
+
+
+def test_validate_application_reports_each_field():
+    payload = dict(APPLICATION, age='', income='lots', aadhaar_number='234123412345')
+    data, errors = validate_application(payload)
+    assert errors['age'] == "age is required"
+    assert errors['income'] == "Please enter your income in numbers."
+    assert 'aadhaar_number' in errors
+    assert 'income' not in data
+
+
+def test_validate_application_requires_co_income_when_asked():
+    _, errors = validate_application(dict(APPLICATION, co_applicant='yes'))
+    assert errors == {'co_income': "co_income is required"}
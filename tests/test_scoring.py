@@ -0,0 +1,28 @@
+import numpy as np
+
+from utils.preprocessing import Preprocessor
+from utils.scoring import application_features, feature_matrix
+
+COLUMNS = ['gender', 'married', 'applicant_income', 'coapplicant_income', 'loan_amount',
+           'loan_amount_term', 'self_employed', 'property_area']
+
+
+def _preprocessor():
+    dtypes = {c: 'float32' for c in COLUMNS}
+    categories = {
+        'gender': ['Female', 'Male'],
+        'married': ['No', 'Yes'],
+        'self_employed': ['No', 'Yes'],
+        'property_area': ['Rural', 'Semiurban', 'Urban'],
+    }
+    dtypes.update({c: 'category' for c in categories})
+    return Preprocessor(COLUMNS, dtypes, categories)
+
+
+def test_chat_application_leaves_unasked_columns_missing():
+    data = {'income': '50000', 'co_applicant': 'No', 'loan_amnt': '200000', 'loan_tenure': '120',
+            'employment_type': 'Salaried'}
+    X = feature_matrix(application_features(data), _preprocessor())
+
+    expected = np.array([[np.nan, np.nan, 50000, 0, 200, 120, 0, np.nan]], dtype=np.float32)
+    np.testing.assert_array_equal(X, expected)
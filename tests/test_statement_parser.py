@@ -0,0 +1,70 @@
+from utils.statement_parser import _net_pay, _StatementSummary
+
+
+def _summary(rows):
+    summary = _StatementSummary()
+    for row in rows:
+        summary.add_row(row)
+    return summary.result()
+
+
+def test_credit_and_debit_follow_the_balance():
+    # "CR" in a debit's description must not make it a credit once the balance is known
+    result = _summary([
+        "01-01-2024 Opening Balance 10,000.00",
+        "02-01-2024 NEFT CR REVERSAL 1,000.00 9,000.00",
+        "03-01-2024 ACME SALARY 50,000.00 59,000.00",
+        "05-01-2024 SALARY ADVANCE RECOVERY 2,000.00 57,000.00",
+    ])
+    assert result["net_salary"] == 50000.0
+    assert result["salary_months"] == 1
+    assert result["transactions"] == 3
+
+
+def test_only_recurring_emis_count_over_several_months():
+    result = _summary([
+        "01-01-2024 Opening Balance 100,000.00",
+        "05-01-2024 HDFC LOAN EMI 12345 12,000.00 88,000.00",
+        "10-01-2024 ACH DEBIT INSURANCE 30,000.00 58,000.00",
+        "05-02-2024 HDFC LOAN EMI 12346 12,000.00 46,000.00",
+    ])
+    assert result["monthly_emi"] == 12000.0
+    emis = {e["description"]: e for e in result["emi_debits"]}
+    assert emis["HDFC LOAN EMI 12345"]["months"] == 2
+    assert emis["HDFC LOAN EMI 12345"]["recurring"]
+    assert not emis["ACH DEBIT INSURANCE"]["recurring"]
+
+
+def test_single_month_statement_counts_every_emi():
+    result = _summary([
+        "01-01-2024 Opening Balance 100,000.00",
+        "05-01-2024 HDFC LOAN EMI 12,000.00 88,000.00",
+        "10-01-2024 NACH AXIS CAR LOAN 8,000.00 80,000.00",
+    ])
+    assert result["monthly_emi"] == 20000.0
+
+
+def test_average_balance_is_day_weighted():
+    # 100 for two days (1st, 2nd), then 400 for one day (3rd)
+    result = _summary([
+        "01-01-2024 Opening Balance 100.00",
+        "03-01-2024 ACME SALARY 300.00 400.00",
+    ])
+    assert result["average_balance"] == 200.0
+
+
+def test_rows_without_a_date_or_amount_are_ignored():
+    result = _summary(["Date Narration Debit Credit Balance", "01-01-2024 Opening Balance"])
+    assert result["transactions"] == 0
+    assert result["average_balance"] is None
+
+
+def test_net_pay_on_the_label_line():
+    assert _net_pay(["Basic 40,000.00", "Net Pay: 52,300.00 (Fifty two thousand)"]) == 52300.0
+
+
+def test_net_pay_from_total_row_under_header():
+    rows = ["Earnings Amount Deductions Amount Net Pay", "Basic 40,000.00 PF 1,800.00",
+            "Total 45,000.00 2,500.00 42,500.00"]
+    assert _net_pay(rows) == 42500.0
+    assert _net_pay(["Basic 40,000.00"]) is None
@@ -3,19 +3,16 @@ import numpy as np
 import xgboost as xgb
 import joblib
 import os
-import importlib.util
+import argparse
 
 # Core Scikit-learn Tools (Preprocessing and Metrics)
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
-from sklearn.preprocessing import LabelEncoder
-# Optional dependency: bayes_opt (BayesianOptimization)
-_bayes_opt_available = importlib.util.find_spec("bayes_opt") is not None
-BayesianOptimization = None  # type: ignore
-if _bayes_opt_available:  # pragma: no cover - environment-dependent
-    # Import dynamically to avoid static linter warnings if not installed
-    import importlib
-    BayesianOptimization = importlib.import_module("bayes_opt").BayesianOptimization  # type: ignore
+from utils.preprocessing import Preprocessor
+from utils.dataset_cache import load_dataset
+from utils.tuning import run_search, load_best_params, BEST_PARAMS_PATH, TRIALS_PATH
+from utils.streaming import train_streaming, DEFAULT_CHUNK_SIZE
+from utils.tree_export import export_model
 
 # =======================================================
 # DATA LOADING, PREVIEW, AND CLEANING (Corrected for VS Code)
@@ -25,80 +22,11 @@ if _bayes_opt_available:  # pragma: no cover - environment-dependent
 # Prefer the new 'loan_eligibility_dataset_1.xlsx' if present; fallback to 'loan_eligibility_dataset.xlsx'.
 _PREFERRED_DATASET = 'loan_eligibility_dataset_1.xlsx'
 _FALLBACK_DATASET = 'loan_eligibility_dataset.xlsx'
+MODEL_PATH = 'final_xgboost_loan_model.joblib'
+PREPROCESSOR_PATH = 'loan_preprocessor.npz'
+COMPILED_MODEL_PATH = 'loan_model_compiled'
 
-dataset_path = _PREFERRED_DATASET if os.path.exists(_PREFERRED_DATASET) else _FALLBACK_DATASET
-
-try:
-    df = pd.read_excel(dataset_path)
-except FileNotFoundError:
-    print("Error: Dataset file not found. Expected one of:")
-    print(f" - {_PREFERRED_DATASET}")
-    print(f" - {_FALLBACK_DATASET}")
-    print("Please ensure one of these files is in the same directory as this script.")
-    exit()
-
-# Dropping non-predictive columns identified in the output
-# We remove 'id' and 'applicant_name' as they are unique identifiers, not predictive features.
-df_xgb = df.copy().drop(columns=['id', 'applicant_name']).dropna()
-
-# Encode categorical columns (The LabelEncoder logic works fine)
-label_encoders = {}
-for col in df_xgb.select_dtypes(include=['object']).columns:
-    le = LabelEncoder()
-    df_xgb[col] = le.fit_transform(df_xgb[col])
-    label_encoders[col] = le
-
-# Separate features and target (The target is now loan_status, encoded to 0/1)
-X = df_xgb.drop(columns=['eligibility_score', 'loan_status']) # Drop the continuous score and the target label
-y = df_xgb['loan_status'] # Use the encoded loan_status as the target
-
-# Convert continuous/fractional target into discrete classes (Keeping your original logic for final target)
-y = y.round().astype(int)
-
-# Remove rare classes (Keeping your original logic for safety, though unlikely after dropna)
-counts = y.value_counts()
-rare_classes = counts[counts < 2].index
-mask = ~y.isin(rare_classes)
-X = X[mask]
-y = y[mask]
-
-# Train-test split with stratification
-X_temp, X_test, y_temp, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-X_train, X_val, y_train, y_val = train_test_split(
-    X_temp, y_temp, test_size=0.25, random_state=42, stratify=y_temp
-)
-
-# =======================================================
-# BAYESIAN OPTIMIZATION LOGIC
-# =======================================================
-
-def xgb_objective(max_depth, learning_rate, n_estimators, gamma, subsample):
-    # Cast float values to integer where required
-    max_depth = int(max_depth)
-    n_estimators = int(n_estimators)
-
-    model = xgb.XGBClassifier(
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        learning_rate=learning_rate,
-        gamma=gamma,
-        subsample=subsample,
-        random_state=42,
-        use_label_encoder=False,
-        eval_metric='logloss' 
-    )
-
-    # Use cross-validation on the X_train set
-    roc_auc = cross_val_score(
-        model, 
-        X_train, y_train, 
-        cv=3, 
-        scoring='roc_auc'
-    ).mean()
-
-    return roc_auc 
+TARGET_COLUMNS = ['eligibility_score', 'loan_status']
 
 # Define Hyperparameter Bounds (keeping your ranges)
 pbounds = {
@@ -109,60 +37,144 @@ pbounds = {
     'subsample': (0.5, 1.0)
 }
 
-# Initialize and Run Optimization (optional if bayes_opt is installed)
-optimizer = None
-if BayesianOptimization is not None:
-    optimizer = BayesianOptimization(
-        f=xgb_objective,
-        pbounds=pbounds,
+# Fallback hyperparameters, used until a tuning run has written best_params.json
+tuned_params = {
+    'max_depth': 10,
+    'n_estimators': 107,
+    'learning_rate': 0.1618,
+    'gamma': 0.3961,
+    'subsample': 0.9511
+}
+
+
+def load_and_prepare(dataset_path):
+    try:
+        # Parsed once into a columnar .npy cache; later runs memory-map it instead of re-reading the workbook
+        df = load_dataset(dataset_path)
+    except FileNotFoundError:
+        print("Error: Dataset file not found. Expected one of:")
+        print(f" - {_PREFERRED_DATASET}")
+        print(f" - {_FALLBACK_DATASET}")
+        print("Please ensure one of these files is in the same directory as this script.")
+        exit()
+
+    # Dropping non-predictive columns identified in the output
+    # We remove 'id' and 'applicant_name' as they are unique identifiers, not predictive features.
+    df_xgb = df.drop(columns=['id', 'applicant_name']).dropna()
+
+    # Fit the persisted preprocessing artifact (category lookups, column order, dtypes).
+    # Codes match LabelEncoder's, so the encoding is unchanged but reproducible at inference.
+    preprocessor = Preprocessor.fit(df_xgb, target_columns=TARGET_COLUMNS)
+
+    # Separate features and target (The target is now loan_status, encoded to 0/1)
+    X = pd.DataFrame(preprocessor.transform(df_xgb), columns=preprocessor.columns, index=df_xgb.index) # transform() keeps only the feature columns, in training order
+    y = pd.Series(preprocessor.encode_column('loan_status', df_xgb['loan_status']), index=df_xgb.index) # Use the encoded loan_status as the target
+
+    # Convert continuous/fractional target into discrete classes (Keeping your original logic for final target)
+    y = y.round().astype(int)
+
+    # Remove rare classes (Keeping your original logic for safety, though unlikely after dropna)
+    counts = y.value_counts()
+    rare_classes = counts[counts < 2].index
+    mask = ~y.isin(rare_classes)
+    return X[mask], y[mask], preprocessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the loan eligibility XGBoost model.")
+    parser.add_argument('--dataset', help="xlsx/csv dataset (defaults to the project workbook)")
+    parser.add_argument('--tune', action='store_true', help="run the parallel Bayesian search before final training")
+    parser.add_argument('--n-iter', type=int, default=25, help="total tuning trials, including resumed ones")
+    parser.add_argument('--init-points', type=int, default=5, help="random trials before the GP takes over")
+    parser.add_argument('--workers', type=int, default=None, help="parallel candidate evaluations (default: CPU count)")
+    parser.add_argument('--stream', action='store_true', help="out-of-core training: read, encode and train chunk by chunk")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk in --stream mode")
+    args = parser.parse_args()
+
+    dataset_path = args.dataset or (_PREFERRED_DATASET if os.path.exists(_PREFERRED_DATASET) else _FALLBACK_DATASET)
+
+    if args.stream:
+        # Encodes with the persisted loan_preprocessor.npz (fitted in one extra pass if missing)
+        # and feeds XGBoost through an external-memory DMatrix instead of in-memory frames.
+        final_model, _ = train_streaming(dataset_path, load_best_params(tuned_params), PREPROCESSOR_PATH,
+                                         chunksize=args.chunk_size)
+        joblib.dump(final_model, MODEL_PATH)
+        print(f"\nModel saved successfully as '{MODEL_PATH}' for deployment.")
+        export_model(final_model, COMPILED_MODEL_PATH)
+        print(f"Compiled forest exported to '{COMPILED_MODEL_PATH}/'.")
+        return
+
+    X, y, preprocessor = load_and_prepare(dataset_path)
+
+    # Train-test split with stratification
+    X_temp, X_test, y_temp, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    X_train, X_val, y_train, y_val = train_test_split(
+        X_temp, y_temp, test_size=0.25, random_state=42, stratify=y_temp
+    )
+
+    # =======================================================
+    # BAYESIAN OPTIMIZATION LOGIC
+    # =======================================================
+
+    # Candidates are scored in a process pool on cached CV folds of the training split.
+    # Every trial is appended to tuning_trials.jsonl, so an interrupted search resumes.
+    if args.tune:
+        run_search(
+            X_train.to_numpy(), y_train.to_numpy(), pbounds,
+            n_iter=args.n_iter, init_points=args.init_points, n_workers=args.workers,
+        )
+    elif os.path.exists(TRIALS_PATH) and not os.path.exists(BEST_PARAMS_PATH):
+        print(f"Found {TRIALS_PATH} without {BEST_PARAMS_PATH}; rerun with --tune to resume the search.")
+
+    # =======================================================
+    # FINAL MODEL TRAINING AND EVALUATION (Using your best parameters)
+    # =======================================================
+
+    # 1. Read the BEST Hyperparameters found by the optimizer (falls back to tuned_params)
+    best_params = load_best_params(tuned_params)
+    print(f"Training final model with: {best_params}")
+
+    # 2. Initialize the Final XGBoost Classifier
+    final_model = xgb.XGBClassifier(
+        **best_params,
         random_state=42,
-        verbose=0
+        eval_metric='logloss'
     )
 
-# optimizer.maximize(init_points=5, n_iter=20) # Commented out to run final model immediately, assuming optimization is done
+    # 3. Train the model on the full Training + Validation data (X_temp holds exactly those rows, no concat copy)
+    final_model.fit(X_temp, y_temp)
 
-# =======================================================
-# FINAL MODEL TRAINING AND EVALUATION (Using your best parameters)
-# =======================================================
+    # 4. Predict on the untouched Test Set
+    y_pred_tuned = final_model.predict(X_test)
+
+    # 5. Evaluate Final Accuracy and Report
+    final_accuracy = accuracy_score(y_test, y_pred_tuned)
+    test_auc = roc_auc_score(y_test, final_model.predict_proba(X_test)[:, 1])
+
+    print("\n" * 2)
+    print("="*60)
+    print("ML PIPELINE COMPLETE")
+    print("============================================================")
+    print(f"Final Tuned Model Accuracy on Test Set: {final_accuracy:.4f}")
+    print(f"Final Tuned Model ROC AUC on Test Set: {test_auc:.4f}")
+    print("============================================================")
+    print("Final Classification Report on Test Set:")
+    print(classification_report(y_test, y_pred_tuned))
+
+    # 6. Serialize (Save) the Final Model for Deployment
+    joblib.dump(final_model, MODEL_PATH)
+    print(f"\nModel saved successfully as '{MODEL_PATH}' for deployment.")
+
+    # 7. Save the preprocessing artifact so inference (utils/scoring.py) can reproduce the encoding
+    preprocessor.save(PREPROCESSOR_PATH)
+    print(f"Preprocessing saved as '{PREPROCESSOR_PATH}'.")
+
+    # 8. Export the memory-mappable compiled forest that the web workers load
+    export_model(final_model, COMPILED_MODEL_PATH)
+    print(f"Compiled forest exported to '{COMPILED_MODEL_PATH}/'.")
 
-# 1. Define the BEST Hyperparameters found by the optimizer (rounding values)
-tuned_params = {
-    'max_depth': 10,
-    'n_estimators': 107, 
-    'learning_rate': 0.1618, 
-    'gamma': 0.3961,        
-    'subsample': 0.9511
-}
 
-# 2. Initialize the Final XGBoost Classifier
-final_model = xgb.XGBClassifier(
-    **tuned_params, 
-    random_state=42,
-    use_label_encoder=False,
-    eval_metric='logloss' 
-)
-
-# 3. Train the model on the full Training + Validation data
-X_train_full = pd.concat([X_train, X_val])
-y_train_full = pd.concat([y_train, y_val])
-
-final_model.fit(X_train_full, y_train_full)
-
-# 4. Predict on the untouched Test Set
-y_pred_tuned = final_model.predict(X_test)
-
-# 5. Evaluate Final Accuracy and Report
-final_accuracy = accuracy_score(y_test, y_pred_tuned)
-
-print("\n" * 2)
-print("="*60)
-print("ML PIPELINE COMPLETE")
-print("============================================================")
-print(f"Final Tuned Model Accuracy on Test Set: {final_accuracy:.4f}")
-print("============================================================")
-print("Final Classification Report on Test Set:")
-print(classification_report(y_test, y_pred_tuned))
-
-# 6. Serialize (Save) the Final Model for Deployment
-joblib.dump(final_model, 'final_xgboost_loan_model.joblib')
-print("\nModel saved successfully as 'final_xgboost_loan_model.joblib' for deployment.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
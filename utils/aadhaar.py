@@ -0,0 +1,212 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# Aadhaar numbers end in a Verhoeff check digit and never start with 0 or 1.
+# Checking that up front rejects typos and OCR misreads before any document work.
+
+_VERHOEFF_D = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+    (1, 2, 3, 4, 0, 6, 7, 8, 9, 5),
+    (2, 3, 4, 0, 1, 7, 8, 9, 5, 6),
+    (3, 4, 0, 1, 2, 8, 9, 5, 6, 7),
+    (4, 0, 1, 2, 3, 9, 5, 6, 7, 8),
+    (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+    (6, 5, 9, 8, 7, 1, 0, 4, 3, 2),
+    (7, 6, 5, 9, 8, 2, 1, 0, 4, 3),
+    (8, 7, 6, 5, 9, 3, 2, 1, 0, 4),
+    (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+)
+_VERHOEFF_P = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+    (1, 5, 7, 6, 2, 8, 3, 0, 9, 4),
+    (5, 8, 0, 3, 7, 9, 6, 1, 4, 2),
+    (8, 9, 1, 6, 0, 4, 3, 5, 2, 7),
+    (9, 4, 5, 3, 1, 2, 6, 8, 7, 0),
+    (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+    (2, 7, 9, 3, 8, 0, 6, 4, 1, 5),
+    (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+)
+_VERHOEFF_INV = (0, 4, 3, 2, 1, 5, 6, 7, 8, 9)
+
+# Digit pairs Tesseract commonly confuses; a correction along one of these is more likely
+_OCR_CONFUSIONS = {
+    frozenset(pair): weight for pair, weight in (
+        ("38", 1.0), ("08", 1.0), ("68", 0.9), ("56", 0.9), ("17", 0.9), ("06", 0.8),
+        ("49", 0.8), ("27", 0.7), ("35", 0.7), ("14", 0.6), ("09", 0.6), ("89", 0.6),
+        ("12", 0.5), ("25", 0.5), ("69", 0.5), ("03", 0.5),
+    )
+}
+_OTHER_CONFUSION = 0.1
+MAX_CORRECTIONS = 3
+# Lowest score (confusion weight x (1 - digit confidence)) at which a correction is
+# taken as the reading: a common confusion at a digit OCR was unsure about. It must
+# also beat the runner-up by CORRECTION_MARGIN, since confidences are per word and
+# several digits of one word can be equally plausible fixes.
+MIN_CORRECTION_SCORE = 0.25
+CORRECTION_MARGIN = 1.5
+
+# Duplicate index: keyed hashes only, never the number itself
+AADHAAR_INDEX_DB = os.getenv("AADHAAR_INDEX_DB", "database.db")
+AADHAAR_INDEX_KEY_FILE = os.getenv("AADHAAR_INDEX_KEY_FILE", ".aadhaar_index_key")
+# Other applications within this window count as concurrent
+CONCURRENT_WINDOW = 30 * 24 * 3600
+
+
+def digits_of(value):
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def format_aadhaar(digits):
+    return f"{digits[0:4]} {digits[4:8]} {digits[8:12]}"
+
+
+def verhoeff_valid(digits):
+    check = 0
+    for i, ch in enumerate(reversed(digits)):
+        check = _VERHOEFF_D[check][_VERHOEFF_P[i % 8][int(ch)]]
+    return check == 0
+
+
+def verhoeff_check_digit(digits):
+    """Digit to append to `digits` so the result passes verhoeff_valid()."""
+    check = 0
+    for i, ch in enumerate(reversed(digits)):
+        check = _VERHOEFF_D[check][_VERHOEFF_P[(i + 1) % 8][int(ch)]]
+    return str(_VERHOEFF_INV[check])
+
+
+def is_valid_aadhaar(value):
+    """12 digits, not starting with 0/1, valid Verhoeff checksum."""
+    digits = digits_of(value)
+    return len(digits) == 12 and digits[0] not in "01" and verhoeff_valid(digits)
+
+
+def corrections(digits, digit_confidences=None, limit=MAX_CORRECTIONS):
+    """
+    Single-digit substitutions that turn an invalid 12-digit number into a valid one,
+    most plausible first. Verhoeff admits exactly one fix per position, so there are
+    at most 12; they are ranked by how often OCR confuses the two digits and by how
+    unsure the engine was about that position. Returns [(digits, score)].
+    """
+    if len(digits) != 12 or verhoeff_valid(digits):
+        return []
+    confidences = digit_confidences or [0.5] * 12
+    ranked = []
+    for pos in range(12):
+        for replacement in "0123456789":
+            if replacement == digits[pos] or (pos == 0 and replacement in "01"):
+                continue
+            candidate = digits[:pos] + replacement + digits[pos + 1:]
+            if verhoeff_valid(candidate):
+                likelihood = _OCR_CONFUSIONS.get(frozenset(digits[pos] + replacement), _OTHER_CONFUSION)
+                ranked.append((candidate, round(likelihood * (1.0 - confidences[pos]), 4)))
+                break
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked[:limit]
+
+
+def best_correction(digits, digit_confidences=None):
+    """
+    The correction to accept as the reading, or None. Verhoeff admits a fix at almost
+    every position, so only the top-ranked one counts, and only when the confusion
+    is likely, OCR was unsure of that digit and no other fix comes close.
+    """
+    ranked = corrections(digits, digit_confidences, limit=2)
+    if not ranked or ranked[0][1] < MIN_CORRECTION_SCORE:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < CORRECTION_MARGIN * ranked[1][1]:
+        return None
+    return ranked[0][0]
+
+
+def _load_key():
+    key = os.getenv("AADHAAR_INDEX_KEY")
+    if key:
+        return key.encode("utf-8")
+    if not os.path.exists(AADHAAR_INDEX_KEY_FILE):
+        # First run without a configured key: create one readable only by this user
+        fd = os.open(AADHAAR_INDEX_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as fh:
+            fh.write(secrets.token_hex(32))
+    with open(AADHAAR_INDEX_KEY_FILE) as fh:
+        return fh.read().strip().encode("utf-8")
+
+
+class AadhaarIndex:
+    """
+    HMAC-SHA256(key, number) -> applications, in SQLite. Lookups are a primary-key
+    probe, so checking for repeat or concurrent applications is O(1).
+    """
+
+    def __init__(self, db_path=AADHAAR_INDEX_DB, key=None):
+        self.db_path = db_path
+        self._key = key or _load_key()
+        self._local = threading.local()
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS aadhaar_index (
+                digest TEXT NOT NULL,
+                application_id TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (digest, application_id)
+            )
+        """)
+        conn.commit()
+
+    def digest(self, aadhaar):
+        return hmac.new(self._key, digits_of(aadhaar).encode("ascii"), hashlib.sha256).hexdigest()
+
+    def register(self, aadhaar, application_id):
+        """
+        Record that `application_id` uses this Aadhaar and report the others that do:
+        {"duplicate", "other_applications", "concurrent_applications", "first_seen"}.
+        """
+        digest = self.digest(aadhaar)
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO aadhaar_index (digest, application_id, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(digest, application_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (digest, application_id, now, now),
+        )
+        conn.commit()
+        others, concurrent, first_seen = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(last_seen >= ?), 0), MIN(first_seen) "
+            "FROM aadhaar_index WHERE digest = ? AND application_id != ?",
+            (now - CONCURRENT_WINDOW, digest, application_id),
+        ).fetchone()
+        return {
+            "duplicate": others > 0,
+            "other_applications": others,
+            "concurrent_applications": concurrent,
+            "first_seen": first_seen,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_aadhaar_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AadhaarIndex()
+    return _index
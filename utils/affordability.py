@@ -0,0 +1,209 @@
+import re
+
+import numpy as np
+
+from utils.lender_catalog import get_catalog
+
+# Vectorised affordability: EMI, FOIR (fixed obligations to income ratio) and the
+# maximum principal over an applicants x products x tenures grid in one pass.
+
+TENURES = np.array([12, 24, 36, 48, 60, 84, 120, 180, 240, 300, 360], dtype=np.float64)
+# FOIR caps by monthly income band (lenders allow a larger share at higher incomes)
+FOIR_BANDS = ((25000, 0.40), (75000, 0.50), (float("inf"), 0.60))
+TOP_OFFERS = 3
+
+# Fallback products when lender_products.csv is missing (annual rate %, limits in INR)
+DEFAULT_PRODUCTS = [
+    {"bank": "State Bank of India", "loan_type": "home", "rate": 8.50, "max_tenure": 360, "min_income": 25000, "processing_fee": 0.0035},
+    {"bank": "HDFC Bank", "loan_type": "home", "rate": 8.75, "max_tenure": 360, "min_income": 25000, "processing_fee": 0.0050},
+    {"bank": "State Bank of India", "loan_type": "personal", "rate": 11.15, "max_tenure": 72, "min_income": 15000, "processing_fee": 0.0150},
+    {"bank": "HDFC Bank", "loan_type": "personal", "rate": 10.90, "max_tenure": 60, "min_income": 25000, "processing_fee": 0.0250},
+    {"bank": "ICICI Bank", "loan_type": "personal", "rate": 10.85, "max_tenure": 72, "min_income": 30000, "processing_fee": 0.0200},
+    {"bank": "Axis Bank", "loan_type": "vehicle", "rate": 9.30, "max_tenure": 84, "min_income": 20000, "processing_fee": 0.0100},
+    {"bank": "State Bank of India", "loan_type": "education", "rate": 9.65, "max_tenure": 180, "min_income": 15000, "processing_fee": 0.0},
+    {"bank": "ICICI Bank", "loan_type": "business", "rate": 14.00, "max_tenure": 60, "min_income": 40000, "processing_fee": 0.0200},
+    {"bank": "Muthoot Finance", "loan_type": "gold", "rate": 12.00, "max_tenure": 36, "min_income": 10000, "processing_fee": 0.0050},
+]
+
+
+def to_amount(value, default=0.0):
+    """Leading number in a free-text answer ("15000", "yes, 12,000/month"); default if none."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(value or ""))
+    return float(match.group(0).replace(",", "")) if match else default
+
+
+def annuity_factor(annual_rate, tenure_months):
+    """Principal repaid per 1 of monthly EMI: (1 - (1 + r)^-n) / r, with r = 0 handled."""
+    r = np.asarray(annual_rate, dtype=np.float64) / 1200.0
+    n = np.asarray(tenure_months, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (1.0 - (1.0 + r) ** -n) / r
+    return np.where(r == 0, n, factor)
+
+
+def emi(principal, annual_rate, tenure_months):
+    return np.asarray(principal, dtype=np.float64) / annuity_factor(annual_rate, tenure_months)
+
+
+def foir_limit(income):
+    income = np.asarray(income, dtype=np.float64)
+    bounds = np.array([b for b, _ in FOIR_BANDS[:-1]])
+    caps = np.array([c for _, c in FOIR_BANDS])
+    return caps[np.searchsorted(bounds, income, side="right")]
+
+
+def product_arrays(products):
+    """Column arrays for a list of product dicts (done once, reused for every applicant)."""
+    return {
+        "rate": np.array([p["rate"] for p in products], dtype=np.float64),
+        "max_tenure": np.array([p["max_tenure"] for p in products], dtype=np.float64),
+        "min_income": np.array([p["min_income"] for p in products], dtype=np.float64),
+        "processing_fee": np.array([p.get("processing_fee", 0.0) for p in products], dtype=np.float64),
+    }
+
+
+def offer_grid(income, existing_emi, amount, tenure, products, tenures=TENURES):
+    """
+    Affordability for many applicants at once. Inputs are 1-D arrays (one entry per
+    applicant); `products` comes from product_arrays(). Every product is priced at the
+    requested tenure, capped by its max_tenure (a requested tenure of 0 means the
+    longest each product allows), and eligibility, the best offer and the max
+    principal all use that same tenure. Returns per-applicant arrays: eligible,
+    emi/product/tenure of the cheapest feasible offer, the max principal, FOIR before
+    and after the loan, the (A, P) offer tenure and cost at the requested tenure, and
+    the (A, P, T) cost of shorter grid tenures, which are only alternatives.
+    """
+    income = np.asarray(income, dtype=np.float64)
+    existing_emi = np.asarray(existing_emi, dtype=np.float64)
+    amount = np.asarray(amount, dtype=np.float64)
+    tenure = np.asarray(tenure, dtype=np.float64)
+
+    cap = foir_limit(income)
+    budget = np.maximum(income * cap - existing_emi, 0.0)                     # (A,)
+    income_ok = income[:, None] >= products["min_income"][None, :]             # (A, P)
+    fee = products["processing_fee"]
+
+    # The requested tenure, which need not be on the grid
+    wanted = np.where(tenure > 0, tenure, tenures[-1])
+    span = np.minimum(wanted[:, None], products["max_tenure"][None, :])        # (A, P)
+    span_factor = annuity_factor(products["rate"][None, :], span)              # (A, P)
+    span_emi = amount[:, None] / span_factor
+    # Lowest total outgo (interest + processing fee) among products feasible at that tenure
+    offer_cost = span_emi * span - amount[:, None] + amount[:, None] * fee[None, :]
+    offer_cost = np.where(income_ok & (span_emi <= budget[:, None]), offer_cost, np.inf)
+    best_product = offer_cost.argmin(axis=1)
+    rows = np.arange(len(income))
+    eligible = np.isfinite(offer_cost[rows, best_product])
+    # Largest loan any product the applicant qualifies for would grant at the same tenure
+    max_principal = np.where(income_ok, budget[:, None] * span_factor, 0.0).max(axis=1)
+
+    # Alternatives: grid tenures shorter than the offer tenure that still fit the budget
+    factor = annuity_factor(products["rate"][:, None], tenures[None, :])       # (P, T)
+    grid_emi = amount[:, None, None] / factor[None, :, :]                      # (A, P, T)
+    shorter = (tenures[None, None, :] < span[:, :, None]) & income_ok[:, :, None]
+    cost = grid_emi * tenures[None, None, :] - amount[:, None, None]
+    cost += amount[:, None, None] * fee[None, :, None]
+    cost = np.where(shorter & (grid_emi <= budget[:, None, None]), cost, np.inf)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_foir = np.where(income > 0, existing_emi / income, np.inf)
+        best_emi = np.where(eligible, span_emi[rows, best_product], np.nan)
+        new_foir = np.where(income > 0, (existing_emi + best_emi) / income, np.inf)
+    return {
+        "eligible": eligible,
+        "foir_limit": cap,
+        "emi_budget": budget,
+        "current_foir": current_foir,
+        "foir_with_loan": new_foir,
+        "best_emi": best_emi,
+        "best_product": best_product,
+        "best_tenure": span[rows, best_product],
+        "max_principal": max_principal,
+        "offer_tenure": span,
+        "offer_cost": offer_cost,
+        "cost": cost,
+    }
+
+
+def assess_affordability(data, financials=None, products=None, top=TOP_OFFERS):
+    """
+    Affordability for one chatbot application. Document figures win over declared ones:
+    the verified net salary replaces the declared income, and the larger of declared
+    and statement EMIs is used. Without an explicit product list, candidates come from
+    the lender catalogue (salary bank first, then the cheapest of the requested type),
+    or from DEFAULT_PRODUCTS of that type when the catalogue file is missing. A loan
+    type no product covers gets no offers and has_product False.
+    """
+    financials = financials or {}
+    income = financials.get("net_salary") or to_amount(data.get("income"))
+    if str(data.get("co_applicant", "")).lower() == "yes":
+        income += to_amount(data.get("co_income"))
+    existing = max(to_amount(data.get("existing_emis")), financials.get("monthly_emi") or 0.0)
+    amount = to_amount(data.get("loan_amnt"))
+    tenure = to_amount(data.get("loan_tenure"))
+
+    if products is None:
+        catalog = get_catalog()
+        if catalog is not None:
+            products = catalog.candidates(data.get("loan_type"), data.get("bank_name"), income=income)
+            if not products:
+                # Still price the type's products so a low income is reported as such
+                products = catalog.candidates(data.get("loan_type"), data.get("bank_name"))
+        else:
+            loan_type = str(data.get("loan_type", "")).strip().lower()
+            products = [p for p in DEFAULT_PRODUCTS if loan_type and p["loan_type"] in loan_type]
+    if not products:
+        budget = max(income * float(foir_limit(income)) - existing, 0.0)
+        return {
+            "income": income,
+            "existing_emi": existing,
+            "eligible": False,
+            "has_product": False,
+            "meets_min_income": False,
+            "foir_limit": float(foir_limit(income)),
+            "current_foir": existing / income if income > 0 else float("inf"),
+            "emi_budget": round(budget, 2),
+            "max_principal": 0.0,
+            "offers": [],
+        }
+
+    arrays = product_arrays(products)
+    grid = offer_grid([income], [existing], [amount], [tenure], arrays)
+    # One offer per product at the requested tenure, best products first; feasible
+    # shorter tenures (less interest, higher EMI) are listed with it, longest first
+    offer_cost = grid["offer_cost"][0]
+    offers = []
+    ranked = [p for p in np.argsort(offer_cost, kind="stable") if np.isfinite(offer_cost[p])] if amount > 0 else []
+    shown = ranked[:top]
+    # Always show the applicant's own bank when it can lend
+    own = [p for p in ranked[top:] if products[p].get("salary_bank")]
+    for p in shown + own[:1]:
+        months = int(grid["offer_tenure"][0, p])
+        shorter = np.flatnonzero(np.isfinite(grid["cost"][0, p]))[::-1]
+        offers.append({
+            "bank": products[p]["bank"],
+            "loan_type": products[p]["loan_type"],
+            "rate": products[p]["rate"],
+            "tenure": months,
+            "emi": round(float(emi(amount, products[p]["rate"], months)), 2),
+            "product": products[p].get("product", ""),
+            "salary_bank": products[p].get("salary_bank", False),
+            "alternatives": [
+                {"tenure": int(TENURES[t]), "emi": round(float(emi(amount, products[p]["rate"], TENURES[t])), 2)}
+                for t in shorter
+            ],
+        })
+    return {
+        "income": income,
+        "existing_emi": existing,
+        "eligible": bool(grid["eligible"][0]) and amount > 0,
+        "has_product": True,
+        "meets_min_income": bool(income >= arrays["min_income"].min()),
+        "foir_limit": float(grid["foir_limit"][0]),
+        "current_foir": float(grid["current_foir"][0]),
+        "emi_budget": round(float(grid["emi_budget"][0]), 2),
+        "max_principal": round(float(grid["max_principal"][0]), 2),
+        "offers": offers,
+    }
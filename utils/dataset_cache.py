@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Columnar cache of parsed datasets: one .npy file per column plus a manifest
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", ".dataset_cache")
+MANIFEST_NAME = "manifest.json"
+_HASH_CHUNK = 1024 * 1024
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(source, cache_dir):
+    source = os.path.abspath(source)
+    tag = hashlib.sha1(source.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(cache_dir, f"{os.path.basename(source)}-{tag}")
+
+
+def _read_source(source):
+    """Parse the original xlsx/csv file (the slow path)."""
+    if source.lower().endswith((".xlsx", ".xlsm", ".xls")):
+        return pd.read_excel(source)
+    return pd.read_csv(source)
+
+
+def _write_cache(df, target, manifest):
+    tmp = target + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        entry = {"name": str(col), "file": f"{i:03d}.npy"}
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy()
+            entry["kind"] = "numeric"
+        else:
+            # Fixed-width unicode keeps string columns memory-mappable
+            nulls = series.isna().to_numpy()
+            values = series.fillna("").astype(str).to_numpy().astype(str)
+            entry["kind"] = "string"
+            if nulls.any():
+                entry["null_file"] = f"{i:03d}.null.npy"
+                np.save(os.path.join(tmp, entry["null_file"]), nulls)
+        np.save(os.path.join(tmp, entry["file"]), values)
+        entry["dtype"] = str(values.dtype)
+        columns.append(entry)
+
+    manifest = dict(manifest, columns=columns, rows=len(df))
+    with open(os.path.join(tmp, MANIFEST_NAME), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return manifest
+
+
+def _read_manifest(target):
+    try:
+        with open(os.path.join(target, MANIFEST_NAME)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_cache(source, cache_dir=CACHE_DIR):
+    """
+    Make sure an up-to-date columnar cache exists for `source` and return its
+    directory and manifest. The cache is reused when the source mtime/size are
+    unchanged; if only the mtime changed, the content hash decides.
+    """
+    stat = os.stat(source)  # raises FileNotFoundError like pd.read_excel would
+    target = _cache_path(source, cache_dir)
+    manifest = _read_manifest(target)
+
+    if manifest and manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return target, manifest
+
+    sha256 = _file_sha256(source)
+    if manifest and manifest["sha256"] == sha256:
+        # Touched but not modified: refresh the stamp instead of re-parsing
+        manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        with open(os.path.join(target, MANIFEST_NAME), "w") as fh:
+            json.dump(manifest, fh, indent=2)
+        return target, manifest
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = _write_cache(_read_source(source), target, {
+        "source": os.path.abspath(source),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+    })
+    return target, manifest
+
+
+def load_columns(source, cache_dir=CACHE_DIR, mmap=True):
+    """Return {column: ndarray} straight from the cache, memory-mapped read-only by default."""
+    target, manifest = ensure_cache(source, cache_dir)
+    mode = "r" if mmap else None
+    columns = {}
+    for entry in manifest["columns"]:
+        columns[entry["name"]] = np.load(os.path.join(target, entry["file"]), mmap_mode=mode)
+    return columns
+
+
+def _frame(target, manifest, mode, start=0, stop=None):
+    data = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(target, entry["file"]), mmap_mode=mode)[start:stop]
+        if entry["kind"] == "string":
+            values = values.astype(object)
+            if "null_file" in entry:
+                nulls = np.load(os.path.join(target, entry["null_file"]), mmap_mode=mode)[start:stop]
+                values[nulls] = None
+        data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_dataset(source, cache_dir=CACHE_DIR, mmap=True):
+    """
+    Drop-in replacement for pd.read_excel/pd.read_csv backed by the columnar cache.
+    Numeric columns are wrapped without copying; string columns keep their missing values.
+    """
+    target, manifest = ensure_cache(source, cache_dir)
+    return _frame(target, manifest, "r" if mmap else None)
+
+
+def iter_chunks(source, chunksize, cache_dir=CACHE_DIR):
+    """Yield row-range DataFrames sliced from the memory-mapped cache."""
+    target, manifest = ensure_cache(source, cache_dir)
+    for start in range(0, manifest["rows"], chunksize):
+        yield _frame(target, manifest, "r", start, start + chunksize)
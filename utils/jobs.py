@@ -0,0 +1,266 @@
+import importlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# SQLite-backed job queue (in the app's database.db) drained by a pool of worker processes
+JOBS_DB = os.getenv("JOBS_DB", "database.db")
+MAX_QUEUE_DEPTH = int(os.getenv("JOB_MAX_QUEUE_DEPTH", "200"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "120"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF = 5.0
+POLL_INTERVAL = 0.5
+# Finished (done / failed) jobs are deleted this long after they were created
+JOB_RETENTION = float(os.getenv("JOB_RETENTION_DAYS", "7")) * 86400
+PURGE_INTERVAL = 3600.0
+
+
+class QueueFull(RuntimeError):
+    """Raised by enqueue() when a job kind is at its depth budget (back-pressure)."""
+
+
+class JobQueue:
+    def __init__(self, db_path=JOBS_DB, max_depth=MAX_QUEUE_DEPTH, timeout=JOB_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; writes take the lock explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                lease_until REAL,
+                priority INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Tables created before job priorities existed
+        if "priority" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, available_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs(kind, status)")
+
+    def depth(self):
+        """Jobs waiting or running."""
+        row = self._conn().execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        return row[0]
+
+    def enqueue(self, kind, payload, priority=0, max_depth=None):
+        """
+        Add a job. Each kind has its own depth budget (max_depth, default the queue's),
+        so bulk background work cannot fill the queue for interactive jobs; workers
+        take higher-priority jobs first.
+        """
+        max_depth = self.max_depth if max_depth is None else max_depth
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE kind = ? AND status IN ('queued', 'running')", (kind,)
+            ).fetchone()[0]
+            if depth >= max_depth:
+                raise QueueFull(f"Job queue is full ({depth} {kind} jobs pending)")
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, available_at, priority) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now, priority),
+            )
+            conn.execute("COMMIT")
+            return job_id
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _expire_leases(self, conn, now):
+        """Running jobs past their lease timed out: retry them or give up."""
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'timed out', worker = NULL "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, self.max_attempts),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', error = 'timed out', worker = NULL, available_at = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now, now),
+        )
+
+    def claim(self, worker):
+        """Atomically take the oldest runnable job, or return None."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? WHERE id = ?",
+                    (worker, now + self.timeout, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        return job
+
+    # complete() and fail() only apply while `worker` still holds the lease: a worker whose
+    # lease expired must not overwrite a job that was re-queued or claimed by another one
+
+    def complete(self, job_id, result, worker):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, worker = NULL "
+            "WHERE id = ? AND status = 'running' AND worker = ?",
+            (json.dumps(result), job_id, worker),
+        )
+
+    def fail(self, job_id, error, worker):
+        """Record a failure; the job is retried with backoff until MAX_ATTEMPTS."""
+        self._conn().execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, "
+            "available_at = CASE WHEN attempts < ? THEN ? + ? * attempts ELSE available_at END, "
+            "error = ?, worker = NULL WHERE id = ? AND status = 'running' AND worker = ?",
+            (self.max_attempts, self.max_attempts, time.time(), RETRY_BACKOFF, error, job_id, worker),
+        )
+
+    def purge(self, retention=JOB_RETENTION):
+        """Delete finished jobs older than `retention` seconds. Returns the number removed."""
+        cursor = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND created_at < ?", (time.time() - retention,)
+        )
+        return cursor.rowcount
+
+    def get(self, job_id):
+        row = self._conn().execute(
+            "SELECT id, kind, status, result, error, attempts, created_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def overdue_workers(self):
+        """Worker ids still holding a job whose lease has expired."""
+        rows = self._conn().execute(
+            "SELECT DISTINCT worker FROM jobs WHERE status = 'running' AND lease_until < ? AND worker IS NOT NULL",
+            (time.time(),),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+
+def _resolve(handler_path):
+    module_name, func_name = handler_path.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def worker_loop(handlers, db_path=JOBS_DB, timeout=JOB_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+    """
+    Body of one worker process. `handlers` maps job kind -> "module:function",
+    resolved inside the process so it works with both fork and spawn.
+    """
+    queue = JobQueue(db_path, timeout=timeout, max_attempts=max_attempts)
+    funcs = {kind: _resolve(path) for kind, path in handlers.items()}
+    worker = str(os.getpid())
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        try:
+            result = funcs[job["kind"]](job["payload"])
+            queue.complete(job["id"], result, worker)
+        except Exception as e:
+            print(f"Job {job['id']} failed (attempt {job['attempts']}): {e}")
+            queue.fail(job["id"], str(e), worker)
+
+
+class WorkerPool:
+    """
+    Supervises `processes` worker processes. A worker that overruns the job
+    timeout is killed and replaced; its job is then retried or marked failed.
+    """
+
+    def __init__(self, handlers, processes=2, db_path=JOBS_DB, timeout=JOB_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.handlers = handlers
+        self.processes = processes
+        self.db_path = db_path
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._workers = {}
+        self._last_purge = 0.0
+
+    def queue(self):
+        return JobQueue(self.db_path, timeout=self.timeout, max_attempts=self.max_attempts)
+
+    def _spawn(self):
+        proc = multiprocessing.Process(
+            target=worker_loop,
+            args=(self.handlers, self.db_path, self.timeout, self.max_attempts),
+            daemon=True,
+        )
+        proc.start()
+        self._workers[str(proc.pid)] = proc
+
+    def supervise_once(self, queue):
+        for pid in queue.overdue_workers():
+            proc = self._workers.get(pid)
+            if proc is not None:
+                print(f"Worker {pid} exceeded the job timeout; restarting it")
+                proc.terminate()
+                proc.join(5)
+        for pid, proc in list(self._workers.items()):
+            if not proc.is_alive():
+                del self._workers[pid]
+        while len(self._workers) < self.processes:
+            self._spawn()
+        if time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            queue.purge()
+
+    def run(self, interval=1.0):
+        queue = self.queue()
+        while True:
+            self.supervise_once(queue)
+            time.sleep(interval)
+
+    def start_background(self, interval=1.0):
+        """Run the supervisor on a daemon thread (used when app.py starts its own pool)."""
+        thread = threading.Thread(target=self.run, args=(interval,), daemon=True)
+        thread.start()
+        return thread
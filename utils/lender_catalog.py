@@ -0,0 +1,193 @@
+import csv
+import difflib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+try:
+    # Optional fuzzy matching if available
+    from rapidfuzz import fuzz, process
+except Exception:  # pragma: no cover
+    fuzz = process = None
+
+# Lender products (rate, limits, fees) read from a local CSV and indexed by
+# (loan_type, bank) with rate-sorted arrays. The file is re-read when it changes.
+LENDER_CATALOG_PATH = os.getenv("LENDER_CATALOG_PATH", "lender_products.csv")
+RELOAD_CHECK_INTERVAL = 1.0
+MATCH_CUTOFF = 80
+CANDIDATE_LIMIT = 20
+_RESOLVED_CACHE_ITEMS = 4096
+
+LOAN_TYPE_SYNONYMS = {
+    "home": "home", "house": "home", "housing": "home", "mortgage": "home", "property": "home",
+    "personal": "personal", "consumer": "personal",
+    "vehicle": "vehicle", "car": "vehicle", "auto": "vehicle", "bike": "vehicle", "wheeler": "vehicle",
+    "education": "education", "edu": "education", "student": "education", "study": "education",
+    "business": "business", "msme": "business", "sme": "business",
+    "gold": "gold",
+}
+_NAME_STOPWORDS = {"bank", "ltd", "limited", "the", "of", "and", "co", "corp", "corporation"}
+_MINOR_WORDS = {"of", "the", "and", "ltd", "limited"}
+
+
+def normalize_name(name):
+    """'State Bank of India Ltd.' -> 'state india'; used as the exact-match key."""
+    words = re.sub(r"[^a-z0-9 ]+", " ", str(name).lower()).split()
+    return " ".join(w for w in words if w not in _NAME_STOPWORDS)
+
+
+def _acronyms(bank):
+    """The usual short forms: 'State Bank of India' -> sbi, 'Bank of Baroda' -> bob."""
+    words = re.sub(r"[^a-z0-9 ]+", " ", bank.lower()).split()
+    acronyms = {"".join(w[0] for w in words), "".join(w[0] for w in words if w not in _MINOR_WORDS)}
+    return {a for a in acronyms if len(a) >= 2}
+
+
+def _to_product(row):
+    return {
+        "bank": row["bank"].strip(),
+        "loan_type": row["loan_type"].strip().lower(),
+        "product": (row.get("product") or "").strip(),
+        "rate": float(row["rate"]),
+        "max_tenure": int(float(row["max_tenure"])),
+        "min_income": float(row["min_income"]),
+        "processing_fee": float(row.get("processing_fee") or 0.0),
+    }
+
+
+class LenderCatalog:
+    """
+    Immutable snapshot of the product file. Every (loan_type, bank) key and every
+    loan_type on its own maps to product positions sorted by rate, with the rates
+    alongside, so "products up to rate r" is a searchsorted slice.
+    """
+
+    def __init__(self, products, mtime_ns=None):
+        self.products = products
+        self.mtime_ns = mtime_ns
+        self.banks = sorted({p["bank"] for p in products})
+        self.loan_types = sorted({p["loan_type"] for p in products})
+        # Exact keys: normalised names and acronyms; fuzzy matching only runs over full names
+        self._bank_names = {normalize_name(bank): bank for bank in self.banks}
+        self._bank_aliases = dict(self._bank_names)
+        for bank in self.banks:
+            for acronym in _acronyms(bank):
+                self._bank_aliases.setdefault(acronym, bank)
+        self._resolved = {}
+
+        self.rate = np.array([p["rate"] for p in products], dtype=np.float64)
+        self.max_tenure = np.array([p["max_tenure"] for p in products], dtype=np.float64)
+        self.min_income = np.array([p["min_income"] for p in products], dtype=np.float64)
+
+        groups = {}
+        for i, p in enumerate(products):
+            groups.setdefault((p["loan_type"], p["bank"]), []).append(i)
+            groups.setdefault((p["loan_type"], None), []).append(i)
+        self._index = {}
+        for key, positions in groups.items():
+            positions = np.asarray(positions, dtype=np.int64)
+            order = positions[np.argsort(self.rate[positions], kind="stable")]
+            self._index[key] = (order, self.rate[order])
+
+    @classmethod
+    def load(cls, path=LENDER_CATALOG_PATH):
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, newline="", encoding="utf-8") as fh:
+            products = [_to_product(row) for row in csv.DictReader(fh)]
+        return cls(products, mtime_ns)
+
+    def resolve_bank(self, text):
+        """Canonical bank name for free text ('sbi', 'hdfc bank ltd', 'icici'), or None."""
+        if not text:
+            return None
+        key = normalize_name(text)
+        if key in self._resolved:
+            return self._resolved[key]
+        compact = re.sub(r"[^a-z0-9]+", "", str(text).lower())
+        bank = self._bank_aliases.get(key) or self._bank_aliases.get(compact)
+        if bank is None and key:
+            choices = list(self._bank_names)
+            if process is not None:
+                match = process.extractOne(key, choices, scorer=fuzz.WRatio, score_cutoff=MATCH_CUTOFF)
+                bank = self._bank_names[match[0]] if match else None
+            else:
+                close = difflib.get_close_matches(key, choices, n=1, cutoff=MATCH_CUTOFF / 100)
+                bank = self._bank_names[close[0]] if close else None
+        if len(self._resolved) >= _RESOLVED_CACHE_ITEMS:
+            self._resolved.clear()
+        self._resolved[key] = bank
+        return bank
+
+    def resolve_loan_type(self, text):
+        """'Home loan', 'car', 'housing' -> catalogue loan type, or None."""
+        words = re.sub(r"[^a-z ]+", " ", str(text or "").lower()).split()
+        for word in words:
+            if word in LOAN_TYPE_SYNONYMS and LOAN_TYPE_SYNONYMS[word] in self.loan_types:
+                return LOAN_TYPE_SYNONYMS[word]
+        for word in words:
+            close = difflib.get_close_matches(word, list(LOAN_TYPE_SYNONYMS), n=1, cutoff=0.8)
+            if close and LOAN_TYPE_SYNONYMS[close[0]] in self.loan_types:
+                return LOAN_TYPE_SYNONYMS[close[0]]
+        return None
+
+    def lookup(self, loan_type, bank=None, max_rate=None):
+        """Product positions for (loan_type, bank), cheapest rate first, optionally capped at max_rate."""
+        entry = self._index.get((loan_type, bank))
+        if entry is None:
+            return np.empty(0, dtype=np.int64)
+        order, rates = entry
+        if max_rate is not None:
+            order = order[:np.searchsorted(rates, max_rate, side="right")]
+        return order
+
+    def candidates(self, loan_type, bank=None, income=None, limit=CANDIDATE_LIMIT):
+        """
+        Products worth pricing for one applicant: the salary-account bank's own
+        products, then the lowest-rate products of that type from any bank, keeping
+        only those whose minimum income the applicant meets.
+        """
+        loan_type = self.resolve_loan_type(loan_type)
+        if loan_type is None:
+            return []
+        bank = self.resolve_bank(bank)
+        ranked = self.lookup(loan_type)
+        if bank is not None:
+            own = self.lookup(loan_type, bank)
+            ranked = np.concatenate([own, ranked[~np.isin(ranked, own)]])
+        keep = np.ones(len(ranked), dtype=bool)
+        if income is not None:
+            keep &= self.min_income[ranked] <= income
+        return [dict(self.products[i], salary_bank=self.products[i]["bank"] == bank) for i in ranked[keep][:limit]]
+
+
+_catalog = None
+_catalog_checked = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(path=LENDER_CATALOG_PATH):
+    """
+    Current catalogue, re-read when the file's mtime changes (checked at most once
+    per RELOAD_CHECK_INTERVAL). Returns None when the file does not exist.
+    """
+    global _catalog, _catalog_checked
+    now = time.monotonic()
+    if _catalog is not None and now - _catalog_checked < RELOAD_CHECK_INTERVAL:
+        return _catalog
+    with _catalog_lock:
+        _catalog_checked = now
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            _catalog = None
+            return None
+        if _catalog is None or _catalog.mtime_ns != mtime_ns:
+            try:
+                _catalog = LenderCatalog.load(path)
+            except (OSError, KeyError, ValueError) as e:
+                # Keep serving the previous snapshot if a bad edit lands mid-write
+                print(f"Could not load lender catalogue {path}: {e}")
+        return _catalog
@@ -0,0 +1,391 @@
+import atexit
+import bisect
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# In-process latency histograms and counters, exported in Prometheus text format.
+# Histograms use fixed buckets so every process's numbers can be added together:
+# each process (Flask and job workers alike) snapshots its totals to SQLite every
+# few seconds and /metrics sums the snapshots. METRICS_ENABLED=0 turns every call
+# into an early return.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_DB = os.getenv("METRICS_DB", "database.db")
+METRICS_FLUSH_INTERVAL = 5.0
+# Snapshots of processes that stopped reporting are dropped after a day
+METRICS_RETENTION = 24 * 3600
+# Opt-in: sample the stacks of requests slower than this many ms into PROFILE_DIR
+SLOW_REQUEST_PROFILE_MS = float(os.getenv("SLOW_REQUEST_PROFILE_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# 0.5 ms to ~90 s in half-octave steps
+BUCKETS = tuple(0.0005 * 2 ** (k / 2) for k in range(36))
+QUANTILES = (0.5, 0.95, 0.99)
+
+_PROCESS = uuid.uuid4().hex
+_lock = threading.Lock()
+_histograms = {}
+_counters = Counter()
+_collectors = []
+_gauges = []
+_last_flush = 0.0
+_local = threading.local()
+
+
+def _after_fork():
+    # A forked child (job worker, preloaded gunicorn worker) starts its own snapshot:
+    # the parent's ID, totals and SQLite connection are not its to report
+    global _PROCESS, _lock, _histograms, _counters, _last_flush, _local
+    _PROCESS = uuid.uuid4().hex
+    _lock = threading.Lock()
+    _histograms = {}
+    _counters = Counter()
+    _last_flush = 0.0
+    _local = threading.local()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """Add one duration (seconds) to the histogram `name` with these labels."""
+    if not METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        hist[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+        hist[1] += seconds
+    _maybe_flush()
+
+
+def inc(name, amount=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[_key(name, labels)] += amount
+    _maybe_flush()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            inc(f"{self.name.removesuffix('_seconds')}_errors_total", **self.labels)
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **labels):
+    """`with span("assessment_stage_seconds", stage="model"):` times the block (and counts errors)."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Span(name, labels)
+
+
+def observe_timings(name, timings, **labels):
+    """Record the '<stage>_ms' entries of a timings dict (as built by ocr_utils) under stage labels."""
+    if not METRICS_ENABLED:
+        return
+    for stage, ms in timings.items():
+        if stage.endswith("_ms"):
+            observe(name, ms / 1000.0, stage=stage[:-3], **labels)
+
+
+def register_collector(fn):
+    """fn() -> [(name, labels, value)]: cumulative counters (e.g. cache hits), summed over processes."""
+    _collectors.append(fn)
+
+
+def register_gauge(fn):
+    """fn() -> [(name, labels, value)]: point-in-time values (e.g. queue depth), read at scrape time."""
+    _gauges.append(fn)
+
+
+def cache_counters(cache_name, cache):
+    """Collector rows for an object with `hits` and `misses` attributes."""
+    if cache is None:
+        return []
+    return [("cache_hits_total", {"cache": cache_name}, cache.hits),
+            ("cache_misses_total", {"cache": cache_name}, cache.misses)]
+
+
+def _collect(fns):
+    rows = Counter()
+    for fn in fns:
+        try:
+            for name, labels, value in fn():
+                rows[_key(name, labels)] += value
+        except Exception as e:
+            print(f"Metrics collector failed: {e}")
+    return rows
+
+
+def _snapshot():
+    with _lock:
+        histograms = {key: [list(counts), total] for key, (counts, total) in _histograms.items()}
+        counters = Counter(_counters)
+    counters.update(_collect(_collectors))
+    return histograms, counters
+
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(METRICS_DB, timeout=10)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metrics_snapshots (
+                process TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def flush():
+    """Write this process's totals so other processes' /metrics include them."""
+    global _last_flush
+    if not METRICS_ENABLED:
+        return
+    _last_flush = time.monotonic()
+    histograms, counters = _snapshot()
+    data = {
+        "histograms": [[name, labels, counts, total] for (name, labels), (counts, total) in histograms.items()],
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+    }
+    try:
+        conn = _conn()
+        conn.execute("INSERT OR REPLACE INTO metrics_snapshots (process, updated_at, data) VALUES (?, ?, ?)",
+                     (_PROCESS, time.time(), json.dumps(data)))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not write metrics snapshot: {e}")
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+atexit.register(flush)
+
+
+def _merged():
+    """This process's live totals plus the latest snapshot of every other process."""
+    histograms, counters = _snapshot()
+    rows = _conn().execute(
+        "SELECT data FROM metrics_snapshots WHERE process != ? AND updated_at >= ?",
+        (_PROCESS, time.time() - METRICS_RETENTION),
+    ).fetchall()
+    for (data,) in rows:
+        data = json.loads(data)
+        for name, labels, counts, total in data["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            hist = histograms.setdefault(key, [[0] * len(counts), 0.0])
+            hist[0] = [a + b for a, b in zip(hist[0], counts)]
+            hist[1] += total
+        for name, labels, value in data["counters"]:
+            counters[(name, tuple(tuple(pair) for pair in labels))] += value
+    return histograms, counters
+
+
+def quantile(counts, q):
+    """Estimate a quantile from bucket counts, interpolating linearly inside the bucket."""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank, seen = q * total, 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return BUCKETS[-1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, **extra):
+    pairs = list(pairs) + sorted(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    histograms, counters = _merged()
+    out = []
+    for name in sorted({n for n, _ in histograms}):
+        metric = _metric_name(name)
+        out.append(f"# TYPE {metric} histogram")
+        quantile_lines = []
+        for (n, labels), (counts, total) in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, counts):
+                cumulative += count
+                out.append(f"{metric}_bucket{_labels(labels, le=f'{bound:.6g}')} {cumulative}")
+            cumulative += counts[-1]
+            out.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {cumulative}")
+            out.append(f"{metric}_sum{_labels(labels)} {total:.6f}")
+            out.append(f"{metric}_count{_labels(labels)} {cumulative}")
+            for q in QUANTILES:
+                quantile_lines.append(f"{metric}_quantile{_labels(labels, quantile=q)} {quantile(counts, q):.6f}")
+        out.append(f"# TYPE {metric}_quantile gauge")
+        out.extend(quantile_lines)
+    for name in sorted({n for n, _ in counters}):
+        metric = _metric_name(name)
+        out.append(f"# TYPE {metric} counter")
+        out.extend(f"{metric}{_labels(labels)} {value}" for (n, labels), value in sorted(counters.items()) if n == name)
+    # Hit ratio per cache from the merged hit/miss counters
+    ratios = []
+    for (name, labels), hits in sorted(counters.items()):
+        if name == "cache_hits_total":
+            misses = counters.get(("cache_misses_total", labels), 0)
+            ratios.append(f"cache_hit_ratio{_labels(labels)} {hits / (hits + misses) if hits + misses else 0.0:.4f}")
+    if ratios:
+        out.append("# TYPE cache_hit_ratio gauge")
+        out.extend(ratios)
+    gauges = _collect(_gauges)
+    for name in sorted({n for n, _ in gauges}):
+        metric = _metric_name(name)
+        out.append(f"# TYPE {metric} gauge")
+        out.extend(f"{metric}{_labels(labels)} {value}" for (n, labels), value in sorted(gauges.items()) if n == name)
+    return "\n".join(out) + "\n"
+
+
+class SlowRequestProfiler:
+    """
+    Stack sampler for slow requests. While a request runs, a background thread
+    samples its stack every PROFILE_INTERVAL_MS; if the request ends up slower than
+    the threshold, the samples are written as folded stacks (flamegraph.pl /
+    speedscope input) to PROFILE_DIR. Only started when SLOW_REQUEST_PROFILE_MS > 0.
+    """
+
+    def __init__(self, threshold_ms=SLOW_REQUEST_PROFILE_MS, interval_ms=PROFILE_INTERVAL_MS, out_dir=PROFILE_DIR):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.out_dir = out_dir
+        self._active = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack:
+                    samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._ensure_thread()
+        self._active[threading.get_ident()] = Counter()
+
+    def discard(self):
+        self._active.pop(threading.get_ident(), None)
+
+    def stop(self, elapsed, label):
+        samples = self._active.pop(threading.get_ident(), None)
+        if not samples or elapsed < self.threshold:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = re.sub(r"[^a-zA-Z0-9]+", "_", label).strip("_") or "request"
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{elapsed * 1000:.0f}ms.folded")
+        with open(path, "w") as fh:
+            fh.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        print(f"Slow request {label} took {elapsed * 1000:.0f} ms; profile written to {path}")
+        return path
+
+
+def init_app(app):
+    """Time every request by route, method and status (and profile slow ones if enabled)."""
+    if not METRICS_ENABLED:
+        return
+    from flask import g, request
+
+    profiler = SlowRequestProfiler() if SLOW_REQUEST_PROFILE_MS > 0 else None
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        if profiler is not None:
+            profiler.start()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            observe("http_request_duration_seconds", elapsed, route=route, method=request.method,
+                    status=response.status_code)
+            if profiler is not None:
+                profiler.stop(elapsed, f"{request.method} {route}")
+        return response
+
+    @app.teardown_request
+    def _count_exception(exc):
+        if profiler is not None:
+            profiler.discard()
+        if exc is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            inc("http_request_exceptions_total", route=route, exception=type(exc).__name__)
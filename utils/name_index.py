@@ -0,0 +1,276 @@
+import csv
+import difflib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+try:
+    # Optional fast fuzzy scoring if available
+    from rapidfuzz import fuzz
+except Exception:  # pragma: no cover
+    fuzz = None
+
+# Name screening: every applicant name is indexed by character trigrams, so a new
+# name is compared only with names sharing enough trigrams with it instead of the
+# whole registry. Prior applicants live in SQLite; the watchlist is a local CSV.
+NAME_INDEX_DB = os.getenv("NAME_INDEX_DB", "database.db")
+WATCHLIST_PATH = os.getenv("WATCHLIST_PATH", "watchlist.csv")
+MATCH_THRESHOLD = 85
+# Fraction of the query's trigrams a candidate must share before it is scored
+MIN_GRAM_OVERLAP = 0.4
+MAX_CANDIDATES = 2000
+RELOAD_CHECK_INTERVAL = 1.0
+
+_HONORIFICS = {"mr", "mrs", "ms", "miss", "dr", "shri", "sri", "smt", "kumari"}
+_NON_ALPHA_RE = re.compile(r"[^a-z\s]+")
+
+
+def normalize_name(name):
+    """'Dr. RAVI  Kumar' -> 'ravi kumar'"""
+    words = _NON_ALPHA_RE.sub(" ", str(name or "").lower()).split()
+    return " ".join(w for w in words if w not in _HONORIFICS)
+
+
+def name_grams(normalized):
+    """Distinct trigrams of each word padded with '$', so word order does not matter."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"${word}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """
+    0-100 similarity of two normalised names: the better of a plain and a word-sorted
+    comparison, so reordered names match and a typo in a first letter (which changes
+    the sort order) still does. Not token_set: a shared surname alone should not score 100.
+    """
+    if fuzz is not None:
+        return max(fuzz.ratio(a, b), fuzz.token_sort_ratio(a, b))
+    sort = lambda n: " ".join(sorted(n.split()))  # noqa: E731
+    return 100.0 * max(difflib.SequenceMatcher(None, a, b).ratio(),
+                       difflib.SequenceMatcher(None, sort(a), sort(b)).ratio())
+
+
+class _Postings:
+    """Growable int array (doubling capacity) so appends stay O(1) and reads need no copy."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self):
+        self.data = np.empty(4, dtype=np.int64)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, 2 * len(self.data))
+        self.data[self.size] = value
+        self.size += 1
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class NameIndex:
+    """
+    In-memory trigram inverted index over (key, name, source) entries. A search
+    counts shared trigrams per entry with one bincount over the query's postings,
+    keeps the best-overlapping candidates and scores only those.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.names = []
+        self.normalized = []
+        self.sources = []
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, name, source="application"):
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        with self._lock:
+            position = len(self.keys)
+            self.keys.append(key)
+            self.names.append(name)
+            self.normalized.append(normalized)
+            self.sources.append(source)
+            for gram in name_grams(normalized):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = _Postings()
+                postings.append(position)
+
+    def candidates(self, normalized, limit=MAX_CANDIDATES):
+        """Entry positions sharing at least MIN_GRAM_OVERLAP of the query's trigrams, best overlap first."""
+        grams = name_grams(normalized)
+        with self._lock:
+            size = len(self.keys)
+            lists = [self._postings[g].view() for g in grams if g in self._postings]
+        if not lists or not size:
+            return np.empty(0, dtype=np.int64)
+        counts = np.bincount(np.concatenate(lists), minlength=size)
+        positions = np.flatnonzero(counts >= max(1, math.ceil(MIN_GRAM_OVERLAP * len(grams))))
+        if len(positions) > limit:
+            positions = positions[np.argpartition(counts[positions], -limit)[-limit:]]
+        return positions
+
+    def search(self, name, top_k=10, min_score=MATCH_THRESHOLD, exclude=None):
+        """[{'key', 'name', 'source', 'score'}] for the closest names, best first."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        matches = []
+        for position in self.candidates(normalized):
+            if exclude is not None and self.keys[position] == exclude:
+                continue
+            score = similarity(normalized, self.normalized[position])
+            if score >= min_score:
+                matches.append({
+                    "key": self.keys[position],
+                    "name": self.names[position],
+                    "source": self.sources[position],
+                    "score": round(float(score), 1),
+                })
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return matches[:top_k]
+
+
+class ApplicantRegistry:
+    """
+    Applicant names in SQLite with a NameIndex over them. Rows are append-only, so
+    each process catches up by loading rows past the last id it has seen; names
+    added by other processes (job workers, other app instances) become searchable too.
+    """
+
+    def __init__(self, db_path=NAME_INDEX_DB):
+        self.db_path = db_path
+        self.index = NameIndex()
+        self._last_id = 0
+        self._sync_lock = threading.Lock()
+        self._local = threading.local()
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS applicant_names (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                application_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (application_id, name)
+            )
+        """)
+        conn.commit()
+
+    def sync(self):
+        """Index rows added since the last sync (the first call loads everything)."""
+        with self._sync_lock:
+            rows = self._conn().execute(
+                "SELECT id, application_id, name FROM applicant_names WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+            for row_id, application_id, name in rows:
+                self.index.add(application_id, name)
+                self._last_id = row_id
+
+    def add(self, application_id, name):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR IGNORE INTO applicant_names (application_id, name, created_at) VALUES (?, ?, ?)",
+            (application_id, name, time.time()),
+        )
+        conn.commit()
+        self.sync()
+
+
+def load_watchlist(path=WATCHLIST_PATH):
+    """NameIndex over the watchlist CSV ('name' column, optional 'reason'), or None if absent."""
+    if not os.path.exists(path):
+        return None
+    index = NameIndex()
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            if row.get("name"):
+                index.add(row.get("reason") or "watchlist", row["name"], source="watchlist")
+    return index
+
+
+_registry = None
+_registry_lock = threading.Lock()
+_watchlist = None
+_watchlist_mtime = None
+_watchlist_checked = 0.0
+_watchlist_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ApplicantRegistry()
+    return _registry
+
+
+def get_watchlist(path=WATCHLIST_PATH):
+    """Watchlist index, re-read when the file's mtime changes (checked at most once per interval)."""
+    global _watchlist, _watchlist_mtime, _watchlist_checked
+    now = time.monotonic()
+    if now - _watchlist_checked < RELOAD_CHECK_INTERVAL:
+        return _watchlist
+    with _watchlist_lock:
+        _watchlist_checked = now
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            _watchlist, _watchlist_mtime = None, None
+            return None
+        if mtime_ns != _watchlist_mtime:
+            try:
+                _watchlist, _watchlist_mtime = load_watchlist(path), mtime_ns
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                print(f"Could not load watchlist {path}: {e}")
+        return _watchlist
+
+
+def find_similar_applicants(name, top_k=10, min_score=MATCH_THRESHOLD, exclude=None):
+    """
+    Prior applicants and watchlist entries whose names resemble `name`, best first:
+    [{'key': application id or watchlist reason, 'name', 'source', 'score'}].
+    `exclude` drops the caller's own application.
+    """
+    registry = get_registry()
+    registry.sync()
+    matches = registry.index.search(name, top_k, min_score, exclude)
+    watchlist = get_watchlist()
+    if watchlist is not None:
+        matches += watchlist.search(name, top_k, min_score)
+    matches.sort(key=lambda m: m["score"], reverse=True)
+    return matches[:top_k]
+
+
+def screen_applicant(application_id, name, top_k=10):
+    """Look up similar names for an application, then add it to the registry."""
+    if not normalize_name(name):
+        return []
+    matches = find_similar_applicants(name, top_k, exclude=application_id)
+    get_registry().add(application_id, name)
+    return matches
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Two-tier cache for OCR output: an in-process LRU in front of a SQLite table.
+# Keys are derived from the document bytes, so re-uploads of the same file hit.
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", "database.db")
+OCR_CACHE_MEMORY_ITEMS = int(os.getenv("OCR_CACHE_MEMORY_ITEMS", "256"))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Summing the table is O(rows), so the size check runs every N puts rather than on each;
+# the table can overshoot max_bytes by at most N entries per writing process
+EVICT_CHECK_EVERY = 100
+# SQLite hits don't write on the read path: their last_access times are batched and
+# written every N hits or seconds (and before an eviction check)
+ACCESS_FLUSH_EVERY = 50
+ACCESS_FLUSH_INTERVAL = 30.0
+
+
+def cache_key(image_bytes, config):
+    """SHA-256 of the image bytes plus the preprocessing/OCR configuration."""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    config_digest = hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
+    return f"{digest}:{config_digest}"
+
+
+class OcrCache:
+    def __init__(self, db_path=OCR_CACHE_DB, memory_items=OCR_CACHE_MEMORY_ITEMS, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._accessed = {}
+        self._last_access_flush = time.monotonic()
+        self._init_db()
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections must not cross threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_access ON ocr_cache(last_access)")
+        conn.commit()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, row[0])
+        with self._lock:
+            self._accessed[key] = time.time()
+            due = (len(self._accessed) >= ACCESS_FLUSH_EVERY
+                   or time.monotonic() - self._last_access_flush >= ACCESS_FLUSH_INTERVAL)
+        if due:
+            self._flush_access(conn)
+            conn.commit()
+        return row[0]
+
+    def _flush_access(self, conn):
+        """Write the batched last_access times of SQLite hits (the caller commits)."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            self._last_access_flush = time.monotonic()
+        if accessed:
+            conn.executemany("UPDATE ocr_cache SET last_access = ? WHERE key = ?",
+                             [(at, key) for key, at in accessed.items()])
+
+    def put(self, key, value):
+        self._remember(key, value)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), time.time()),
+        )
+        with self._lock:
+            self._puts += 1
+            check = self._puts % EVICT_CHECK_EVERY == 0
+        if check:
+            self._flush_access(conn)
+            self._evict(conn)
+        conn.commit()
+
+    def _evict(self, conn):
+        """Drop least recently used rows until the table fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM ocr_cache WHERE key = ?", stale)
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    """Process-wide cache instance, or None when disabled via OCR_CACHE_DISABLED=1."""
+    global _cache, _cache_pid
+    if os.getenv("OCR_CACHE_DISABLED") == "1":
+        return None
+    # A cache inherited through fork shares the parent's SQLite connection; build one per process
+    if _cache is None or _cache_pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache_pid != os.getpid():
+                _cache_pid = os.getpid()
+                _cache = OcrCache()
+    return _cache
@@ -1,7 +1,24 @@
 import os
 import re
+import json
+import time
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 import pytesseract
 from PIL import Image, ImageOps, ImageFilter
+from utils import metrics
+from utils.aadhaar import best_correction as best_aadhaar_correction, corrections as aadhaar_corrections
+from utils.aadhaar import format_aadhaar, is_valid_aadhaar
+from utils.ocr_cache import cache_key, get_ocr_cache
+
+try:
+    # Optional in-process Tesseract binding used by the pooled OCR engine
+    import tesserocr
+except Exception:  # pragma: no cover - environment-dependent
+    tesserocr = None
 
 try:
     # Optional fuzzy matching if available
@@ -25,128 +42,411 @@ elif not getattr(pytesseract, "tesseract_cmd", None):
             pytesseract.tesseract_cmd = _path
             break
 
-def _preprocess_image_for_ocr(image: Image.Image) -> Image.Image:
-    """Apply light preprocessing to improve OCR quality."""
+# OCR configuration: assume a single uniform block of text (psm 6), English language
+_OCR_CONFIG = "--psm 6 -l eng"
+# OCR backend: "auto" uses the pooled tesserocr engine when installed, else pytesseract
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+# Pool size for the pooled engine; 0 keeps a single long-lived API in this process
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", str(os.cpu_count() or 1)))
+_OCR_LANG = "eng"
+
+# Adaptive preprocessing: scale every image to roughly this many pixels instead of a fixed 2x.
+# ~3 MP keeps Aadhaar text at ~300 DPI; small scans are still upscaled, but never beyond 2x.
+OCR_PIXEL_BUDGET = int(os.getenv("OCR_PIXEL_BUDGET", "3000000"))
+OCR_MAX_UPSCALE = 2.0
+# Optional crop to the detected card region before scaling (OCR_CROP_CARD=1)
+OCR_CROP_CARD = os.getenv("OCR_CROP_CARD") == "1"
+# Part of the cache key: bump whenever _preprocess_image_for_ocr or the cached payload changes
+_PREPROCESS_VERSION = f"gray-budget{OCR_PIXEL_BUDGET}-crop{int(OCR_CROP_CARD)}-autocontrast-sharpen|words-v1"
+
+# Field patterns, compiled once at import instead of on every call
+_VID_LINE_RE = re.compile(r"\b(vid|virtual\s*id)\b", re.IGNORECASE)
+_AADHAAR_RE = re.compile(r"(?<!\d)(\d{4}[\s-]*\d{4}[\s-]*\d{4})(?!\d)")
+_VID_RE = re.compile(r"(?<!\d)(\d{4}[\s-]*\d{4}[\s-]*\d{4}[\s-]*\d{4})(?!\d)")
+_DOB_RE = re.compile(
+    r"(?:dob|date\s*of\s*birth|birth)\s*[:\-]?\s*(\d{2}[/\-.]\d{2}[/\-.]\d{4})"
+    r"|(?:yob|year\s*of\s*birth)\s*[:\-]?\s*(\d{4})",
+    re.IGNORECASE,
+)
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+_TABS_RE = re.compile(r"[\t\r]+")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+_ALPHA_LINE_RE = re.compile(r"^[A-Za-z\s]+$")
+_NAME_PATTERNS = [
+    re.compile(r"Name[:\s]+([A-Za-z\s]+)", re.IGNORECASE),  # Matches "Name: John Doe"
+    re.compile(r"नाम[:\s]+([A-Za-z\s]+)", re.IGNORECASE),  # Matches "नाम: जॉन डो"
+    re.compile(r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)", re.IGNORECASE),  # Matches capitalized names like 'John Doe'
+    re.compile(r"([A-Za-z\s]+(?:[-\s][A-Za-z]+)+)", re.IGNORECASE),  # Handles hyphenated names like 'John-Paul Doe'
+]
+# Avoid lines with non-name keywords
+_BANNED_NAME_TOKENS = (
+    "uidai", "unique identification", "government", "india", "year", "male", "female",
+    "dob", "date of birth", "address", "adhar", "aadhar", "aadhaar", "s/o", "w/o", "d/o"
+)
+
+def _budget_scale(width, height):
+    """Scale factor that brings width x height to the pixel budget (capped upscale)."""
+    return min(OCR_MAX_UPSCALE, (OCR_PIXEL_BUDGET / float(width * height)) ** 0.5)
+
+def _decode_image(image_bytes):
+    """
+    Open the image, letting JPEG decode straight to a reduced size. draft() picks
+    the smallest 1/2, 1/4 or 1/8 scale that still covers the requested size, so a
+    12 MP photo never exists as a full-resolution bitmap.
+    """
+    img = Image.open(BytesIO(image_bytes))
+    if img.format == "JPEG":
+        scale = _budget_scale(img.width, img.height)
+        if scale < 1:
+            img.draft("L", (int(img.width * scale), int(img.height * scale)))
+    img.load()
+    return img
+
+def _crop_to_card(img: Image.Image) -> Image.Image:
+    """Crop a grayscale image to the bounding box of its edges (the card), if it is clearly smaller."""
+    probe = img.copy()
+    probe.thumbnail((512, 512))
+    edges = probe.filter(ImageFilter.FIND_EDGES).point(lambda v: 255 if v > 40 else 0)
+    bbox = edges.getbbox()
+    if not bbox:
+        return img
+    fx, fy = img.width / probe.width, img.height / probe.height
+    left, top, right, bottom = bbox
+    area_ratio = ((right - left) * (bottom - top)) / float(probe.width * probe.height)
+    if not 0.2 <= area_ratio <= 0.9:
+        return img
+    pad = 8
+    return img.crop((
+        max(0, int(left * fx) - pad), max(0, int(top * fy) - pad),
+        min(img.width, int(right * fx) + pad), min(img.height, int(bottom * fy) + pad),
+    ))
+
+def _preprocess_image_for_ocr(image: Image.Image, timings=None) -> Image.Image:
+    """
+    Apply light preprocessing to improve OCR quality. The image is normalized
+    to OCR_PIXEL_BUDGET pixels rather than always enlarged 2x; per-stage times
+    (ms) are recorded in `timings` when a dict is given.
+    """
+    timings = timings if timings is not None else {}
+    start = time.perf_counter()
     img = image.convert("L")  # Convert to grayscale
+    if OCR_CROP_CARD:
+        img = _crop_to_card(img)
+        timings["crop_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    start = time.perf_counter()
+    # Downscale before filtering (cheaper); upscale small scans for clarity of small text
+    scale = _budget_scale(img.width, img.height)
+    if abs(scale - 1.0) > 0.05:
+        img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.BICUBIC)
+    timings["resize_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    start = time.perf_counter()
     img = ImageOps.autocontrast(img)  # Auto-contrast to improve text visibility
     img = img.filter(ImageFilter.SHARPEN)  # Light sharpening
-    # Optional: Resize the image to improve clarity for small text
-    img = img.resize((img.width * 2, img.height * 2))  # Resize to 200% of original size
+    timings["enhance_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    timings["ocr_pixels"] = img.width * img.height
     return img
 
-def extract_text(image_path):
-    """Extract text from an image using Tesseract OCR."""
-    image = Image.open(image_path)
-    image = _preprocess_image_for_ocr(image)
-    # OCR configuration: assume a single uniform block of text (psm 6)
-    config = "--psm 6 -l eng"  # English language
-    return pytesseract.image_to_string(image, config=config)
+def _read_image_bytes(image):
+    """Accept a file path, raw bytes or a file-like object."""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    if hasattr(image, "read"):
+        return image.read()
+    with open(image, "rb") as fh:
+        return fh.read()
 
-def extract_aadhaar_number(image_path):
+class PytesseractEngine:
+    """Original backend: every call forks a `tesseract` process (kept as the fallback)."""
+    name = "pytesseract"
+
+    def image_to_data(self, img):
+        return pytesseract.image_to_data(img, config=_OCR_CONFIG, output_type=pytesseract.Output.DICT)
+
+    def image_to_data_many(self, images):
+        return [self.image_to_data(img) for img in images]
+
+    def close(self):
+        pass
+
+
+_worker_api = None
+
+def _tesserocr_api():
+    """One PyTessBaseAPI per process, created once with the language model loaded."""
+    global _worker_api
+    if _worker_api is None:
+        _worker_api = tesserocr.PyTessBaseAPI(lang=_OCR_LANG, psm=tesserocr.PSM.SINGLE_BLOCK)
+    return _worker_api
+
+def _tesserocr_image_to_data(img):
+    """Word boxes in pytesseract's image_to_data(Output.DICT) layout."""
+    api = _tesserocr_api()
+    api.SetImage(img)
+    api.Recognize()
+    data = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": []}
+    level = tesserocr.RIL.WORD
+    block = par = line = 0
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+    for word in tesserocr.iterate_level(iterator, level):
+        if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+            block, par, line = block + 1, 0, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+            par, line = par + 1, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line += 1
+        data["text"].append(word.GetUTF8Text(level) or "")
+        data["conf"].append(word.Confidence(level))
+        data["block_num"].append(block)
+        data["par_num"].append(par)
+        data["line_num"].append(line)
+    return data
+
+def _tesserocr_batch(images):
+    # One pool round-trip OCRs a whole batch with the worker's warm API
+    return [_tesserocr_image_to_data(img) for img in images]
+
+
+class TesserocrPoolEngine:
     """
-    Extract Aadhaar number using OCR and regex.
-    Returns normalized form: 'XXXX XXXX XXXX' or None if not found.
+    Long-lived OCR workers: each pool process keeps a PyTessBaseAPI with the
+    'eng' model loaded, so there is no per-call fork, temp file or model reload.
+    Batches are split into one chunk per worker.
     """
+    name = "tesserocr-pool"
+
+    def __init__(self, processes=OCR_POOL_SIZE):
+        self.processes = processes
+        self._pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+        self._lock = threading.Lock()  # the in-process API is not thread-safe
+
+    def image_to_data(self, img):
+        return self.image_to_data_many([img])[0]
+
+    def image_to_data_many(self, images):
+        images = list(images)
+        if self._pool is None:
+            with self._lock:
+                return _tesserocr_batch(images)
+        size = max(1, -(-len(images) // self.processes))
+        chunks = [images[i:i + size] for i in range(0, len(images), size)]
+        results = []
+        for chunk in self._pool.map(_tesserocr_batch, chunks):
+            results.extend(chunk)
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+def get_ocr_engine():
+    """Process-wide OCR engine selected by OCR_ENGINE (auto / pool / pytesseract)."""
+    global _engine, _engine_pid
+    # An engine inherited through fork may hold a dead pool; each process builds its own
+    if _engine is None or _engine_pid != os.getpid():
+        with _engine_lock:
+            if _engine is None or _engine_pid != os.getpid():
+                _engine_pid = os.getpid()
+                use_pool = OCR_ENGINE == "pool" or (OCR_ENGINE == "auto" and tesserocr is not None)
+                if use_pool and tesserocr is None:
+                    print("OCR_ENGINE=pool but tesserocr is not installed; falling back to pytesseract")
+                    use_pool = False
+                # Daemonic processes (job workers) cannot fork a pool; use the in-process API there
+                processes = 0 if multiprocessing.current_process().daemon else OCR_POOL_SIZE
+                _engine = TesserocrPoolEngine(processes) if use_pool else PytesseractEngine()
+                atexit.register(_engine.close)
+    return _engine
+
+def _run_ocr(images):
+    """OCR a batch through the configured engine, falling back to pytesseract on engine errors."""
+    engine = get_ocr_engine()
     try:
-        text = extract_text(image_path) or ""
+        return engine.image_to_data_many(images)
+    except Exception as e:
+        if isinstance(engine, PytesseractEngine):
+            raise
+        print(f"{engine.name} OCR failed ({e}); retrying with pytesseract")
+        return PytesseractEngine().image_to_data_many(images)
 
-        # Remove lines that contain VID / Virtual ID to avoid picking VID digits
-        lines = [ln for ln in text.splitlines() if not re.search(r"\b(vid|virtual\s*id)\b", ln, re.IGNORECASE)]
-        filtered_text = "\n".join(lines)
+def _group_lines(data):
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        conf = max(float(data["conf"][i]), 0.0) / 100.0
+        lines.setdefault(line_key, []).append((word, conf))
+    return [lines[k] for k in sorted(lines)]
 
-        # Find Aadhaar-like 12-digit numbers grouped as 4-4-4 (allow spaces or hyphens)
-        match = re.search(r"(?<!\d)(\d{4}[\s-]*\d{4}[\s-]*\d{4})(?!\d)", filtered_text)
-        if match:
-            raw = match.group(1)
-            digits = re.sub(r"[^0-9]", "", raw)
-            if len(digits) == 12:
-                return f"{digits[0:4]} {digits[4:8]} {digits[8:12]}"
-        return None
-    except Exception:
-        return None
+def ocr_lines_many(images):
+    """OCR several already-decoded PIL images in one engine round trip (no caching)."""
+    prepared = [_preprocess_image_for_ocr(img) for img in images]
+    return [_group_lines(data) for data in _run_ocr(prepared)]
 
-def extract_name_from_aadhar(image_path):
+def _ocr_lines(image, timings=None):
     """
-    Extract name from Aadhar card using OCR
-    Returns the extracted name or None if not found
+    Run Tesseract once and return its word boxes grouped into lines:
+    [[(word, confidence 0-1), ...], ...]. Results are cached by the SHA-256
+    of the image bytes, so each distinct document is OCR'd once.
     """
-    try:
-        # Extract text from the image
-        text = extract_text(image_path)
-        if not text:
-            return None
-
-        # Normalize whitespace and remove obvious noise characters
-        text_norm = re.sub(r"[\t\r]+", "\n", text)
-        text_norm = re.sub(r"\u200b", "", text_norm)  # Zero-width space
-        text_norm = re.sub(r'[^\w\s]', '', text_norm)  # Remove non-alphabetic characters
-        lines = [re.sub(r"\s+", " ", ln).strip() for ln in text_norm.split("\n") if ln.strip()]
-        joined = " ".join(lines)
-
-        # Common patterns for name extraction from Aadhar
-        name_patterns = [
-            r"Name[:\s]+([A-Za-z\s]+)",  # Matches "Name: John Doe"
-            r"नाम[:\s]+([A-Za-z\s]+)",  # Matches "नाम: जॉन डो"
-            r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",  # Matches capitalized names like 'John Doe'
-            r"([A-Za-z\s]+(?:[-\s][A-Za-z]+)+)",  # Handles hyphenated names like 'John-Paul Doe'
-        ]
-
-        # Try each pattern to find a name
-        for pattern in name_patterns:
-            matches = re.findall(pattern, joined, re.IGNORECASE)
-            if matches:
-                name = matches[0].strip()
-                # Remove extra whitespace and common OCR artifacts
-                name = re.sub(r'\s+', ' ', name)
-                if len(name) > 2:  # Basic validation
-                    # Avoid lines with non-name keywords
-                    banned_tokens = [
-                        "uidai", "unique identification", "government", "india", "year", "male", "female",
-                        "dob", "date of birth", "address", "adhar", "aadhar", "aadhar", "s/o", "w/o", "d/o"
-                    ]
-                    lowered = name.lower()
-                    if not any(bt in lowered for bt in banned_tokens):
-                        # Prefer first 2-3 words to avoid trailing artifacts
-                        words = name.split()
-                        name_clean = " ".join(words[:3])
-                        return name_clean.title()
-
-        # If no pattern matches, try to find the first line that looks like a name
-        for line in lines:
-            line = line.strip()
-            if re.match(r'^[A-Za-z\s]+$', line) and len(line.split()) >= 2:
-                lowered = line.lower()
-                if not any(t in lowered for t in [
-                    "uidai", "unique identification", "government", "india", "dob", "year", "male", "female",
-                    "address", "aadhaar", "aadhar", "adhar", "s/o", "w/o", "d/o"
-                ]):
-                    # Prefer first 2-3 words as the likely name
-                    words = line.split()
-                    name_guess = " ".join(words[:3])
-                    return name_guess.title()
+    timings = timings if timings is not None else {}
+    image_bytes = _read_image_bytes(image)
+    cache = get_ocr_cache()
+    key = cache_key(image_bytes, f"{_PREPROCESS_VERSION}|{_OCR_CONFIG}")
+    if cache is not None:
+        start = time.perf_counter()
+        cached = cache.get(key)
+        timings["cache_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if cached is not None:
+            timings["cache_hit"] = True
+            return json.loads(cached)
 
-        return None
-        
-    except Exception as e:
-        print(f"Error extracting name from Aadhar: {e}")
-        return None
+    start = time.perf_counter()
+    decoded = _decode_image(image_bytes)
+    timings["decode_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    img = _preprocess_image_for_ocr(decoded, timings)
+    start = time.perf_counter()
+    data = _run_ocr([img])[0]
+    timings["ocr_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    result = _group_lines(data)
+    if cache is not None:
+        cache.put(key, json.dumps(result))
+    return result
 
-def verify_name_match(user_name, aadhar_image_path):
+def _lines_text(lines):
+    return "\n".join(" ".join(word for word, _ in line) for line in lines)
+
+def _match_confidence(line, start, end):
+    """Mean confidence of the words in `line` overlapping characters [start, end)."""
+    confs, pos = [], 0
+    for word, conf in line:
+        if pos < end and pos + len(word) > start:
+            confs.append(conf)
+        pos += len(word) + 1
+    return round(sum(confs) / len(confs), 3) if confs else 0.0
+
+def _field(value, confidence):
+    return {"value": value, "confidence": confidence if value is not None else 0.0}
+
+def _digit_confidences(line, start, end):
+    """Confidence of the word each digit in characters [start, end) of `line` came from."""
+    confs, pos = [], 0
+    for word, conf in line:
+        for offset, ch in enumerate(word):
+            if start <= pos + offset < end and ch.isdigit():
+                confs.append(conf)
+        pos += len(word) + 1
+    return confs
+
+def _parse_aadhaar_number(lines):
     """
-    Verify if the user-provided name matches the name on Aadhar card
-    Returns True if match, False otherwise
+    First number that passes the Aadhaar checksum. If only checksum failures are
+    found, the first one's best single-digit correction is returned (at reduced
+    confidence) when it is plausible enough, else the raw reading as 'invalid'.
+    Other checksum-valid readings are listed under 'alternatives' for review only.
     """
-    if not user_name or not aadhar_image_path:
-        return False
-    
-    extracted_name = extract_name_from_aadhar(aadhar_image_path)
-    if not extracted_name:
+    misread = None
+    for line in lines:
+        text = " ".join(word for word, _ in line)
+        # Skip lines that contain VID / Virtual ID to avoid picking VID digits
+        if _VID_LINE_RE.search(text):
+            continue
+        for match in _AADHAAR_RE.finditer(text):
+            digits = _NON_DIGIT_RE.sub("", match.group(1))
+            if len(digits) != 12:
+                continue
+            confidence = _match_confidence(line, match.start(1), match.end(1))
+            if is_valid_aadhaar(digits):
+                return dict(_field(format_aadhaar(digits), confidence), checksum="valid", alternatives=[])
+            if misread is None:
+                misread = (digits, confidence, _digit_confidences(line, match.start(1), match.end(1)))
+    if misread is None:
+        return _field(None, 0.0)
+    digits, confidence, digit_confs = misread
+    fixed = best_aadhaar_correction(digits, digit_confs)
+    others = [format_aadhaar(d) for d, _ in aadhaar_corrections(digits, digit_confs) if d != fixed]
+    if fixed is None:
+        return dict(_field(format_aadhaar(digits), confidence), checksum="invalid", alternatives=others)
+    return dict(_field(format_aadhaar(fixed), round(confidence * 0.5, 3)),
+                checksum="corrected", alternatives=others + [format_aadhaar(digits)])
+
+def _parse_vid(lines):
+    for line in lines:
+        text = " ".join(word for word, _ in line)
+        match = _VID_RE.search(text)
+        if match:
+            d = _NON_DIGIT_RE.sub("", match.group(1))
+            value = f"{d[0:4]} {d[4:8]} {d[8:12]} {d[12:16]}"
+            return _field(value, _match_confidence(line, match.start(1), match.end(1)))
+    return _field(None, 0.0)
+
+def _parse_dob(lines):
+    for line in lines:
+        text = " ".join(word for word, _ in line)
+        match = _DOB_RE.search(text)
+        if match:
+            group = 1 if match.group(1) else 2
+            return _field(match.group(group), _match_confidence(line, match.start(group), match.end(group)))
+    return _field(None, 0.0)
+
+def _parse_name(text):
+    """Name heuristics over the OCR text (shared by the single-pass and legacy APIs)."""
+    if not text:
+        return None
+
+    # Normalize whitespace and remove obvious noise characters
+    text_norm = _TABS_RE.sub("\n", text)
+    text_norm = text_norm.replace("\u200b", "")  # Zero-width space
+    text_norm = _PUNCT_RE.sub('', text_norm)  # Remove non-alphabetic characters
+    lines = [_SPACES_RE.sub(" ", ln).strip() for ln in text_norm.split("\n") if ln.strip()]
+    joined = " ".join(lines)
+
+    # Try each pattern to find a name
+    for pattern in _NAME_PATTERNS:
+        matches = pattern.findall(joined)
+        if matches:
+            name = matches[0].strip()
+            # Remove extra whitespace and common OCR artifacts
+            name = _SPACES_RE.sub(' ', name)
+            if len(name) > 2:  # Basic validation
+                lowered = name.lower()
+                if not any(bt in lowered for bt in _BANNED_NAME_TOKENS):
+                    # Prefer first 2-3 words to avoid trailing artifacts
+                    return " ".join(name.split()[:3]).title()
+
+    # If no pattern matches, try to find the first line that looks like a name
+    for line in lines:
+        line = line.strip()
+        if _ALPHA_LINE_RE.match(line) and len(line.split()) >= 2:
+            lowered = line.lower()
+            if not any(t in lowered for t in _BANNED_NAME_TOKENS):
+                # Prefer first 2-3 words as the likely name
+                return " ".join(line.split()[:3]).title()
+
+    return None
+
+def _name_confidence(lines, name):
+    tokens = set(name.lower().split())
+    confs = [conf for line in lines for word, conf in line if _PUNCT_RE.sub("", word).lower() in tokens]
+    return round(sum(confs) / len(confs), 3) if confs else 0.0
+
+def names_match(user_name, extracted_name):
+    """Compare a typed name with an OCR'd one, tolerating minor OCR spelling variations."""
+    if not user_name or not extracted_name:
         return False
-    
+
     # Normalize names for comparison
-    user_normalized = re.sub(r'[^\w\s]', '', user_name.lower()).strip()
-    extracted_normalized = re.sub(r'[^\w\s]', '', extracted_name.lower()).strip()
-    
+    user_normalized = _PUNCT_RE.sub('', user_name.lower()).strip()
+    extracted_normalized = _PUNCT_RE.sub('', extracted_name.lower()).strip()
+
     # Exact/containment quick checks
     if (
         user_normalized == extracted_normalized or
@@ -160,4 +460,66 @@ def verify_name_match(user_name, aadhar_image_path):
         score = _name_similarity(user_normalized, extracted_normalized)
         return score >= 80  # Allow minor OCR spelling variations
 
-    return False
\ No newline at end of file
+    return False
+
+def extract_aadhaar_fields(image, user_name=None):
+    """
+    Decode and OCR an Aadhaar image once, then run every field extractor over
+    the same word boxes. Returns a dict with 'aadhaar_number', 'name', 'dob'
+    and 'vid', each {'value': ..., 'confidence': 0-1}, plus 'name_match'
+    when `user_name` is given. `image` may be a path, bytes or a file object.
+    'aadhaar_number' also carries 'checksum' (valid/corrected/invalid) and 'alternatives'
+    (other checksum-valid readings, for review; verification matches 'value' only).
+    Per-stage timings (decode, crop, resize, enhance, OCR, parse; ms) are under 'timings'
+    and go to the ocr_stage_seconds histogram.
+    """
+    timings = {}
+    lines = _ocr_lines(image, timings)
+    start = time.perf_counter()
+    name = _parse_name(_lines_text(lines))
+    fields = {
+        "aadhaar_number": _parse_aadhaar_number(lines),
+        "name": _field(name, _name_confidence(lines, name) if name else 0.0),
+        "dob": _parse_dob(lines),
+        "vid": _parse_vid(lines),
+    }
+    if user_name is not None:
+        fields["name_match"] = names_match(user_name, name)
+    timings["parse_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    metrics.observe_timings("ocr_stage_seconds", timings)
+    fields["timings"] = timings
+    return fields
+
+def extract_text(image_path):
+    """Extract text from an image using Tesseract OCR (cached, see _ocr_lines)."""
+    return _lines_text(_ocr_lines(image_path))
+
+def extract_aadhaar_number(image_path):
+    """
+    Extract Aadhaar number using OCR and regex.
+    Returns normalized form: 'XXXX XXXX XXXX' or None if not found.
+    """
+    try:
+        return _parse_aadhaar_number(_ocr_lines(image_path))["value"]
+    except Exception:
+        return None
+
+def extract_name_from_aadhar(image_path):
+    """
+    Extract name from Aadhar card using OCR
+    Returns the extracted name or None if not found
+    """
+    try:
+        return _parse_name(extract_text(image_path))
+    except Exception as e:
+        print(f"Error extracting name from Aadhar: {e}")
+        return None
+
+def verify_name_match(user_name, aadhar_image_path):
+    """
+    Verify if the user-provided name matches the name on Aadhar card
+    Returns True if match, False otherwise
+    """
+    if not user_name or not aadhar_image_path:
+        return False
+    return names_match(user_name, extract_name_from_aadhar(aadhar_image_path))
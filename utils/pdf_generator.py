@@ -1,9 +1,6 @@
-from fpdf import FPDF
+from utils.reports import render_acknowledgement
 
 def generate_ack_pdf(user_data, output_path):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    for key, value in user_data.items():
-        pdf.cell(200, 10, txt=f"{key}: {value}", ln=True)
-    pdf.output(output_path)
\ No newline at end of file
+    # Rendered by the shared report engine (utils/reports.py)
+    with open(output_path, "wb") as fh:
+        fh.write(render_acknowledgement(user_data))
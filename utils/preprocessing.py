@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Code assigned to categories that were not seen during training
+UNKNOWN_CODE = -1
+
+
+class Preprocessor:
+    """
+    Persisted replacement for the per-run LabelEncoders in train_model.py.
+    Holds the feature column order, their dtypes and, for every categorical
+    column, a sorted category array whose index is the code (the same codes
+    LabelEncoder assigns). Whole batches are encoded with NumPy lookups.
+    """
+
+    def __init__(self, columns, dtypes, categories):
+        self.columns = list(columns)
+        self.dtypes = dict(dtypes)
+        self.categories = {col: np.asarray(cats, dtype=str) for col, cats in categories.items()}
+
+    @classmethod
+    def fit(cls, df, target_columns=()):
+        """Learn column order, dtypes and category lookups from a training frame."""
+        columns = [c for c in df.columns if c not in target_columns]
+        dtypes = {}
+        categories = {}
+        for col in df.columns:
+            if pd.api.types.is_numeric_dtype(df[col]):
+                if col in columns:
+                    dtypes[col] = str(df[col].dtype)
+                continue
+            # np.unique sorts, matching LabelEncoder's class order
+            categories[col] = np.unique(df[col].astype(str).to_numpy())
+            if col in columns:
+                dtypes[col] = 'category'
+        return cls(columns, dtypes, categories)
+
+    @classmethod
+    def fit_chunks(cls, chunks, target_columns=()):
+        """Fit from an iterable of frames (one streaming pass), merging the category sets."""
+        merged = None
+        for chunk in chunks:
+            part = cls.fit(chunk, target_columns)
+            if merged is None:
+                merged = part
+                continue
+            for col, cats in part.categories.items():
+                merged.categories[col] = np.union1d(merged.categories.get(col, cats), cats)
+        if merged is None:
+            raise ValueError("No data to fit the preprocessor on")
+        return merged
+
+    def encode_column(self, col, values):
+        """Map raw values to integer codes; unseen values get UNKNOWN_CODE."""
+        cats = self.categories[col]
+        vals = np.asarray(values).astype(str)
+        if len(cats) == 0:
+            return np.full(len(vals), UNKNOWN_CODE, dtype=np.int32)
+        idx = np.searchsorted(cats, vals)
+        idx = np.minimum(idx, len(cats) - 1)
+        return np.where(cats[idx] == vals, idx, UNKNOWN_CODE).astype(np.int32)
+
+    def decode_column(self, col, codes):
+        """Inverse of encode_column for known codes."""
+        return self.categories[col][np.asarray(codes)]
+
+    def transform(self, df):
+        """Encode a batch into a float32 feature matrix ordered like training."""
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+
+        X = np.empty((len(df), len(self.columns)), dtype=np.float32)
+        for j, col in enumerate(self.columns):
+            if self.dtypes[col] == 'category':
+                X[:, j] = self.encode_column(col, df[col].to_numpy())
+            else:
+                X[:, j] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+        return X
+
+    def save(self, path):
+        """Write the artifact as an uncompressed .npz (no pickled objects)."""
+        arrays = {
+            'columns': np.asarray(self.columns, dtype=str),
+            'dtypes': np.asarray([self.dtypes[c] for c in self.columns], dtype=str),
+        }
+        for col, cats in self.categories.items():
+            arrays[f'cat__{col}'] = cats
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            columns = data['columns'].tolist()
+            dtypes = dict(zip(columns, data['dtypes'].tolist()))
+            categories = {
+                key[len('cat__'):]: data[key] for key in data.files if key.startswith('cat__')
+            }
+        return cls(columns, dtypes, categories)
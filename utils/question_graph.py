@@ -0,0 +1,140 @@
+from utils.aadhaar import digits_of, format_aadhaar as _format_digits
+from utils.aadhaar import is_valid_aadhaar
+
+# Declarative loan-application questionnaire shared by the /chatbot flow and the
+# one-shot /application endpoint. Each step names the field it fills, how to
+# validate and normalise the answer, the question to ask, and when it applies.
+
+COMPLETE_MESSAGE = "Thanks! You can now upload your documents on the dashboard."
+DONE_MESSAGE = "You're all set! Head to the dashboard to upload documents and view your eligibility report."
+EMPLOYMENT_TYPES = ['salaried', 'self-employed', 'freelancer']
+
+
+def is_valid_number(value):
+    return value.isdigit()
+
+
+def is_valid_employment(value):
+    return value.lower() in EMPLOYMENT_TYPES
+
+
+def is_present(value):
+    return bool(value)
+
+
+def format_aadhaar(value):
+    """Normalize to XXXX XXXX XXXX"""
+    return _format_digits(digits_of(value))
+
+
+def has_co_applicant(data):
+    return data.get('co_applicant', '').lower() == 'yes'
+
+
+class Step:
+    """
+    One question. `prompt` is asked when this step becomes the next unanswered one
+    (a string, or a callable taking the answers so far). `when` gates the step on
+    earlier answers; a skipped step stores `skip_value` if one is given.
+    """
+
+    def __init__(self, field, prompt, validate=is_present, error=None, normalize=None,
+                 when=None, skip_value=None):
+        self.field = field
+        self.prompt = prompt
+        self.validate = validate
+        self.error = error or f"Please enter a valid {field.replace('_', ' ')}."
+        self.normalize = normalize
+        self.when = when
+        self.skip_value = skip_value
+
+    def applies(self, data):
+        return self.when is None or self.when(data)
+
+    def question(self, data):
+        return self.prompt(data) if callable(self.prompt) else self.prompt
+
+    def clean(self, value):
+        """Validated, normalised answer, or None if the answer is invalid."""
+        value = str(value).strip() if value is not None else ''
+        if not self.validate(value):
+            return None
+        return self.normalize(value) if self.normalize else value
+
+
+QUESTION_GRAPH = [
+    Step('name', "Hi! Let's get started. Please enter your name."),
+    Step('age', lambda d: f"Hi {d['name']}! How old are you?",
+         validate=is_valid_number, error="Please enter a valid age."),
+    Step('employment_type', "What’s your employment type?(Salaried, Self-employed, or Freelancer)",
+         validate=is_valid_employment, error="Please enter a valid employment type.", normalize=str.lower),
+    Step('income', "What is your monthly income?",
+         validate=is_valid_number, error="Please enter your income in numbers."),
+    Step('existing_emis', "Do you have any existing EMIs or loans?(if No enter 0)"),
+    Step('bank_name', "Which bank do you hold your salary account with?"),
+    Step('co_applicant', "Do you have a co-applicant? (Yes / No)"),
+    Step('co_income', "Please enter co-applicant’s monthly income.",
+         validate=is_valid_number, error="Enter co-applicant’s income in numbers.",
+         when=has_co_applicant, skip_value="N/A"),
+    Step('aadhaar_number', "Please enter your 12-digit Aadhaar number.",
+         validate=is_valid_aadhaar, error="That doesn't look like a valid Aadhaar number. Please re-check all 12 digits.",
+         normalize=format_aadhaar),
+    Step('pan_number', "What is your PAN number?"),
+    Step('loan_type', "What type of loan are you applying for?(Personal/Home/Vehicle/Business/Education/Gold/Other)"),
+    Step('loan_amnt', "What is the desired loan amount?",
+         validate=is_valid_number, error="Enter loan amount in numbers."),
+    Step('loan_tenure', "What is the preferred tenure in months?",
+         validate=is_valid_number, error="Enter tenure in months (numbers only)."),
+    Step('collateral', "Do you have collateral or property to pledge?"),
+]
+
+
+def next_step(data, graph=QUESTION_GRAPH):
+    """
+    The first applicable step without an answer, or None when the application is
+    complete. Steps whose condition no longer holds are filled with their skip value.
+    """
+    for step in graph:
+        if step.field in data:
+            continue
+        if not step.applies(data):
+            if step.skip_value is not None:
+                data[step.field] = step.skip_value
+            continue
+        return step
+    return None
+
+
+def answer(data, user_input, graph=QUESTION_GRAPH):
+    """Apply one chat message to `data` (in place) and return the bot's reply."""
+    step = next_step(data, graph)
+    if step is None:
+        return DONE_MESSAGE
+    value = step.clean(user_input)
+    if value is None:
+        return step.error
+    data[step.field] = value
+    following = next_step(data, graph)
+    return following.question(data) if following else COMPLETE_MESSAGE
+
+
+def validate_application(payload, graph=QUESTION_GRAPH):
+    """
+    Validate a complete application in one pass over the same graph.
+    Returns (cleaned data, {field: error}); the data is only usable when errors is empty.
+    """
+    data, errors = {}, {}
+    for step in graph:
+        if not step.applies(data):
+            if step.skip_value is not None:
+                data[step.field] = step.skip_value
+            continue
+        if payload.get(step.field) in (None, ''):
+            errors[step.field] = f"{step.field} is required"
+            continue
+        value = step.clean(payload[step.field])
+        if value is None:
+            errors[step.field] = step.error
+        else:
+            data[step.field] = value
+    return data, errors
@@ -0,0 +1,370 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import textwrap
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from utils.jobs import QueueFull
+
+# One PDF engine (reportlab) for the summary report and the acknowledgement.
+# Rendered reports are cached by content hash: an in-process LRU bounded by bytes in
+# front of a SQLite table, so repeat downloads and exports skip rendering.
+REPORT_CACHE_DB = os.getenv("REPORT_CACHE_DB", "database.db")
+REPORT_CACHE_MEMORY_BYTES = int(os.getenv("REPORT_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# The table size is summed every N puts, not on each (see utils/ocr_cache.py)
+EVICT_CHECK_EVERY = 20
+# Reports per background job when batch scoring asks for them (jobs spread over the worker pool)
+REPORT_JOB_CHUNK = 50
+RENDER_REPORTS_JOB = 'render_reports'
+# Report jobs have their own depth budget and run after document verification, so a
+# large export cannot starve /upload; chunks past the budget are rendered by the export
+REPORT_QUEUE_DEPTH = int(os.getenv("REPORT_QUEUE_DEPTH", "100"))
+REPORT_JOB_PRIORITY = -1
+# Export manifests (each row holds a report's source) are dropped after this long
+REPORT_BATCH_RETENTION = float(os.getenv("REPORT_BATCH_RETENTION_DAYS", "1")) * 86400
+
+_PAGE_WIDTH, _PAGE_HEIGHT = A4
+_MARGIN = 60
+_LINE_HEIGHT = 18
+_WRAP_CHARS = 85
+
+
+def _latin1(text):
+    # The built-in PDF fonts are Latin-1 only; assessment text carries emoji and ₹
+    text = str(text).replace("₹", "Rs. ")
+    return text.encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+class _PageWriter:
+    """Top-down line writer that wraps long lines and starts new pages as needed."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.y = _PAGE_HEIGHT - _MARGIN
+
+    def line(self, text, indent=0, size=12, gap=_LINE_HEIGHT):
+        wrapped = textwrap.wrap(_latin1(text), _WRAP_CHARS - indent // 6) or [""]
+        for part in wrapped:
+            if self.y < _MARGIN:
+                self.pdf.showPage()
+                self.y = _PAGE_HEIGHT - _MARGIN
+            self.pdf.setFont("Helvetica", size)
+            self.pdf.drawString(_MARGIN + indent, self.y, part)
+            self.y -= gap
+
+    def space(self, amount=10):
+        self.y -= amount
+
+
+def _finish(pdf, buffer):
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_report(loan_data, result, assessment=None, documents=()):
+    """LoanAdvisor summary report as PDF bytes."""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    writer = _PageWriter(pdf)
+    writer.line("LoanAdvisor Summary Report", size=16, gap=30)
+    for key, value in loan_data.items():
+        writer.line(f"{key.replace('_', ' ').title()}: {value}")
+    writer.space()
+    writer.line("Uploaded Documents:")
+    for doc in documents or ["None"]:
+        writer.line(doc, indent=20)
+    writer.space(20)
+    writer.line(f"Loan Eligibility: {result}", size=13)
+    if assessment:
+        writer.space()
+        for text in assessment.strip().splitlines():
+            writer.line(text, size=10, gap=14)
+    return _finish(pdf, buffer)
+
+
+def render_acknowledgement(user_data):
+    """Acknowledgement of a submitted application (key: value per line)."""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    writer = _PageWriter(pdf)
+    for key, value in user_data.items():
+        writer.line(f"{key}: {value}")
+    return _finish(pdf, buffer)
+
+
+def report_key(application_id, loan_data, result, assessment=None, documents=()):
+    """Cache key: the application plus a hash of everything the report shows."""
+    content = json.dumps([loan_data, result, assessment, list(documents)], sort_keys=True, default=str)
+    return f"{application_id}:{hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]}"
+
+
+class ReportCache:
+    def __init__(self, db_path=REPORT_CACHE_DB, memory_bytes=REPORT_CACHE_MEMORY_BYTES,
+                 max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.memory_bytes = memory_bytes
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_cache (
+                key TEXT PRIMARY KEY,
+                pdf BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_report_cache_last_access ON report_cache(last_access)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_batches (
+                batch_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                key TEXT NOT NULL,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (batch_id, position)
+            )
+        """)
+        if "created_at" not in {row[1] for row in conn.execute("PRAGMA table_info(report_batches)")}:
+            conn.execute("ALTER TABLE report_batches ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_report_batches_created ON report_batches(created_at)")
+        conn.commit()
+
+    def _remember(self, key, pdf):
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= len(self._memory.pop(key))
+            self._memory[key] = pdf
+            self._memory_size += len(pdf)
+            while self._memory_size > self.memory_bytes and self._memory:
+                _, old = self._memory.popitem(last=False)
+                self._memory_size -= len(old)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        conn = self._conn()
+        row = conn.execute("SELECT pdf FROM report_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE report_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        self.hits += 1
+        self._remember(key, bytes(row[0]))
+        return bytes(row[0])
+
+    def put(self, key, pdf):
+        self._remember(key, pdf)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO report_cache (key, pdf, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(pdf), len(pdf), time.time()),
+        )
+        with self._lock:
+            self._puts += 1
+            check = self._puts % EVICT_CHECK_EVERY == 0
+        if check:
+            self._evict(conn)
+        conn.commit()
+
+    def _evict(self, conn):
+        """Drop least recently used reports until the table fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM report_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess, freed, stale = total - self.max_bytes, 0, []
+        for key, size in conn.execute("SELECT key, size FROM report_cache ORDER BY last_access"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM report_cache WHERE key = ?", stale)
+
+    def add_batch(self, batch_id, items):
+        """Remember which reports make up an export (with their source, to re-render after eviction)."""
+        conn = self._conn()
+        now = time.time()
+        self.purge_batches(conn)
+        conn.executemany(
+            "INSERT OR REPLACE INTO report_batches (batch_id, position, filename, key, source, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(batch_id, i, item['filename'], item['key'], json.dumps(item, default=str), now)
+             for i, item in enumerate(items)],
+        )
+        conn.commit()
+
+    def purge_batches(self, conn=None, retention=REPORT_BATCH_RETENTION):
+        """Delete export manifests older than `retention` seconds. Returns the number of rows removed."""
+        conn = conn or self._conn()
+        cursor = conn.execute("DELETE FROM report_batches WHERE created_at < ?", (time.time() - retention,))
+        return cursor.rowcount
+
+    def batch_size(self, batch_id):
+        return self._conn().execute("SELECT COUNT(*) FROM report_batches WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+
+    def iter_batch(self, batch_id, page=100):
+        """Batch items in order, fetched a page at a time."""
+        position = 0
+        while True:
+            rows = self._conn().execute(
+                "SELECT position, source FROM report_batches WHERE batch_id = ? AND position >= ? "
+                "ORDER BY position LIMIT ?",
+                (batch_id, position, page),
+            ).fetchall()
+            if not rows:
+                return
+            for _, source in rows:
+                yield json.loads(source)
+            position = rows[-1][0] + 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReportCache()
+    return _cache
+
+
+def _render_item(item):
+    return render_report(item['loan_data'], item['result'], item.get('assessment'), item.get('documents', ()))
+
+
+def cached_report(application_id, loan_data, result, assessment=None, documents=()):
+    """PDF bytes for an application, rendered at most once per (application, content hash)."""
+    cache = get_report_cache()
+    key = report_key(application_id, loan_data, result, assessment, documents)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_report(loan_data, result, assessment, documents)
+        cache.put(key, pdf)
+    return pdf
+
+
+def batch_report_items(rows, results):
+    """
+    Report sources for scored batch rows (one per applicant). The caller's id only goes
+    into the ZIP entry name as a slug, suffixed with the row's position to keep names unique.
+    """
+    items = []
+    for position, (row, scored) in enumerate(zip(rows, results), start=1):
+        loan_data = {k: v for k, v in row.items() if v is not None}
+        result = f"{scored['status']} (approval probability {scored['approval_probability']:.1%})"
+        application_id = f"batch-{scored['id']}"
+        slug = re.sub(r"[^\w.-]+", "_", str(scored['id'])).strip("._") or "applicant"
+        items.append({
+            'key': report_key(application_id, loan_data, result),
+            'filename': f"LoanAdvisor_Report_{slug}_{position}.pdf",
+            'loan_data': loan_data,
+            'result': result,
+        })
+    return items
+
+
+def queue_batch_reports(job_queue, items):
+    """
+    Register a report export and hand rendering to the job workers in chunks, so
+    several worker processes render in parallel. Past REPORT_QUEUE_DEPTH the rest is
+    left to the export, which renders missing reports itself. Returns (batch_id, job ids).
+    """
+    batch_id = uuid.uuid4().hex
+    get_report_cache().add_batch(batch_id, items)
+    job_ids = []
+    for i in range(0, len(items), REPORT_JOB_CHUNK):
+        try:
+            job_ids.append(job_queue.enqueue(RENDER_REPORTS_JOB, {'items': items[i:i + REPORT_JOB_CHUNK]},
+                                             priority=REPORT_JOB_PRIORITY, max_depth=REPORT_QUEUE_DEPTH))
+        except QueueFull:
+            break
+    return batch_id, job_ids
+
+
+def render_reports_job(payload):
+    """Job handler: render and cache a chunk of batch reports (skips ones already cached)."""
+    cache = get_report_cache()
+    rendered = 0
+    for item in payload['items']:
+        if cache.get(item['key']) is None:
+            cache.put(item['key'], _render_item(item))
+            rendered += 1
+    return {'rendered': rendered, 'total': len(payload['items'])}
+
+
+class _ZipSink:
+    """Write-only, unseekable file object; zipfile then streams entries with data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_batch_zip(batch_id):
+    """
+    Yield a ZIP of a batch's reports piece by piece. Only one report is held at a
+    time; reports not (or no longer) cached are rendered on the fly.
+    """
+    cache = get_report_cache()
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for item in cache.iter_batch(batch_id):
+            pdf = cache.get(item['key'])
+            if pdf is None:
+                pdf = _render_item(item)
+                cache.put(item['key'], pdf)
+            archive.writestr(item['filename'], pdf)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,209 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.affordability import to_amount
+from utils.preprocessing import Preprocessor
+from utils.tree_export import CompiledForest
+
+# Artifacts written by train_model.py
+MODEL_PATH = os.getenv("LOAN_MODEL_PATH", "final_xgboost_loan_model.joblib")
+PREPROCESSOR_PATH = os.getenv("LOAN_PREPROCESSOR_PATH", "loan_preprocessor.npz")
+# Memory-mapped export of the same model (utils/tree_export.py); preferred when present
+COMPILED_MODEL_PATH = os.getenv("LOAN_COMPILED_MODEL_PATH", "loan_model_compiled")
+# The NumPy forest wins on small batches; XGBoost's native predictor wins on large ones
+COMPILED_MAX_BATCH = int(os.getenv("LOAN_COMPILED_MAX_BATCH", "64"))
+
+TARGET_COLUMN = 'loan_status'
+APPROVED_LABEL = 'Approved'
+APPROVAL_THRESHOLD = 0.5
+
+# Single applications (generate_assessment): predictions cached by feature vector, and
+# a latency budget after which the caller falls back to the affordability rule
+PREDICTION_CACHE_ITEMS = int(os.getenv("PREDICTION_CACHE_ITEMS", "4096"))
+MODEL_LATENCY_BUDGET_MS = float(os.getenv("MODEL_LATENCY_BUDGET_MS", "50"))
+MODEL_THREADS = 2
+
+_model_lock = threading.Lock()
+_bundle = None
+
+
+class ModelNotAvailable(RuntimeError):
+    """Raised when the trained model artifacts are missing."""
+
+
+def load_model():
+    """
+    Load the trained model and its preprocessing artifact once per process.
+    The compiled forest is mmapped read-only, so workers share its pages instead
+    of each unpickling its own copy. Subsequent calls return the loaded bundle.
+    """
+    global _bundle
+    if _bundle is not None:
+        return _bundle
+    with _model_lock:
+        if _bundle is None:
+            has_model = os.path.exists(COMPILED_MODEL_PATH) or os.path.exists(MODEL_PATH)
+            if not has_model or not os.path.exists(PREPROCESSOR_PATH):
+                raise ModelNotAvailable(
+                    f"Model artifacts not found ({MODEL_PATH}, {PREPROCESSOR_PATH}). Run train_model.py first."
+                )
+            preprocessor = Preprocessor.load(PREPROCESSOR_PATH)
+            target_classes = preprocessor.categories.get(TARGET_COLUMN)
+            approved_index = 1
+            if target_classes is not None and APPROVED_LABEL in target_classes:
+                approved_index = int(list(target_classes).index(APPROVED_LABEL))
+            compiled = CompiledForest(COMPILED_MODEL_PATH) if os.path.exists(COMPILED_MODEL_PATH) else None
+            _bundle = {
+                'compiled': compiled,
+                'native': None if compiled is not None else joblib.load(MODEL_PATH),
+                'preprocessor': preprocessor,
+                'approved_index': approved_index,
+            }
+    return _bundle
+
+
+def prepare_features(df, bundle):
+    """
+    Apply the same preparation as train_model.py to a batch of applicants.
+    Identifier and target columns are ignored; unseen categories get the unknown code.
+    """
+    return bundle['preprocessor'].transform(df)
+
+
+def _native_model(bundle):
+    # Only large batches need the full XGBoost model; load it on first use
+    if bundle['native'] is None:
+        with _model_lock:
+            if bundle['native'] is None:
+                bundle['native'] = joblib.load(MODEL_PATH)
+    return bundle['native']
+
+
+def predict_proba(bundle, X):
+    use_compiled = bundle['compiled'] is not None and (
+        len(X) <= COMPILED_MAX_BATCH or not os.path.exists(MODEL_PATH)
+    )
+    model = bundle['compiled'] if use_compiled else _native_model(bundle)
+    return model.predict_proba(X)[:, bundle['approved_index']]
+
+
+def score_frame(df):
+    """Score a batch of applicants with one predict_proba call. Returns P(Approved) per row."""
+    bundle = load_model()
+    return predict_proba(bundle, prepare_features(df, bundle))
+
+
+def application_features(data, financials=None):
+    """
+    Map a chatbot application onto the training columns it can fill. Amounts follow
+    the training data (loan_amount in thousands); columns the chat does not ask about
+    are left out (feature_matrix turns them into NaN). Returns {column: value}.
+    """
+    financials = financials or {}
+    features = {
+        'applicant_income': to_amount(data.get('income')),
+        'coapplicant_income': to_amount(data.get('co_income')) if str(data.get('co_applicant', '')).lower() == 'yes' else 0.0,
+        'loan_amount': to_amount(data.get('loan_amnt')) / 1000.0,
+        'loan_amount_term': to_amount(data.get('loan_tenure'), default=None),
+    }
+    employment = str(data.get('employment_type', '')).lower()
+    if employment:
+        features['self_employed'] = 'No' if employment == 'salaried' else 'Yes'
+    if financials.get('net_salary'):
+        features['net_salary_avg6m'] = float(financials['net_salary'])
+    return {k: v for k, v in features.items() if v is not None}
+
+
+def feature_matrix(features, preprocessor):
+    """
+    One-row model input for application_features(). Absent columns are NaN, which
+    XGBoost treats as missing; encoding them would give categoricals the unknown
+    code -1, a real value the trees split on like the lowest category.
+    """
+    df = pd.DataFrame({col: [features.get(col)] for col in preprocessor.columns})
+    X = preprocessor.transform(df)
+    absent = [j for j, col in enumerate(preprocessor.columns) if features.get(col) is None]
+    X[:, absent] = np.nan
+    return X
+
+
+class PredictionCache:
+    """Bounded LRU of P(Approved) keyed by the normalised feature vector."""
+
+    def __init__(self, max_items=PREDICTION_CACHE_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, probability):
+        with self._lock:
+            self._items[key] = probability
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+prediction_cache = PredictionCache()
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _model_executor():
+    global _executor, _executor_pid
+    # Threads do not survive fork; build a fresh pool per process
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor_pid = os.getpid()
+                _executor = ThreadPoolExecutor(max_workers=MODEL_THREADS)
+    return _executor
+
+
+def _predict_features(key, features):
+    bundle = load_model()
+    probability = float(predict_proba(bundle, feature_matrix(features, bundle['preprocessor']))[0])
+    # Cached even when the caller stopped waiting, so the next identical profile hits
+    prediction_cache.put(key, probability)
+    return probability
+
+
+def score_application(data, financials=None, budget_ms=MODEL_LATENCY_BUDGET_MS):
+    """
+    P(Approved) for one application: {'probability', 'source', 'note'}. source is
+    'cache' or 'model', or 'rule' with probability None when the model is missing,
+    fails or misses the latency budget (it still finishes and fills the cache, which
+    also covers the first call that has to load the model).
+    """
+    features = application_features(data, financials)
+    key = tuple(sorted(features.items()))
+    probability = prediction_cache.get(key)
+    if probability is not None:
+        return {'probability': probability, 'source': 'cache', 'note': None}
+    future = _model_executor().submit(_predict_features, key, features)
+    try:
+        return {'probability': future.result(timeout=budget_ms / 1000.0), 'source': 'model', 'note': None}
+    except FutureTimeout:
+        return {'probability': None, 'source': 'rule', 'note': f"model slower than {budget_ms:.0f} ms"}
+    except ModelNotAvailable:
+        return {'probability': None, 'source': 'rule', 'note': "model not available"}
+    except Exception as e:
+        print(f"Model scoring failed: {e}")
+        return {'probability': None, 'source': 'rule', 'note': "model error"}
@@ -0,0 +1,174 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+# Server-side sessions: the cookie carries only a signed session id, the data lives
+# in SQLite (database.db) with an in-process LRU in front of it.
+SESSION_DB = os.getenv("SESSION_DB", "database.db")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+SESSION_CACHE_ITEMS = int(os.getenv("SESSION_CACHE_ITEMS", "1024"))
+SESSION_CLEANUP_INTERVAL = 300
+
+
+class SqliteSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, version=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.version = version
+        self.new = new
+        self.modified = False
+
+
+class SqliteSessionInterface(SessionInterface):
+    """
+    Flask session interface storing session dicts in a `sessions` table.
+
+    Each row carries a version token. Cached entries are revalidated with a single
+    indexed lookup that only returns the payload when another worker changed it,
+    so the hot read-modify-write of a chat turn skips the blob read and the JSON
+    decode. The cache holds the decoded dict pickled: unpickling is several times
+    cheaper than the tagged-JSON decode and gives each request its own copy.
+    """
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, db_path=SESSION_DB, ttl=SESSION_TTL, cache_items=SESSION_CACHE_ITEMS):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.cache_items = cache_items
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        self._init_db()
+
+    def _conn(self):
+        # One connection per thread, reused across requests
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                version TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+        conn.commit()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="server-session-id", key_derivation="hmac")
+
+    def _cached(self, sid):
+        with self._lock:
+            entry = self._cache.get(sid)
+            if entry is not None:
+                self._cache.move_to_end(sid)
+            return entry
+
+    def _remember(self, sid, version, data):
+        with self._lock:
+            self._cache[sid] = (version, data)
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_items:
+                self._cache.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    def _load(self, sid):
+        """Return (version, data dict) or None when the session is missing or expired."""
+        cached = self._cached(sid)
+        cached_version = cached[0] if cached else None
+        row = self._conn().execute(
+            "SELECT version, expires_at, CASE WHEN version = ? THEN NULL ELSE data END FROM sessions WHERE sid = ?",
+            (cached_version, sid),
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            self._forget(sid)
+            return None
+        version, _, payload = row
+        if payload is None:
+            return version, pickle.loads(cached[1])
+        data = self.serializer.loads(payload)
+        self._remember(sid, version, pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        return version, data
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                loaded = self._load(sid)
+                if loaded is not None:
+                    version, data = loaded
+                    return SqliteSession(data, sid=sid, version=version)
+        return SqliteSession(sid=uuid.uuid4().hex, new=True)
+
+    def _cleanup(self, conn):
+        """Drop expired sessions, at most once per SESSION_CLEANUP_INTERVAL per process."""
+        now = time.time()
+        if now - self._last_cleanup < SESSION_CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        conn = self._conn()
+
+        if not session:
+            if session.modified and not session.new:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                conn.commit()
+                self._forget(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified or session.new:
+            data = dict(session)
+            payload = self.serializer.dumps(data)
+            version = uuid.uuid4().hex
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, version, expires_at) VALUES (?, ?, ?, ?)",
+                (session.sid, payload, version, time.time() + self.ttl),
+            )
+            self._cleanup(conn)
+            conn.commit()
+            self._remember(session.sid, version, pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+        if self.should_set_cookie(app, session) or session.new:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
@@ -0,0 +1,329 @@
+import multiprocessing
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from utils import ocr_utils
+
+try:
+    # Optional: PDF text layer and page rasterization
+    import pymupdf
+except Exception:  # pragma: no cover - environment-dependent
+    try:
+        import fitz as pymupdf
+    except Exception:
+        pymupdf = None
+
+# Pages with fewer characters than this in their text layer are treated as scans and OCRed
+MIN_TEXT_CHARS = 20
+# Rasterization resolution for image-only pages
+OCR_DPI = int(os.getenv("STATEMENT_OCR_DPI", "200"))
+STATEMENT_OCR_WORKERS = int(os.getenv("STATEMENT_OCR_WORKERS", str(os.cpu_count() or 1)))
+# Words whose vertical centres are this close (in points) belong to the same table row
+_ROW_TOLERANCE = 3.0
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+_DATE_RE = re.compile(r"^(\d{1,2}[-/ ](?:\d{1,2}|[A-Za-z]{3,9})[-/ ]\d{2,4})\s+(.*)$")
+_DATE_FORMATS = ("%d-%b-%Y", "%d-%b-%y", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d-%m-%y",
+                 "%d %b %Y", "%d %B %Y", "%d-%B-%Y")
+# Money always carries paise in statements and slips; this keeps dates and ids out
+_AMOUNT_RE = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{2,3})+|\d+)\.(\d{2})(?!\d)")
+_SALARY_RE = re.compile(r"\b(salary|sal cr|payroll|sal)\b", re.IGNORECASE)
+_EMI_RE = re.compile(r"\b(emi|loan|nach|ecs|ach|si)\b", re.IGNORECASE)
+_CREDIT_HINT_RE = re.compile(r"\b(credit|cr|deposit|interest|refund|salary)\b", re.IGNORECASE)
+_OPENING_RE = re.compile(r"\bopening balance\b", re.IGNORECASE)
+_NET_PAY_RE = re.compile(r"\bnet\s*(pay|salary|amount|take\s*home)\b", re.IGNORECASE)
+_TOTAL_ROW_RE = re.compile(r"^\s*(total|net)\b", re.IGNORECASE)
+
+
+def _parse_amounts(text):
+    return [float(whole.replace(",", "") + "." + frac) for whole, frac in _AMOUNT_RE.findall(text)]
+
+
+def _parse_date(text):
+    cleaned = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _description_key(description):
+    """Normalised description for spotting the same debit across months (ids and dates removed)."""
+    return re.sub(r"\s+", " ", re.sub(r"[\d#/:-]+", " ", description.lower())).strip()
+
+
+# ---------------------------------------------------------------------------
+# Page streaming
+# ---------------------------------------------------------------------------
+
+def _text_rows(page):
+    """Rebuild visual rows from the text layer: word boxes grouped by vertical centre."""
+    words = sorted(page.get_text("words"), key=lambda w: ((w[1] + w[3]) / 2, w[0]))
+    rows = []
+    for word in words:
+        centre = (word[1] + word[3]) / 2
+        if rows and abs(rows[-1][0] - centre) <= _ROW_TOLERANCE:
+            rows[-1][1].append(word)
+        else:
+            rows.append((centre, [word]))
+    return [" ".join(w[4] for w in sorted(row, key=lambda w: w[0])) for _, row in rows]
+
+
+def _ocr_rows(image):
+    return [" ".join(word for word, _ in line) for line in ocr_utils.ocr_lines_many([image])[0]]
+
+
+def _ocr_pdf_page(path, index, dpi=OCR_DPI):
+    """Pool task: rasterize one page in the worker (only the path crosses the process boundary)."""
+    with pymupdf.open(path) as doc:
+        pix = doc[index].get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    return _ocr_rows(image)
+
+
+def _init_page_worker():
+    # Pages are already spread over this pool; each worker OCRs in-process
+    ocr_utils.OCR_POOL_SIZE = 0
+    ocr_utils._engine = None
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _page_executor():
+    """
+    Shared pool for page OCR. Daemonic processes (the job workers) may not fork
+    children, so there a thread pool is used; pytesseract waits on a subprocess
+    with the GIL released, so pages still OCR in parallel.
+    """
+    global _executor, _executor_pid
+    # A pool inherited through fork is unusable in the child; build a fresh one per process
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor_pid = os.getpid()
+                if multiprocessing.current_process().daemon:
+                    _executor = ThreadPoolExecutor(max_workers=STATEMENT_OCR_WORKERS)
+                else:
+                    _executor = ProcessPoolExecutor(max_workers=STATEMENT_OCR_WORKERS,
+                                                    initializer=_init_page_worker)
+    return _executor
+
+
+def _done(rows):
+    future = Future()
+    future.set_result(rows)
+    return future
+
+
+def iter_page_rows(path, dpi=OCR_DPI):
+    """
+    Yield (page_number, rows, source) in page order, one page at a time.
+    Pages with a text layer are read directly; image-only pages are OCRed in the
+    pool. At most 2x workers pages are in flight, so memory stays flat on long
+    statements.
+    """
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        yield 0, _ocr_rows(Image.open(path)), "ocr"
+        return
+    if pymupdf is None:
+        raise RuntimeError("PyMuPDF is not installed; cannot read PDF documents")
+
+    window = 2 * max(1, STATEMENT_OCR_WORKERS)
+    pending = deque()
+    with pymupdf.open(path) as doc:
+        for index in range(doc.page_count):
+            page = doc[index]
+            if len(page.get_text("text").strip()) >= MIN_TEXT_CHARS:
+                pending.append((index, _done(_text_rows(page)), "text"))
+            else:
+                pending.append((index, _page_executor().submit(_ocr_pdf_page, path, index, dpi), "ocr"))
+            del page
+            # Hand back finished pages in order; block only when the window is full
+            while pending and (pending[0][1].done() or len(pending) >= window):
+                number, future, source = pending.popleft()
+                yield number, future.result(), source
+    while pending:
+        number, future, source = pending.popleft()
+        yield number, future.result(), source
+
+
+# ---------------------------------------------------------------------------
+# Field extraction
+# ---------------------------------------------------------------------------
+
+class _StatementSummary:
+    """Running aggregates over transaction rows; nothing per-page is retained."""
+
+    def __init__(self):
+        self.previous_balance = None
+        self.daily_balance = {}
+        self.salary_credits = {}
+        self.emi_debits = {}
+        self.months = set()
+        self.transactions = 0
+
+    def add_row(self, row):
+        match = _DATE_RE.match(row.strip())
+        if not match:
+            return
+        day = _parse_date(match.group(1))
+        if day is None:
+            return
+        self.months.add((day.year, day.month))
+        rest = match.group(2)
+        amounts = _parse_amounts(rest)
+        if not amounts:
+            return
+        first = _AMOUNT_RE.search(rest)
+        description = rest[:first.start()].strip()
+
+        if len(amounts) == 1 and _OPENING_RE.search(description):
+            self.previous_balance = amounts[0]
+            self.daily_balance[day] = amounts[0]
+            return
+        amount = amounts[-2] if len(amounts) >= 2 else amounts[0]
+        balance = amounts[-1] if len(amounts) >= 2 else None
+
+        # The balance movement is the reliable debit/credit signal once columns are flattened
+        if balance is not None and self.previous_balance is not None:
+            is_credit = balance > self.previous_balance
+        else:
+            is_credit = bool(_CREDIT_HINT_RE.search(description))
+        if balance is not None:
+            self.previous_balance = balance
+            self.daily_balance[day] = balance
+        self.transactions += 1
+
+        month = (day.year, day.month)
+        if is_credit and _SALARY_RE.search(description):
+            self.salary_credits[month] = self.salary_credits.get(month, 0.0) + amount
+        elif not is_credit and _EMI_RE.search(description):
+            key = (_description_key(description), round(amount))
+            entry = self.emi_debits.setdefault(key, {"description": description, "amount": amount, "months": set()})
+            entry["months"].add(month)
+
+    def average_balance(self):
+        """Day-weighted average: each day carries the last closing balance forward."""
+        if not self.daily_balance:
+            return None
+        days = sorted(self.daily_balance)
+        total, count = 0.0, 0
+        current = self.daily_balance[days[0]]
+        day = days[0]
+        while day <= days[-1]:
+            current = self.daily_balance.get(day, current)
+            total += current
+            count += 1
+            day += timedelta(days=1)
+        return round(total / count, 2)
+
+    def result(self):
+        """
+        Only EMI-like debits seen in two or more months count towards monthly_emi when the
+        statement spans several months; one-offs are still listed under emi_debits.
+        """
+        salaries = list(self.salary_credits.values())
+        multi_month = len(self.months) >= 2
+        emis = [
+            {"description": e["description"], "amount": e["amount"], "months": len(e["months"]),
+             "recurring": len(e["months"]) >= 2 or not multi_month}
+            for e in self.emi_debits.values()
+        ]
+        return {
+            "net_salary": round(sum(salaries) / len(salaries), 2) if salaries else None,
+            "salary_months": len(salaries),
+            "emi_debits": emis,
+            "monthly_emi": round(sum(e["amount"] for e in emis if e["recurring"]), 2),
+            "average_balance": self.average_balance(),
+            "transactions": self.transactions,
+        }
+
+
+def _net_pay(rows):
+    """
+    Net pay from a salary slip: an amount on the "Net Pay/Salary/Amount" line itself,
+    or, when that label is a column header, the last amount on the following Total/Net row.
+    """
+    label_seen = False
+    for row in rows:
+        label = _NET_PAY_RE.search(row)
+        if label:
+            amounts = _parse_amounts(row[label.end():])
+            if amounts:
+                return amounts[0]
+            label_seen = True
+            continue
+        if label_seen and _TOTAL_ROW_RE.match(row):
+            amounts = _parse_amounts(row)
+            if amounts:
+                return amounts[-1]
+    return None
+
+
+def parse_bank_statement(path):
+    """Net salary credits, recurring EMI debits and average balance from a bank statement."""
+    summary = _StatementSummary()
+    pages = ocr_pages = 0
+    for _, rows, source in iter_page_rows(path):
+        pages += 1
+        ocr_pages += source == "ocr"
+        for row in rows:
+            summary.add_row(row)
+    result = summary.result()
+    result.update(pages=pages, ocr_pages=ocr_pages)
+    return result
+
+
+def parse_salary_slip(path):
+    """Net take-home pay from a salary slip (first page that states it)."""
+    pages = ocr_pages = 0
+    net_salary = None
+    for _, rows, source in iter_page_rows(path):
+        pages += 1
+        ocr_pages += source == "ocr"
+        if net_salary is None:
+            net_salary = _net_pay(rows)
+    return {"net_salary": net_salary, "pages": pages, "ocr_pages": ocr_pages}
+
+
+def extract_financials(uploaded_files):
+    """
+    Parse the uploaded 'salary' and 'bank' documents into one summary for the assessment.
+    A salary slip's net pay takes precedence over salary credits seen on the statement.
+    Documents that fail to parse are reported under 'errors' instead of raising.
+    """
+    financials = {"net_salary": None, "salary_source": None, "monthly_emi": None,
+                  "emi_debits": [], "average_balance": None, "errors": {}}
+    if "bank" in uploaded_files:
+        try:
+            statement = parse_bank_statement(uploaded_files["bank"])
+            financials.update(
+                monthly_emi=statement["monthly_emi"],
+                emi_debits=statement["emi_debits"],
+                average_balance=statement["average_balance"],
+            )
+            if statement["net_salary"] is not None:
+                financials.update(net_salary=statement["net_salary"], salary_source="bank")
+        except Exception as e:
+            print(f"Error parsing bank statement: {e}")
+            financials["errors"]["bank"] = str(e)
+    if "salary" in uploaded_files:
+        try:
+            slip = parse_salary_slip(uploaded_files["salary"])
+            if slip["net_salary"] is not None:
+                financials.update(net_salary=slip["net_salary"], salary_source="salary_slip")
+        except Exception as e:
+            print(f"Error parsing salary slip: {e}")
+            financials["errors"]["salary"] = str(e)
+    return financials
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Content-addressed document storage: uploads/objects/<aa>/<sha256><ext>, plus a SQLite
+# index from application id to its documents so lookups never scan directories.
+UPLOAD_ROOT = os.getenv("UPLOAD_ROOT", "uploads")
+STORAGE_DB = os.getenv("STORAGE_DB", "database.db")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "16")) * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an uploaded file exceeds MAX_UPLOAD_BYTES."""
+
+
+def _extension(filename):
+    # The extension stays on the object name; parsers pick PDF vs image handling from it
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext.replace(".", "").isalnum() and len(ext) <= 8 else ""
+
+
+class DocumentStore:
+    def __init__(self, root=UPLOAD_ROOT, db_path=STORAGE_DB, max_bytes=MAX_UPLOAD_BYTES):
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(self.objects_dir, "tmp")
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS application_documents (
+                application_id TEXT NOT NULL,
+                field TEXT NOT NULL,
+                document_id TEXT NOT NULL REFERENCES documents(id),
+                filename TEXT NOT NULL,
+                uploaded_at REAL NOT NULL,
+                PRIMARY KEY (application_id, field)
+            )
+        """)
+        conn.commit()
+
+    def _write_object(self, stream, ext):
+        """Copy the stream to a temp file in chunks, hashing as it goes; enforce the size cap."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f"File exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit")
+                    digest.update(chunk)
+                    out.write(chunk)
+            document_id = digest.hexdigest() + ext
+            path = os.path.join(self.objects_dir, document_id[:2], document_id)
+            if os.path.exists(path):
+                os.remove(tmp_path)  # identical document already stored
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return document_id, path, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save(self, application_id, field, stream, filename):
+        """
+        Store one uploaded file for an application. Re-uploading the same field
+        replaces the link; the object itself is shared by every application
+        that uploaded identical bytes. Returns the stored path.
+        """
+        document_id, path, size = self._write_object(stream, _extension(filename))
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR IGNORE INTO documents (id, path, size, created_at) VALUES (?, ?, ?, ?)",
+            (document_id, path, size, now),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO application_documents (application_id, field, document_id, filename, uploaded_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (application_id, field, document_id, os.path.basename(filename or field), now),
+        )
+        conn.commit()
+        return path
+
+    def documents_for(self, application_id):
+        """Documents linked to one application, oldest upload first."""
+        rows = self._conn().execute(
+            "SELECT a.field, a.filename, a.document_id, d.path, d.size, a.uploaded_at "
+            "FROM application_documents a JOIN documents d ON d.id = a.document_id "
+            "WHERE a.application_id = ? ORDER BY a.uploaded_at",
+            (application_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def paths_for(self, application_id):
+        """{field: path} for an application, the shape verify_documents expects."""
+        return {doc["field"]: doc["path"] for doc in self.documents_for(application_id)}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_document_store():
+    """Process-wide store instance."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DocumentStore()
+    return _store
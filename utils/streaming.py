@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+from utils.dataset_cache import iter_chunks
+from utils.preprocessing import Preprocessor
+
+ID_COLUMNS = ['id', 'applicant_name']
+TARGET_COLUMNS = ['eligibility_score', 'loan_status']
+LABEL_COLUMN = 'loan_status'
+DEFAULT_CHUNK_SIZE = 100_000
+TEST_PERCENT = 20
+
+
+def iter_source_chunks(source, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (first_row_number, DataFrame) chunks without loading the whole source.
+    CSVs are read with pandas' chunked reader; workbooks go through the columnar
+    cache once and are then sliced from the memory-mapped columns.
+    """
+    if source.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+        chunks = iter_chunks(source, chunksize)
+    else:
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    start = 0
+    for chunk in chunks:
+        yield start, chunk
+        start += len(chunk)
+
+
+def _is_test_row(row_numbers):
+    """Deterministic ~TEST_PERCENT% holdout from a hash of the global row number."""
+    h = row_numbers.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    h ^= h >> np.uint64(31)
+    return (h % np.uint64(100)) < TEST_PERCENT
+
+
+def _clean_chunk(chunk):
+    return chunk.drop(columns=[c for c in ID_COLUMNS if c in chunk.columns]).dropna()
+
+
+class ChunkIter(xgb.DataIter):
+    """Feeds encoded chunks to XGBoost one at a time (external-memory DMatrix)."""
+
+    def __init__(self, source, preprocessor, split, chunksize, cache_prefix):
+        self._source = source
+        self._preprocessor = preprocessor
+        self._split = split
+        self._chunksize = chunksize
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def _encoded(self):
+        for start, chunk in iter_source_chunks(self._source, self._chunksize):
+            rows = np.arange(start, start + len(chunk))
+            keep = _is_test_row(rows) if self._split == 'test' else ~_is_test_row(rows)
+            chunk = _clean_chunk(chunk[keep])
+            if chunk.empty:
+                continue
+            X = self._preprocessor.transform(chunk)
+            raw = chunk[LABEL_COLUMN].to_numpy()
+            y = self._preprocessor.encode_column(LABEL_COLUMN, raw)
+            # Unseen labels encode to UNKNOWN_CODE; binary:logistic would take them as targets
+            bad = (y != 0) & (y != 1)
+            if bad.any():
+                raise ValueError(f"{LABEL_COLUMN} must encode to 0 or 1; got {sorted({str(v) for v in raw[bad]})} "
+                                 f"in the chunk starting at row {start}")
+            yield X, y
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = self._encoded()
+        batch = next(self._chunks, None)
+        if batch is None:
+            return False
+        X, y = batch
+        input_data(data=X, label=y, feature_names=self._preprocessor.columns)
+        return True
+
+    def reset(self):
+        self._chunks = None
+
+
+def fit_preprocessor(source, chunksize=DEFAULT_CHUNK_SIZE):
+    """One streaming pass to collect category sets when no artifact exists yet."""
+    chunks = (_clean_chunk(chunk) for _, chunk in iter_source_chunks(source, chunksize))
+    return Preprocessor.fit_chunks(chunks, target_columns=TARGET_COLUMNS)
+
+
+def train_streaming(source, params, preprocessor_path,
+                    chunksize=DEFAULT_CHUNK_SIZE, cache_dir=None):
+    """
+    Out-of-core counterpart of train_model.main(): peak memory is about one
+    encoded chunk plus XGBoost's compressed external-memory pages, instead of
+    several full pandas copies of the dataset.
+    """
+    if os.path.exists(preprocessor_path):
+        preprocessor = Preprocessor.load(preprocessor_path)
+        print(f"Encoding with persisted preprocessor {preprocessor_path}")
+    else:
+        preprocessor = fit_preprocessor(source, chunksize)
+        preprocessor.save(preprocessor_path)
+        print(f"Fitted preprocessor in one streaming pass; saved to {preprocessor_path}")
+
+    own_cache_dir = cache_dir is None
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix='xgb-extmem-')
+    train_iter = ChunkIter(source, preprocessor, 'train', chunksize, os.path.join(cache_dir, 'train'))
+    dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=256)
+
+    booster_params = {
+        'objective': 'binary:logistic',
+        'eval_metric': 'logloss',
+        'tree_method': 'hist',
+        'max_depth': int(params['max_depth']),
+        'learning_rate': params['learning_rate'],
+        'gamma': params['gamma'],
+        'subsample': params['subsample'],
+        'seed': 42,
+    }
+    booster = xgb.train(booster_params, dtrain, num_boost_round=int(params['n_estimators']))
+
+    # Evaluate on the hashed holdout chunk by chunk; only labels and scores are kept
+    labels, scores = [], []
+    for X, y in ChunkIter(source, preprocessor, 'test', chunksize, None)._encoded():
+        scores.append(booster.inplace_predict(X))
+        labels.append(y)
+    if labels:
+        y_test, p_test = np.concatenate(labels), np.concatenate(scores)
+        print(f"Streaming holdout accuracy: {accuracy_score(y_test, p_test >= 0.5):.4f}")
+        if len(np.unique(y_test)) > 1:
+            print(f"Streaming holdout ROC AUC: {roc_auc_score(y_test, p_test):.4f}")
+
+    # Wrap the booster so utils/scoring.py can keep calling predict_proba
+    booster_path = os.path.join(cache_dir, 'booster.json')
+    booster.save_model(booster_path)
+    model = xgb.XGBClassifier()
+    model.load_model(booster_path)
+    del dtrain, train_iter  # releases the external-memory pages before cleanup
+    if own_cache_dir:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return model, preprocessor
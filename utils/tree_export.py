@@ -0,0 +1,134 @@
+import json
+import os
+from collections import deque
+
+import numpy as np
+
+# Flattened tree-ensemble format: one .npy per node attribute plus meta.json.
+# Every file is loaded with mmap_mode='r', so gunicorn workers share the pages.
+META_NAME = "meta.json"
+NODE_ARRAYS = ("feature", "threshold", "left", "right", "default_left", "value", "roots")
+
+
+def _base_margin(booster):
+    """Global bias in margin space, from the booster's saved config."""
+    config = json.loads(booster.save_config())
+    learner = config["learner"]
+    raw = learner["learner_model_param"]["base_score"].strip("[]").split(",")[0]
+    base_score = float(raw)
+    objective = learner["objective"]["name"]
+    if objective in ("binary:logistic", "reg:logistic"):
+        base_score = min(max(base_score, 1e-7), 1 - 1e-7)
+        return float(np.log(base_score / (1 - base_score))), objective
+    return base_score, objective
+
+
+def export_model(model, out_dir):
+    """
+    Flatten a trained XGBoost model (XGBClassifier or Booster) into contiguous arrays:
+    feature, threshold, left, right, default_left (missing direction), leaf value and
+    the root index of every tree. Nodes are laid out breadth-first with siblings
+    adjacent (right == left + 1). Leaves point to themselves with an +inf threshold,
+    so evaluation runs a fixed number of levels without branching on "is leaf".
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    frame = booster.trees_to_dataframe()
+    feature_names = list(booster.feature_names or [])
+    if not feature_names:
+        feature_names = [f"f{i}" for i in range(int(booster.num_features()))]
+    feature_index = {name: i for i, name in enumerate(feature_names)}
+    nodes = {row.ID: row for row in frame.itertuples(index=False)}
+    n_nodes = len(nodes)
+
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    threshold = np.full(n_nodes, np.inf, dtype=np.float32)
+    left = np.zeros(n_nodes, dtype=np.int32)
+    right = np.zeros(n_nodes, dtype=np.int32)
+    default_left = np.ones(n_nodes, dtype=bool)
+    value = np.zeros(n_nodes, dtype=np.float32)
+    roots = []
+    max_depth = 0
+
+    position = 0
+    for tree in sorted(frame["Tree"].unique()):
+        root = f"{tree}-0"
+        roots.append(position)
+        queue = deque([(root, position, 0)])
+        position += 1
+        while queue:
+            node_id, i, depth = queue.popleft()
+            node = nodes[node_id]
+            if node.Feature == "Leaf":
+                left[i] = right[i] = i
+                value[i] = node.Gain
+                max_depth = max(max_depth, depth)
+                continue
+            feature[i] = feature_index[node.Feature]
+            threshold[i] = node.Split
+            default_left[i] = node.Missing == node.Yes
+            left[i], right[i] = position, position + 1
+            queue.append((node.Yes, position, depth + 1))
+            queue.append((node.No, position + 1, depth + 1))
+            position += 2
+    base_margin, objective = _base_margin(booster)
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = dict(feature=feature, threshold=threshold, left=left, right=right,
+                  default_left=default_left, value=value, roots=np.asarray(roots, dtype=np.int32))
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+    meta = {
+        "feature_names": feature_names,
+        "n_trees": len(roots),
+        "n_nodes": n_nodes,
+        "max_depth": max_depth,
+        "base_margin": base_margin,
+        "objective": objective,
+    }
+    with open(os.path.join(out_dir, META_NAME), "w") as fh:
+        json.dump(meta, fh, indent=2)
+    return meta
+
+
+class CompiledForest:
+    """
+    Pure-NumPy predictor over an exported forest. All trees of a batch advance
+    one level per step, so a prediction costs max_depth vectorized gathers.
+    """
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, META_NAME)) as fh:
+            self.meta = json.load(fh)
+        mode = "r" if mmap else None
+        for name in NODE_ARRAYS:
+            # np.asarray drops the memmap subclass (and its per-call overhead) but keeps the shared pages
+            setattr(self, name, np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)))
+        self.feature_names = self.meta["feature_names"]
+        self.max_depth = self.meta["max_depth"]
+        self.base_margin = self.meta["base_margin"]
+
+    def predict_margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = np.ascontiguousarray(X).ravel()
+        # One slot per (row, tree); row_base turns a feature id into an offset in flat_X
+        idx = np.tile(self.roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_base + self.feature.take(idx))
+            go_left = x < self.threshold.take(idx)
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left.take(idx), go_left)
+            # Leaves have threshold +inf and left == self, so they stay put
+            idx = self.left.take(idx) + ~go_left
+        margins = self.value.take(idx).reshape(n_rows, n_trees).sum(axis=1, dtype=np.float64)
+        return margins + self.base_margin
+
+    def predict_proba(self, X):
+        """Same layout as XGBClassifier.predict_proba for binary models: [P(0), P(1)]."""
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
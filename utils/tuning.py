@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+try:
+    # Optional dependency: bayes_opt (BayesianOptimization)
+    from bayes_opt import BayesianOptimization
+except Exception:  # pragma: no cover - environment-dependent
+    BayesianOptimization = None
+
+TRIALS_PATH = "tuning_trials.jsonl"
+BEST_PARAMS_PATH = "best_params.json"
+FOLDS_PATH = "cv_folds.npz"
+EARLY_STOPPING_ROUNDS = 20
+# Share of each training fold held out to pick the number of rounds, so the fold's
+# validation part (which gives the AUC) never steers early stopping
+EARLY_STOPPING_FRACTION = 0.2
+INTEGER_PARAMS = ("max_depth", "n_estimators")
+
+# Per-process state, filled once by _init_worker instead of pickling the data per candidate
+_worker = {}
+
+
+def _digest(*arrays):
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype}{a.shape}".encode("utf-8"))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def search_fingerprint(X, y, pbounds):
+    """Identifies the data and search space a trial was scored on; resumed trials must match."""
+    h = hashlib.sha256(_digest(X, y).encode("utf-8"))
+    space = {"pbounds": {k: list(v) for k, v in pbounds.items()}, "early_stopping_fraction": EARLY_STOPPING_FRACTION}
+    h.update(json.dumps(space, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def make_folds(y, n_splits=3, random_state=42, path=FOLDS_PATH):
+    """
+    Compute stratified CV fold indices once and reuse them for every candidate:
+    (fit, early-stopping, validation) index triples, the first two splitting the
+    fold's training part. They are saved so a resumed search scores new points on
+    the same folds, and recomputed when the labels change.
+    """
+    y_digest = _digest(y)
+    if path and os.path.exists(path):
+        with np.load(path) as data:
+            if ("y_digest" in data.files and str(data["y_digest"]) == y_digest
+                    and int(data["n_splits"]) == n_splits and "stop_0" in data.files
+                    and float(data["early_stopping_fraction"]) == EARLY_STOPPING_FRACTION):
+                return [(data[f"train_{i}"], data[f"stop_{i}"], data[f"valid_{i}"]) for i in range(n_splits)]
+
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = []
+    for train_idx, valid_idx in skf.split(np.zeros(len(y)), y):
+        fit_idx, stop_idx = train_test_split(train_idx, test_size=EARLY_STOPPING_FRACTION,
+                                             random_state=random_state, stratify=y[train_idx])
+        folds.append((np.sort(fit_idx), np.sort(stop_idx), valid_idx))
+    if path:
+        arrays = {"n_rows": len(y), "n_splits": n_splits, "y_digest": y_digest,
+                  "early_stopping_fraction": EARLY_STOPPING_FRACTION}
+        for i, (fit_idx, stop_idx, valid_idx) in enumerate(folds):
+            arrays[f"train_{i}"] = fit_idx
+            arrays[f"stop_{i}"] = stop_idx
+            arrays[f"valid_{i}"] = valid_idx
+        np.savez(path, **arrays)
+    return folds
+
+
+def _init_worker(X, y, folds, nthread):
+    _worker.update(X=X, y=y, folds=folds, nthread=nthread)
+
+
+def _clean_params(params):
+    return {k: int(round(v)) if k in INTEGER_PARAMS else float(v) for k, v in params.items()}
+
+
+def evaluate_candidate(params):
+    """
+    Mean ROC AUC over the cached folds. Each fold stops early on its own held-out
+    slice of the training part and is scored on its untouched validation part.
+    """
+    params = _clean_params(params)
+    X, y, folds = _worker["X"], _worker["y"], _worker["folds"]
+    booster_params = {
+        "objective": "binary:logistic",
+        "eval_metric": "logloss",
+        "max_depth": params["max_depth"],
+        "learning_rate": params["learning_rate"],
+        "gamma": params["gamma"],
+        "subsample": params["subsample"],
+        "nthread": _worker["nthread"],
+        "seed": 42,
+    }
+    aucs, rounds = [], []
+    for fit_idx, stop_idx, valid_idx in folds:
+        dtrain = xgb.DMatrix(X[fit_idx], label=y[fit_idx], nthread=_worker["nthread"])
+        dstop = xgb.DMatrix(X[stop_idx], label=y[stop_idx], nthread=_worker["nthread"])
+        dvalid = xgb.DMatrix(X[valid_idx], label=y[valid_idx], nthread=_worker["nthread"])
+        booster = xgb.train(
+            booster_params, dtrain,
+            num_boost_round=params["n_estimators"],
+            evals=[(dstop, "early_stopping")],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            verbose_eval=False,
+        )
+        best = booster.best_iteration + 1
+        preds = booster.predict(dvalid, iteration_range=(0, best))
+        aucs.append(roc_auc_score(y[valid_idx], preds))
+        rounds.append(best)
+    return float(np.mean(aucs)), int(np.mean(rounds))
+
+
+def load_trials(path=TRIALS_PATH, fingerprint=None):
+    """
+    Read the append-only trial log written by previous (possibly interrupted) runs.
+    With a fingerprint, trials scored on other data or another search space are skipped.
+    """
+    trials = []
+    if os.path.exists(path):
+        with open(path) as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    trials.append(json.loads(line))
+                except ValueError:
+                    # A run killed mid-write can leave a truncated last line
+                    continue
+    if fingerprint is not None:
+        matching = [t for t in trials if t.get("fingerprint") == fingerprint]
+        if len(matching) < len(trials):
+            print(f"Ignoring {len(trials) - len(matching)} trials in {path} from a different dataset or search space")
+        trials = matching
+    return trials
+
+
+def _append_trial(path, trial):
+    with open(path, "a") as fh:
+        fh.write(json.dumps(trial) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _random_points(pbounds, n, rng):
+    return [{k: float(rng.uniform(lo, hi)) for k, (lo, hi) in pbounds.items()} for _ in range(n)]
+
+
+def _suggest_batch(pbounds, trials, n, rng, init_points):
+    """
+    Propose n points to evaluate in parallel. After the random warm-up this
+    refits the GP on all finished trials and uses a pessimistic "constant liar"
+    for points already in the batch, so the proposals spread out.
+    """
+    if BayesianOptimization is None or len(trials) < init_points:
+        return _random_points(pbounds, n, rng)
+
+    lie = min(t["target"] for t in trials)
+    batch = []
+    for _ in range(n):
+        optimizer = BayesianOptimization(
+            f=None, pbounds=pbounds, random_state=int(rng.integers(1 << 31)),
+            verbose=0, allow_duplicate_points=True,
+        )
+        for t in trials:
+            optimizer.register(params=t["params"], target=t["target"])
+        for point in batch:
+            optimizer.register(params=point, target=lie)
+        batch.append({k: float(v) for k, v in optimizer.suggest().items()})
+    return batch
+
+
+def run_search(X, y, pbounds, n_iter=25, init_points=5, n_workers=None,
+               trials_path=TRIALS_PATH, best_params_path=BEST_PARAMS_PATH, folds_path=FOLDS_PATH):
+    """
+    Parallel, resumable Bayesian search. Trials already in `trials_path` count
+    towards `n_iter`, so rerunning after an interruption continues the search.
+    Workers share the cores: n_workers * nthread never exceeds the CPU count.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    folds = make_folds(y, path=folds_path)
+    fingerprint = search_fingerprint(X, y, pbounds)
+    trials = load_trials(trials_path, fingerprint)
+    if trials:
+        print(f"Resuming search with {len(trials)} completed trials from {trials_path}")
+
+    cpus = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers or cpus, cpus))
+    nthread = max(1, cpus // n_workers)
+    rng = np.random.default_rng(42 + len(trials))
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(X, y, folds, nthread)) as pool:
+        while len(trials) < n_iter:
+            batch = _suggest_batch(pbounds, trials, min(n_workers, n_iter - len(trials)), rng, init_points)
+            started = time.time()
+            for params, (target, rounds) in zip(batch, pool.map(evaluate_candidate, batch)):
+                trial = {"params": params, "target": target, "best_rounds": rounds,
+                         "batch_seconds": round(time.time() - started, 3), "fingerprint": fingerprint}
+                _append_trial(trials_path, trial)
+                trials.append(trial)
+                print(f"Trial {len(trials)}/{n_iter}: AUC={target:.4f} params={_clean_params(params)}")
+
+    best = max(trials, key=lambda t: t["target"])
+    best_params = _clean_params(best["params"])
+    # Early stopping found how many rounds are actually useful
+    best_params["n_estimators"] = max(1, int(best["best_rounds"]))
+    with open(best_params_path, "w") as fh:
+        json.dump({"params": best_params, "cv_roc_auc": best["target"]}, fh, indent=2)
+    print(f"Best CV ROC AUC {best['target']:.4f}; params written to {best_params_path}")
+    return best_params
+
+
+def load_best_params(default, path=BEST_PARAMS_PATH):
+    """Parameters for final training: the tuned file when present, else `default`."""
+    if os.path.exists(path):
+        with open(path) as fh:
+            return json.load(fh)["params"]
+    return dict(default)
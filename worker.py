@@ -0,0 +1,30 @@
+import argparse
+import os
+
+# Each job worker is already its own process: give it one in-process Tesseract API
+# instead of a nested OCR pool per worker (must be set before utils.ocr_utils is imported)
+os.environ.setdefault("OCR_POOL_SIZE", "0")
+
+from utils.jobs import WorkerPool  # noqa: E402
+from utils.scoring import ModelNotAvailable, load_model  # noqa: E402
+
+# Job kind -> handler, resolved inside each worker process
+from app import JOB_HANDLERS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the document-verification worker pool.")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                        help="number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+    # Load the model before forking so every worker starts warm (the compiled forest is shared)
+    try:
+        load_model()
+    except ModelNotAvailable as e:
+        print(f"{e} Assessments will use the affordability rule only.")
+    print(f"Starting {args.processes} verification workers")
+    WorkerPool(JOB_HANDLERS, processes=args.processes).run()
+
+
+if __name__ == '__main__':
+    main()